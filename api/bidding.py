@@ -0,0 +1,340 @@
+import os
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from mysql.connector import errors
+
+# Smallest amount a new bid must exceed the current price by
+MIN_INCREMENT = Decimal(os.getenv('BID_MIN_INCREMENT', '1.00'))
+
+# Largest number of bids accepted in one batch request
+MAX_BATCH_SIZE = int(os.getenv('BID_BATCH_MAX', 500))
+
+# Upper bound (seconds) a bidder waits for the product row lock before the
+# bid is turned away, so a hot auction cannot pile up blocked workers
+LOCK_WAIT_TIMEOUT = int(os.getenv('BID_LOCK_WAIT_TIMEOUT', 3))
+
+ER_LOCK_WAIT_TIMEOUT = 1205
+ER_LOCK_DEADLOCK = 1213
+
+CENT = Decimal('0.01')
+
+class BidRejected(Exception):
+    def __init__(self, reason, message, status=409, **details):
+        super().__init__(message)
+        self.reason = reason
+        self.message = message
+        self.status = status
+        self.details = details
+
+    def to_dict(self):
+        body = {'accepted': False, 'reason': self.reason, 'error': self.message}
+        body.update(self.details)
+        return body
+
+    def to_response(self):
+        return self.to_dict(), self.status
+
+def parse_amount(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float, Decimal)):
+        raise BidRejected('invalid_amount', 'bidAmount must be a number', status=400)
+    try:
+        amount = Decimal(str(value)).quantize(CENT, rounding=ROUND_HALF_UP)
+    except InvalidOperation:
+        raise BidRejected('invalid_amount', 'bidAmount must be a number', status=400)
+    if not amount.is_finite() or amount <= 0:
+        raise BidRejected('invalid_amount', 'bidAmount must be positive', status=400)
+    return amount
+
+def minimum_bid(product):
+    if product['currentBidPrice'] is None:
+        return Decimal(product['initialBid'])
+    return Decimal(product['currentBidPrice']) + MIN_INCREMENT
+
+# Validate a bid against a locked Product row (which must include the DB's
+# NOW() as 'now'); raises BidRejected when the bid cannot be accepted.
+def check_bid(product, user_id, amount):
+    if product['status'] != 'live':
+        raise BidRejected('not_live', f"Auction is {product['status']}, not live")
+    if product['now'] < product['startTime']:
+        raise BidRejected('not_started', 'Auction has not started yet')
+    if product['now'] >= product['endTime']:
+        raise BidRejected('ended', 'Auction has ended')
+    if product['userId'] is not None and str(product['userId']) == str(user_id):
+        raise BidRejected('own_product', 'Sellers cannot bid on their own product')
+
+    required = minimum_bid(product)
+    if amount < required:
+        raise BidRejected(
+            'too_low',
+            f'Bid must be at least {required}',
+            minimumBid=float(required),
+            currentBidPrice=float(product['currentBidPrice']) if product['currentBidPrice'] is not None else None
+        )
+
+LOCK_PRODUCT_QUERY = """
+    SELECT productId, status, startTime, endTime, initialBid, currentBidPrice, userId, NOW() AS now
+    FROM Product
+    WHERE productId {match}
+    FOR UPDATE
+"""
+
+def _set_lock_wait(cursor):
+    cursor.execute('SET SESSION innodb_lock_wait_timeout = %s', (LOCK_WAIT_TIMEOUT,))
+
+def _reset_lock_wait(cursor):
+    try:
+        cursor.execute('SET SESSION innodb_lock_wait_timeout = DEFAULT')
+    except errors.Error:
+        pass
+
+# Accept or reject a single bid in one short transaction. The product row is
+# locked with SELECT ... FOR UPDATE so concurrent bidders on the same product
+# are serialized: each one sees the price the previous winner left behind.
+def place_bid(connection, user_id, product_id, bid_amount, retries=1):
+    amount = parse_amount(bid_amount)
+
+    cursor = connection.cursor(dictionary=True)
+    try:
+        _set_lock_wait(cursor)
+        while True:
+            try:
+                return _place_bid(connection, cursor, user_id, product_id, amount)
+            except errors.Error as err:
+                connection.rollback()
+                if err.errno == ER_LOCK_DEADLOCK and retries > 0:
+                    retries -= 1
+                    continue
+                if err.errno in (ER_LOCK_WAIT_TIMEOUT, ER_LOCK_DEADLOCK):
+                    raise BidRejected('busy', 'Auction is busy, please retry', status=503)
+                raise
+            except BidRejected:
+                connection.rollback()
+                raise
+    finally:
+        _reset_lock_wait(cursor)
+        cursor.close()
+
+def _place_bid(connection, cursor, user_id, product_id, amount):
+    cursor.execute(LOCK_PRODUCT_QUERY.format(match='= %s'), (product_id,))
+    product = cursor.fetchone()
+    if not product:
+        raise BidRejected('not_found', 'Product not found', status=404)
+
+    check_bid(product, user_id, amount)
+    bid_time = product['now']
+
+    # The new bid becomes the winning one
+    cursor.execute(
+        "UPDATE Bid SET isWinningBid = FALSE WHERE productId = %s AND isWinningBid = TRUE",
+        (product_id,)
+    )
+    cursor.execute(
+        """
+        INSERT INTO Bid (bidAmount, bidTime, isWinningBid, userId, productId)
+        VALUES (%s, %s, TRUE, %s, %s)
+        """,
+        (amount, bid_time, user_id, product_id)
+    )
+    bid_id = cursor.lastrowid
+
+    cursor.execute(
+        """
+        UPDATE Product
+        SET currentBidPrice = %s,
+            bidCount = bidCount + 1,
+            highestBid = GREATEST(COALESCE(highestBid, %s), %s),
+            lastBidAt = %s
+        WHERE productId = %s
+        """,
+        (amount, amount, amount, bid_time, product_id)
+    )
+    connection.commit()
+
+    return {
+        'accepted': True,
+        'bidId': bid_id,
+        'bidAmount': float(amount),
+        'bidTime': bid_time.isoformat(),
+        'isWinningBid': True,
+        'userId': user_id,
+        'productId': product['productId'],
+        'previousBidPrice': float(product['currentBidPrice']) if product['currentBidPrice'] is not None else None,
+        'currentBidPrice': float(amount)
+    }
+
+def _parse_batch_item(index, item):
+    if not isinstance(item, dict):
+        raise BidRejected('invalid', 'Each bid must be an object', status=400)
+    for field in ('bidAmount', 'userId', 'productId'):
+        if field not in item:
+            raise BidRejected('invalid', f'Missing required field: {field}', status=400)
+
+    # The client's bidTime only orders bids for the same product inside the
+    # batch; the stored bidTime is the server's acceptance time.
+    submitted = item.get('bidTime')
+    if submitted is not None:
+        try:
+            submitted = datetime.fromisoformat(str(submitted))
+        except ValueError:
+            raise BidRejected('invalid', 'bidTime must be an ISO 8601 timestamp', status=400)
+        if submitted.tzinfo is not None:
+            submitted = submitted.astimezone(timezone.utc).replace(tzinfo=None)
+
+    return {
+        'index': index,
+        'userId': item['userId'],
+        'productId': item['productId'],
+        'amount': parse_amount(item['bidAmount']),
+        'submitted': submitted,
+    }
+
+# Accept or reject a batch of bids in one transaction. Bids are grouped per
+# product and applied in bid-time order against the locked product rows, the
+# accepted ones are written with a single multi-row INSERT, and everything is
+# committed once. Returns one result per input item, in input order.
+def place_bids(connection, items, retries=1):
+    if len(items) > MAX_BATCH_SIZE:
+        raise BidRejected('too_many', f'At most {MAX_BATCH_SIZE} bids per batch', status=400)
+
+    results = [None] * len(items)
+    bids = []
+    for index, item in enumerate(items):
+        try:
+            bids.append(_parse_batch_item(index, item))
+        except BidRejected as rejected:
+            results[index] = dict(rejected.to_dict(), index=index)
+
+    if not bids:
+        return results
+
+    cursor = connection.cursor(dictionary=True)
+    try:
+        _set_lock_wait(cursor)
+        while True:
+            try:
+                for result in _place_bids(connection, cursor, bids):
+                    results[result['index']] = result
+                return results
+            except errors.Error as err:
+                connection.rollback()
+                if err.errno == ER_LOCK_DEADLOCK and retries > 0:
+                    retries -= 1
+                    continue
+                if err.errno in (ER_LOCK_WAIT_TIMEOUT, ER_LOCK_DEADLOCK):
+                    raise BidRejected('busy', 'Auctions are busy, please retry', status=503)
+                raise
+    finally:
+        _reset_lock_wait(cursor)
+        cursor.close()
+
+def _place_bids(connection, cursor, bids):
+    product_ids = sorted({bid['productId'] for bid in bids}, key=str)
+    placeholders = ', '.join(['%s'] * len(product_ids))
+    # ORDER BY the primary key so concurrent batches take row locks in the
+    # same order and cannot deadlock each other
+    cursor.execute(
+        LOCK_PRODUCT_QUERY.format(match=f'IN ({placeholders}) ORDER BY productId'),
+        tuple(product_ids)
+    )
+    products = {str(row['productId']): dict(row) for row in cursor.fetchall()}
+
+    results, accepted = [], []
+    ordered = sorted(bids, key=lambda bid: (str(bid['productId']), bid['submitted'] or datetime.min, bid['index']))
+    for bid in ordered:
+        product = products.get(str(bid['productId']))
+        try:
+            if not product:
+                raise BidRejected('not_found', 'Product not found', status=404)
+            check_bid(product, bid['userId'], bid['amount'])
+        except BidRejected as rejected:
+            results.append(dict(rejected.to_dict(), index=bid['index']))
+            continue
+
+        # Later bids in the batch are validated against this one
+        bid['previousBidPrice'] = product['currentBidPrice']
+        product['currentBidPrice'] = bid['amount']
+        product['accepted'] = product.get('accepted', 0) + 1
+        accepted.append(bid)
+
+    if not accepted:
+        connection.rollback()
+        return results
+
+    winners = {}
+    for bid in accepted:
+        winners[str(bid['productId'])] = bid['index']
+
+    touched = [products[key]['productId'] for key in winners]
+    placeholders = ', '.join(['%s'] * len(touched))
+    cursor.execute(
+        f"UPDATE Bid SET isWinningBid = FALSE WHERE productId IN ({placeholders}) AND isWinningBid = TRUE",
+        tuple(touched)
+    )
+
+    # executemany collapses this into one multi-row INSERT
+    cursor.executemany(
+        """
+        INSERT INTO Bid (bidAmount, bidTime, isWinningBid, userId, productId)
+        VALUES (%s, %s, %s, %s, %s)
+        """,
+        [
+            (
+                bid['amount'],
+                products[str(bid['productId'])]['now'],
+                winners[str(bid['productId'])] == bid['index'],
+                bid['userId'],
+                products[str(bid['productId'])]['productId']
+            )
+            for bid in accepted
+        ]
+    )
+    first_id = cursor.lastrowid
+
+    # lastrowid is the first row's id. The rest are increasing in VALUES
+    # order but not necessarily consecutive (auto_increment_increment > 1,
+    # innodb_autoinc_lock_mode = 2), so read them back. The product rows are
+    # locked, so no other transaction has added bids on them since.
+    cursor.execute(
+        f"SELECT bidId FROM Bid WHERE productId IN ({placeholders}) AND bidId >= %s ORDER BY bidId",
+        (*touched, first_id)
+    )
+    bid_ids = [row['bidId'] for row in cursor.fetchall()]
+
+    cursor.executemany(
+        """
+        UPDATE Product
+        SET currentBidPrice = %s,
+            bidCount = bidCount + %s,
+            highestBid = GREATEST(COALESCE(highestBid, %s), %s),
+            lastBidAt = %s
+        WHERE productId = %s
+        """,
+        [
+            (
+                products[key]['currentBidPrice'],
+                products[key]['accepted'],
+                products[key]['currentBidPrice'],
+                products[key]['currentBidPrice'],
+                products[key]['now'],
+                products[key]['productId']
+            )
+            for key in winners
+        ]
+    )
+    connection.commit()
+
+    for bid_id, bid in zip(bid_ids, accepted):
+        product = products[str(bid['productId'])]
+        results.append({
+            'index': bid['index'],
+            'accepted': True,
+            'bidId': bid_id,
+            'bidAmount': float(bid['amount']),
+            'bidTime': product['now'].isoformat(),
+            'isWinningBid': winners[str(bid['productId'])] == bid['index'],
+            'userId': bid['userId'],
+            'productId': product['productId'],
+            'previousBidPrice': float(bid['previousBidPrice']) if bid['previousBidPrice'] is not None else None,
+            'currentBidPrice': float(bid['amount'])
+        })
+    return results
@@ -0,0 +1,136 @@
+import hashlib
+import hmac
+import logging
+import os
+import random
+import tempfile
+import time
+from logging.handlers import RotatingFileHandler
+from flask import g, request
+from encoding import dumps
+
+# Traffic capture for load testing. A sampled fraction of API requests is
+# appended to a JSONL log, one compact line per request: arrival time, method,
+# route rule and path, query args, JSON body, status, duration and response
+# size. bench/replay.py re-issues the captured mix against another instance.
+#
+# Request headers are never stored; `auth` only records whether a bearer
+# token was sent, so replay can supply its own. User fields (names, contact
+# details, passwords, tokens) are replaced before anything is written:
+# secrets with a fixed marker, other values with a keyed hash, so one person
+# keeps one pseudonym within a log but the original value cannot be read back.
+
+# Fraction of requests captured; 0 turns capture off
+SAMPLE_RATE = float(os.getenv('CAPTURE_SAMPLE_RATE', 0))
+
+LOG_PATH = os.getenv('CAPTURE_LOG', os.path.join(tempfile.gettempdir(), 'probidder-traffic.jsonl'))
+LOG_MAX_BYTES = int(os.getenv('CAPTURE_LOG_MAX_BYTES', 100 * 1024 * 1024))
+LOG_BACKUPS = int(os.getenv('CAPTURE_LOG_BACKUPS', 5))
+
+# Only the API is captured, not /metrics or /debug
+PATH_PREFIX = '/api/'
+
+SECRET_FIELDS = {'password', 'passwdHash', 'accessToken', 'refreshToken', 'transactionId'}
+PII_FIELDS = {'username', 'email', 'phone', 'firstName', 'lastName', 'houseFlatNo', 'street', 'city', 'pincode'}
+
+# Per-process key for pseudonyms; logs from different processes do not link
+_PSEUDONYM_KEY = os.urandom(16)
+
+def pseudonym(field, value):
+    token = hmac.new(_PSEUDONYM_KEY, f'{field}:{value}'.encode('utf-8'), hashlib.sha256).hexdigest()[:12]
+    if field == 'email':
+        return f'{token}@redacted.invalid'
+    if field in ('phone', 'pincode'):
+        # Keep the length and digits-only shape for validation on replay
+        digits = str(int(token, 16))
+        return digits[:len(str(value))].rjust(len(str(value)), '0')
+    return f'redacted-{token}'
+
+def scrub(value):
+    if isinstance(value, dict):
+        return {key: _scrub_field(key, item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [scrub(item) for item in value]
+    return value
+
+def _scrub_field(key, value):
+    if value is None:
+        return None
+    if isinstance(value, list):
+        return [_scrub_field(key, item) for item in value]
+    if key in SECRET_FIELDS:
+        return '[redacted]'
+    if key in PII_FIELDS:
+        return pseudonym(key, value)
+    return scrub(value)
+
+
+class TrafficLog:
+    def __init__(self, sample_rate=SAMPLE_RATE, path=LOG_PATH, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS):
+        self.sample_rate = sample_rate
+        self.path = path
+        self._logger = None
+        self._log_args = (max_bytes, backups)
+        self.captured = 0
+
+    def _get_logger(self):
+        if self._logger is None:
+            logger = logging.getLogger('probidder.capture')
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            max_bytes, backups = self._log_args
+            try:
+                handler = RotatingFileHandler(self.path, maxBytes=max_bytes, backupCount=backups)
+            except OSError as e:
+                print(f"Traffic capture unavailable: {e}")
+                handler = logging.NullHandler()
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+            self._logger = logger
+        return self._logger
+
+    def write(self, record):
+        self._get_logger().info(dumps(record).decode('utf-8'))
+        self.captured += 1
+
+    def stats(self):
+        return {'sample_rate': self.sample_rate, 'captured': self.captured}
+
+
+traffic_log = TrafficLog()
+
+def before_request():
+    if random.random() >= traffic_log.sample_rate or not request.path.startswith(PATH_PREFIX):
+        return
+    g._capture = (time.time(), time.perf_counter())
+
+def after_request(response):
+    started = g.pop('_capture', None)
+    if started is None:
+        return response
+    arrived, perf_started = started
+
+    body = None
+    if request.is_json:
+        body = scrub(request.get_json(silent=True))
+    args = scrub(request.args.to_dict(flat=False))
+    traffic_log.write({
+        'ts': round(arrived, 6),
+        'method': request.method,
+        'route': request.url_rule.rule if request.url_rule is not None else None,
+        'path': request.path,
+        'args': {key: values[0] if len(values) == 1 else values for key, values in args.items()},
+        'body': body,
+        'auth': request.headers.get('Authorization', '').startswith('Bearer '),
+        'status': response.status_code,
+        'ms': round((time.perf_counter() - perf_started) * 1000, 3),
+        # Streamed bodies (SSE, NDJSON exports) have no size up front
+        'bytes': None if response.is_streamed else response.calculate_content_length(),
+    })
+    return response
+
+def install(blueprint):
+    if traffic_log.sample_rate <= 0:
+        return
+    blueprint.before_request(before_request)
+    blueprint.after_request(after_request)
@@ -0,0 +1,233 @@
+import csv
+import io
+import json
+import os
+import time
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from mysql.connector import Error
+
+# Rows per chunk; each chunk is one transaction with one multi-row INSERT per table
+DEFAULT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', 1000))
+
+# Per-row errors kept in the report; the count is always exact
+MAX_REPORTED_ERRORS = 1000
+
+CONDITIONS = {'new', 'used', 'refurbished'}
+STATUSES = {'live', 'sold', 'upcoming'}
+
+INSERT_PRODUCT_QUERY = '''
+INSERT INTO Product (title, description, `condition`, initialBid, status, startTime, endTime, userId)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+'''
+INSERT_CATPROD_QUERY = 'INSERT INTO Cat_Prod (categoryId, productId) VALUES (%s, %s)'
+INSERT_IMAGE_QUERY = 'INSERT INTO Product_img (productId, imageURL) VALUES (%s, %s)'
+
+class RowError(ValueError):
+    pass
+
+# Yield (line number, raw row) pairs from a JSONL or CSV text stream. CSV
+# images are '|' separated; JSONL images are a list.
+def read_rows(stream, fmt):
+    if fmt == 'jsonl':
+        for line_no, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except ValueError as e:
+                yield line_no, RowError(f'Invalid JSON: {e}')
+    elif fmt == 'csv':
+        # Line 1 is the header
+        for line_no, row in enumerate(csv.DictReader(stream), start=2):
+            images = row.get('images')
+            row['images'] = [url for url in images.split('|') if url] if images else []
+            yield line_no, row
+    else:
+        raise ValueError(f'Unsupported format: {fmt}')
+
+def _parse_time(value, field):
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        raise RowError(f'{field} must be an ISO 8601 timestamp')
+
+def parse_row(row):
+    if isinstance(row, Exception):
+        raise row
+    if not isinstance(row, dict):
+        raise RowError('Row must be an object')
+
+    for field in ('title', 'condition', 'initialBid', 'status', 'startTime', 'endTime', 'categoryId'):
+        if row.get(field) in (None, ''):
+            raise RowError(f'Missing required field: {field}')
+
+    if row['condition'] not in CONDITIONS:
+        raise RowError(f"condition must be one of {', '.join(sorted(CONDITIONS))}")
+    if row['status'] not in STATUSES:
+        raise RowError(f"status must be one of {', '.join(sorted(STATUSES))}")
+
+    try:
+        initial_bid = Decimal(str(row['initialBid']))
+    except InvalidOperation:
+        raise RowError('initialBid must be a number')
+
+    try:
+        category_id = int(row['categoryId'])
+        seller_id = int(row['userId']) if row.get('userId') not in (None, '') else None
+    except (TypeError, ValueError):
+        raise RowError('categoryId and userId must be integers')
+
+    start_time = _parse_time(row['startTime'], 'startTime')
+    end_time = _parse_time(row['endTime'], 'endTime')
+    if end_time <= start_time:
+        raise RowError('endTime must be after startTime')
+
+    images = row.get('images') or []
+    if not isinstance(images, list) or not all(isinstance(url, str) for url in images):
+        raise RowError('images must be a list of URLs')
+
+    return {
+        'product': (row['title'], row.get('description') or None, row['condition'], initial_bid,
+                    row['status'], start_time, end_time, seller_id),
+        'categoryId': category_id,
+        'images': images,
+    }
+
+# Ids of the rows a multi-row INSERT just added, in input order. lastrowid is
+# the first row's id and the rest increase in VALUES order, but they are not
+# necessarily consecutive: auto_increment_increment may be > 1, and with
+# innodb_autoinc_lock_mode = 2 concurrent inserts interleave. Rows other
+# sessions committed in between are skipped by matching the inserted values.
+def new_product_ids(cursor, first_id, chunk):
+    if len(chunk) == 1:
+        return [first_id]
+    cursor.execute(
+        'SELECT productId, title, `condition`, status, userId FROM Product WHERE productId >= %s ORDER BY productId',
+        (first_id,)
+    )
+    ids = []
+    for product_id, *values in cursor.fetchall():
+        if len(ids) == len(chunk):
+            break
+        product = chunk[len(ids)]['product']
+        if values == [product[0], product[2], product[4], product[7]]:
+            ids.append(product_id)
+    if len(ids) != len(chunk):
+        # Rolled back and retried row by row by _flush
+        raise Error(f'Read back {len(ids)} of {len(chunk)} new product ids')
+    return ids
+
+# Insert a chunk of parsed rows: one multi-row INSERT per table, one commit
+def insert_chunk(connection, cursor, chunk):
+    cursor.executemany(INSERT_PRODUCT_QUERY, [row['product'] for row in chunk])
+    product_ids = new_product_ids(cursor, cursor.lastrowid, chunk)
+
+    cursor.executemany(
+        INSERT_CATPROD_QUERY,
+        [(row['categoryId'], product_id) for product_id, row in zip(product_ids, chunk)]
+    )
+    images = [
+        (product_id, url)
+        for product_id, row in zip(product_ids, chunk)
+        for url in row['images']
+    ]
+    if images:
+        cursor.executemany(INSERT_IMAGE_QUERY, images)
+    connection.commit()
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self.started = time.perf_counter()
+
+    def error(self, line_no, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line_no, 'error': message})
+
+    def to_dict(self):
+        seconds = time.perf_counter() - self.started
+        return {
+            'rows': self.rows,
+            'imported': self.imported,
+            'failed': self.failed,
+            'seconds': round(seconds, 3),
+            'rowsPerSec': round(self.imported / seconds, 1) if seconds else None,
+            'errors': self.errors,
+        }
+
+def _flush(connection, cursor, chunk, report):
+    rows = [row for _, row in chunk]
+    try:
+        insert_chunk(connection, cursor, rows)
+        report.imported += len(rows)
+        return
+    except Error:
+        connection.rollback()
+
+    # Something in the chunk was rejected by the database (e.g. an unknown
+    # categoryId); retry row by row so only the offending rows fail
+    for line_no, row in chunk:
+        try:
+            insert_chunk(connection, cursor, [row])
+            report.imported += 1
+        except Error as e:
+            connection.rollback()
+            report.error(line_no, str(e))
+
+# Stream rows from `stream` into the catalog in chunks of `batch_size` rows
+def import_products(connection, stream, fmt, batch_size=DEFAULT_BATCH_SIZE):
+    report = ImportReport()
+    cursor = connection.cursor()
+    try:
+        chunk = []
+        for line_no, raw in read_rows(stream, fmt):
+            report.rows += 1
+            try:
+                chunk.append((line_no, parse_row(raw)))
+            except RowError as e:
+                report.error(line_no, str(e))
+                continue
+
+            if len(chunk) >= batch_size:
+                _flush(connection, cursor, chunk, report)
+                chunk = []
+
+        if chunk:
+            _flush(connection, cursor, chunk, report)
+        return report.to_dict()
+    finally:
+        cursor.close()
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+    from models import create_connection
+
+    parser = argparse.ArgumentParser(description='Bulk import products from a JSONL or CSV file')
+    parser.add_argument('path')
+    parser.add_argument('--format', choices=['jsonl', 'csv'], help='defaults to the file extension')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    fmt = args.format or ('csv' if args.path.endswith('.csv') else 'jsonl')
+    connection = create_connection()
+    try:
+        with io.open(args.path, encoding='utf-8', newline='') as stream:
+            report = import_products(connection, stream, fmt, args.batch_size)
+    finally:
+        connection.close()
+
+    for entry in report['errors']:
+        print(f"line {entry['line']}: {entry['error']}", file=sys.stderr)
+    print(f"{report['imported']}/{report['rows']} rows imported in {report['seconds']}s "
+          f"({report['rowsPerSec']} rows/sec), {report['failed']} failed")
+    sys.exit(1 if report['failed'] else 0)
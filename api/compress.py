@@ -0,0 +1,166 @@
+import os
+import time
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from compression import zstd  # Python 3.14+
+except ImportError:
+    zstd = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Negotiated response compression. gzip is always available; br and zstd are
+# offered when their modules are installed. Small bodies are sent as-is, and
+# streamed responses are compressed chunk by chunk with a flush after each
+# chunk, so NDJSON clients still see rows as they are produced.
+
+# Bodies smaller than this are not worth the CPU
+MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+
+# Server preference among encodings the client accepts with equal quality
+PREFERENCE = [name.strip() for name in os.getenv('COMPRESS_ENCODINGS', 'zstd,br,gzip').split(',') if name.strip()]
+
+# Levels for per-request compression, where latency matters, and for
+# snapshot bodies, which are compressed once and served many times
+LEVELS = {
+    'gzip': int(os.getenv('COMPRESS_GZIP_LEVEL', 5)),
+    'br': int(os.getenv('COMPRESS_BROTLI_LEVEL', 4)),
+    'zstd': int(os.getenv('COMPRESS_ZSTD_LEVEL', 3)),
+}
+STATIC_LEVELS = {'gzip': 9, 'br': 11, 'zstd': 19}
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/x-ndjson', 'text/plain', 'text/csv', 'text/html'}
+
+def _gzip(data, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+def _gzip_stream(level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+ENCODERS = {'gzip': (_gzip, _gzip_stream)}
+
+if brotli is not None:
+    def _brotli_stream(level):
+        compressor = brotli.Compressor(quality=level)
+        return lambda chunk: compressor.process(chunk) + compressor.flush(), compressor.finish
+
+    ENCODERS['br'] = (lambda data, level: brotli.compress(data, quality=level), _brotli_stream)
+
+if zstd is not None:
+    def _zstd_stream(level):
+        compressor = zstd.ZstdCompressor(level=level)
+        return (lambda chunk: compressor.compress(chunk, mode=zstd.ZstdCompressor.FLUSH_BLOCK),
+                compressor.flush)
+
+    ENCODERS['zstd'] = (lambda data, level: zstd.compress(data, level=level), _zstd_stream)
+elif zstandard is not None:
+    def _zstd_stream(level):
+        compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        return (lambda chunk: compressor.compress(chunk) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+                compressor.flush)
+
+    ENCODERS['zstd'] = (lambda data, level: zstandard.ZstdCompressor(level=level).compress(data), _zstd_stream)
+
+# Per-encoding CPU cost versus bytes saved
+_stats = {}
+
+def _record(encoding, size_in, size_out, seconds):
+    stats = _stats.get(encoding)
+    if stats is None:
+        stats = _stats[encoding] = {'responses': 0, 'bytes_in': 0, 'bytes_out': 0, 'seconds': 0.0}
+    stats['responses'] += 1
+    stats['bytes_in'] += size_in
+    stats['bytes_out'] += size_out
+    stats['seconds'] += seconds
+
+def stats():
+    result = {}
+    for encoding, stats in list(_stats.items()):
+        stats = dict(stats)
+        stats['ratio'] = round(stats['bytes_out'] / stats['bytes_in'], 4) if stats['bytes_in'] else None
+        result[encoding] = stats
+    return result
+
+# Best encoding the client accepts, or None for identity
+def negotiate():
+    accepted = request.accept_encodings
+    best, best_quality = None, 0
+    for name in PREFERENCE:
+        if name not in ENCODERS:
+            continue
+        quality = accepted.quality(name)
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+def compress(data, encoding, static=False):
+    level = (STATIC_LEVELS if static else LEVELS)[encoding]
+    started = time.perf_counter()
+    compressed = ENCODERS[encoding][0](data, level)
+    _record(encoding, len(data), len(compressed), time.perf_counter() - started)
+    return compressed
+
+def _compress_stream(chunks, encoding):
+    process, finish = ENCODERS[encoding][1](LEVELS[encoding])
+    size_in = size_out = 0
+    seconds = 0.0
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            started = time.perf_counter()
+            compressed = process(chunk)
+            seconds += time.perf_counter() - started
+            size_in += len(chunk)
+            size_out += len(compressed)
+            if compressed:
+                yield compressed
+        tail = finish()
+        size_out += len(tail)
+        yield tail
+        _record(encoding, size_in, size_out, seconds)
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+# after_request hook: compress eligible responses for the negotiated encoding
+def compress_response(response):
+    if (request.method == 'HEAD'
+            or response.status_code < 200 or response.status_code in (204, 206, 304)
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate()
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < MIN_SIZE:
+            return response
+        response.set_data(compress(body, encoding))
+
+    response.headers['Content-Encoding'] = encoding
+    # The bytes now differ per encoding, so a strong validator would be wrong
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
@@ -0,0 +1,43 @@
+import hashlib
+import os
+from datetime import datetime, timezone
+from flask import request, Response
+from werkzeug.http import http_date
+
+# HTTP validators for catalog resources. Rows carry an updatedAt version
+# (schema version 4); a resource reads it with a primary-key or index-only
+# lookup, answers a matching If-None-Match / If-Modified-Since with 304 and
+# only otherwise runs its full row and image fetches.
+
+# Sent with validated responses so browsers and the CDN revalidate instead of
+# serving from cache blindly
+CACHE_CONTROL = os.getenv('CONDITIONAL_CACHE_CONTROL', 'no-cache')
+
+# Strong ETag for a representation: the row version plus anything else the
+# body depends on (requested fields, paging arguments)
+def make_etag(kind, version, *variant):
+    digest = hashlib.sha1(repr((kind, str(version), variant)).encode('utf-8')).hexdigest()[:20]
+    return f'{kind}-{digest}'
+
+# `version` is UNIX_TIMESTAMP(updatedAt), a Decimal with microseconds
+def validator_headers(etag, version):
+    headers = {'ETag': f'"{etag}"', 'Cache-Control': CACHE_CONTROL}
+    if version is not None:
+        headers['Last-Modified'] = http_date(datetime.fromtimestamp(int(version), timezone.utc))
+    return headers
+
+def not_modified(etag, version):
+    # If-None-Match takes precedence; If-Modified-Since only has second
+    # resolution, so it is the fallback for clients without the ETag
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    if since is not None and version is not None:
+        return int(version) <= since.timestamp()
+    return False
+
+# A 304 for the client's cached copy, or None if it has to be sent in full
+def conditional_response(etag, version):
+    if not_modified(etag, version):
+        return Response(status=304, headers=validator_headers(etag, version))
+    return None
@@ -0,0 +1,41 @@
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Response encoding. orjson is used when it is installed, with the stdlib json
+# module as the fallback; both produce the same output for the values rows
+# carry: DECIMAL columns become numbers and DATETIME/DATE columns ISO 8601
+# strings, so serializers can hand raw cursor values straight through.
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode('utf-8')
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    # Encode `obj` as UTF-8 JSON bytes
+    def dumps(obj):
+        return orjson.dumps(obj, default=_default, option=_OPTIONS)
+else:
+    _encoder = json.JSONEncoder(default=_default, ensure_ascii=False, separators=(',', ':'))
+
+    # Encode `obj` as UTF-8 JSON bytes
+    def dumps(obj):
+        return _encoder.encode(obj).encode('utf-8')
+
+ENCODER = 'orjson' if orjson is not None else 'json'
@@ -0,0 +1,77 @@
+from functools import lru_cache
+from flask import request
+from serializers import row_serializer, PRODUCT_FIELDS
+
+# Sparse fieldsets. A ?fields=a,b,c parameter picks the output fields of a
+# read; the same list drives the SELECT column list and the row serializer,
+# so unrequested columns (e.g. a TEXT description) are neither read from
+# MySQL nor sent. ?fields=all returns every field.
+
+class InvalidFields(ValueError):
+    pass
+
+@lru_cache(maxsize=256)
+def serializer_for(fields):
+    return row_serializer(*fields)
+
+class Fieldset:
+    # `columns` maps output field -> table column; `virtual` fields are
+    # filled in after the query (e.g. images)
+    def __init__(self, columns, virtual=()):
+        self.columns = dict(columns)
+        self.virtual = tuple(virtual)
+        self.allowed = tuple(self.columns) + self.virtual
+
+    # Output fields requested with ?fields=, in request order, or `default`
+    def requested(self, default):
+        raw = request.args.get('fields')
+        if not raw:
+            return tuple(default)
+        if raw == 'all':
+            return self.allowed
+
+        fields = tuple(dict.fromkeys(field.strip() for field in raw.split(',') if field.strip()))
+        unknown = [field for field in fields if field not in self.allowed]
+        if unknown or not fields:
+            raise InvalidFields(f"Unknown fields: {', '.join(unknown)}. Allowed values are {', '.join(self.allowed)}")
+        return fields
+
+    # SELECT list for `fields`, plus `required` columns the query itself
+    # needs (sort keys, ids for hydration) whether or not they are returned
+    def select(self, fields, required=(), table=None):
+        prefix = f'{table}.' if table else ''
+        names = dict.fromkeys(list(required) + [field for field in fields if field not in self.virtual])
+        expressions = []
+        for name in names:
+            column = self.columns[name]
+            expression = f'{prefix}`{column}`'
+            expressions.append(expression if column == name else f'{expression} AS {name}')
+        return ', '.join(expressions)
+
+    def serializer(self, fields):
+        return serializer_for(tuple(fields))
+
+
+product_fields = Fieldset(
+    {**{field: field for field in PRODUCT_FIELDS}, 'bidCount': 'bidCount', 'highestBid': 'highestBid', 'userId': 'userId'},
+    virtual=('images',)
+)
+
+# TrendingProducts has always called the bid count 'bid_count'
+trending_fields = Fieldset(
+    {**product_fields.columns, 'bid_count': 'bidCount'},
+    virtual=('images',)
+)
+
+user_fields = Fieldset({field: field for field in (
+    'userId', 'username', 'phone', 'email', 'firstName', 'lastName',
+    'houseFlatNo', 'street', 'city', 'pincode', 'dateJoined', 'isVerified'
+)})
+
+# Detail views keep their full shape by default; list views default to what
+# a product card shows
+PRODUCT_DETAIL_FIELDS = PRODUCT_FIELDS + ('images',)
+PRODUCT_LIST_FIELDS = ('productId', 'title', 'condition', 'currentBidPrice', 'status', 'startTime', 'endTime', 'images')
+TRENDING_FIELDS = ('productId', 'title', 'bid_count', 'currentBidPrice', 'condition', 'status',
+                   'startTime', 'endTime', 'images')
+USER_DETAIL_FIELDS = user_fields.allowed
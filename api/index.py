@@ -1,18 +1,38 @@
 import os
 from flask import Flask
 from routes import appbp
-from models import create_tables
+from models import create_tables, migrate_schema
+from scheduler import auction_scheduler
+import profiling
 
 app = Flask(__name__)
 
 app.config['DB_URI'] = os.environ.get('DB_URI')
-app.config['SECRET_KEY'] = os.urandom(24)
+
+# Session tokens are signed with SECRET_KEY, so it has to be the same on every
+# instance and across restarts. Retired keys listed in SECRET_KEY_FALLBACKS
+# (comma separated) are still accepted while their tokens expire.
+app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY')
+app.config['SECRET_KEY_FALLBACKS'] = [key for key in os.environ.get('SECRET_KEY_FALLBACKS', '').split(',') if key]
+if not app.config['SECRET_KEY']:
+    print("SECRET_KEY is not set; using a random key, so issued tokens stop working on restart")
+    app.config['SECRET_KEY'] = os.urandom(24)
+
+# Profile sampled requests (PROFILE_SAMPLE_RATE) and ones that ask for it with
+# X-Profile-Token; output goes to PROFILE_DIR
+profiling.install(app)
 
 try:
     with app.app_context():
         app.register_blueprint(appbp)
 
         create_tables()
+        migrate_schema()
+
+        # Drive upcoming/live/sold transitions in the background; deployments
+        # that cannot keep a thread alive run 'python scheduler.py --once' from cron
+        if os.environ.get('AUCTION_SCHEDULER', '1') != '0':
+            auction_scheduler.start()
 
 except Exception as e:
     print(f"An error occurred: {e}")
@@ -0,0 +1,200 @@
+import bisect
+import threading
+import time
+from flask import g, request, has_request_context, Response
+
+# Request and query metrics in the Prometheus text exposition format, served
+# at /metrics. Request hooks on the API blueprint record per-route latency,
+# status and in-flight counts; a query listener on the connection pool adds
+# query count, rows fetched and DB time to the route that issued them (or to
+# route="background" for the scheduler, snapshots and other threads).
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+METRICS = {
+    'http_requests_total': ('counter', 'Requests handled, by route and status'),
+    'http_request_duration_seconds': ('histogram', 'Time to produce the response, by route'),
+    'http_requests_in_flight': ('gauge', 'Requests currently being handled'),
+    'db_queries_total': ('counter', 'SQL statements executed, by route'),
+    'db_query_errors_total': ('counter', 'SQL statements that raised, by route'),
+    'db_rows_fetched_total': ('counter', 'Rows fetched from MySQL, by route'),
+    'db_seconds_total': ('counter', 'Time spent executing statements and fetching rows, by route'),
+    'db_queries_per_request': ('histogram', 'SQL statements per request, by route'),
+    'db_seconds_per_request': ('histogram', 'DB time per request, by route'),
+}
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}       # (name, labels) -> value
+        self._histograms = {}   # (name, labels) -> [bucket counts..., sum, count]
+        self._buckets = {}
+        self._collectors = []
+
+    def inc(self, name, labels, value=1):
+        key = (name, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def set(self, name, labels, value):
+        with self._lock:
+            self._values[(name, labels)] = value
+
+    def observe(self, name, labels, value, buckets):
+        key = (name, labels)
+        with self._lock:
+            self._buckets[name] = buckets
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * (len(buckets) + 2)
+            histogram[bisect.bisect_left(buckets, value)] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    # fn() returns [(name, type, help, [(labels, value), ...]), ...] at scrape time
+    def register_collector(self, fn):
+        self._collectors.append(fn)
+
+    def render(self):
+        with self._lock:
+            values = dict(self._values)
+            histograms = {key: list(counts) for key, counts in self._histograms.items()}
+            buckets = dict(self._buckets)
+
+        families = {}
+        for (name, labels), value in values.items():
+            families.setdefault(name, []).append(_sample(name, labels, value))
+        for (name, labels), counts in histograms.items():
+            lines = families.setdefault(name, [])
+            cumulative = 0
+            for bound, count in zip(buckets[name] + (float('inf'),), counts):
+                cumulative += count
+                lines.append(_sample(f'{name}_bucket', labels + (('le', _format(bound)),), cumulative))
+            lines.append(_sample(f'{name}_sum', labels, counts[-2]))
+            lines.append(_sample(f'{name}_count', labels, counts[-1]))
+
+        out = []
+        for name, lines in families.items():
+            kind, help_text = METRICS.get(name, ('untyped', name))
+            out.append(f'# HELP {name} {help_text}')
+            out.append(f'# TYPE {name} {kind}')
+            out.extend(lines)
+
+        for collector in self._collectors:
+            try:
+                collected = collector()
+            except Exception as e:
+                print(f"Metrics collector failed: {e}")
+                continue
+            for name, kind, help_text, samples in collected:
+                out.append(f'# HELP {name} {help_text}')
+                out.append(f'# TYPE {name} {kind}')
+                out.extend(_sample(name, tuple(sorted(labels.items())), value) for labels, value in samples)
+        return '\n'.join(out) + '\n'
+
+def _format(value):
+    return '+Inf' if value == float('inf') else str(value)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _sample(name, labels, value):
+    if labels:
+        rendered = ','.join(f'{key}="{_escape(val)}"' for key, val in labels)
+        return f'{name}{{{rendered}}} {_format(value)}'
+    return f'{name} {_format(value)}'
+
+
+registry = Registry()
+
+# Expose the numeric entries of a stats() dict as `{prefix}_{key}` gauges.
+# Nested dicts (e.g. per-encoding stats) become a label named `nested_label`.
+def stats_collector(prefix, stats_fn, help_text, nested_label=None, **labels):
+    def collect():
+        families = {}
+        for key, value in stats_fn().items():
+            if isinstance(value, dict) and nested_label:
+                for inner_key, inner_value in value.items():
+                    if isinstance(inner_value, (int, float)) and not isinstance(inner_value, bool):
+                        families.setdefault(f'{prefix}_{inner_key}', []).append(
+                            ({**labels, nested_label: key}, inner_value))
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                families.setdefault(f'{prefix}_{key}', []).append((dict(labels), value))
+        return [(name, 'gauge', f'{help_text}: {name[len(prefix) + 1:]}', samples)
+                for name, samples in families.items()]
+    registry.register_collector(collect)
+
+class RequestMetrics:
+    __slots__ = ('route', 'started', 'queries', 'rows', 'db_seconds', 'recorded')
+
+    def __init__(self, route):
+        self.route = route
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.rows = 0
+        self.db_seconds = 0.0
+        self.recorded = False
+
+def _route():
+    rule = request.url_rule
+    return rule.rule if rule is not None else 'unmatched'
+
+def before_request():
+    g._metrics = RequestMetrics(_route())
+    registry.inc('http_requests_in_flight', (), 1)
+
+def after_request(response):
+    current = g.get('_metrics')
+    if current is not None and not current.recorded:
+        _record_request(current, request.method, response.status_code)
+    return response
+
+# Requests that raised never reach after_request; they count as 500s. DB
+# totals are taken here, after streamed bodies have finished.
+def teardown_request(exc):
+    current = g.get('_metrics')
+    if current is None:
+        return
+    if not current.recorded:
+        _record_request(current, request.method, 500)
+    labels = (('route', current.route),)
+    registry.observe('db_queries_per_request', labels, current.queries, QUERY_COUNT_BUCKETS)
+    registry.observe('db_seconds_per_request', labels, current.db_seconds, LATENCY_BUCKETS)
+    registry.inc('http_requests_in_flight', (), -1)
+    g._metrics = None
+
+def _record_request(current, method, status):
+    current.recorded = True
+    elapsed = time.perf_counter() - current.started
+    registry.inc('http_requests_total', (('method', method), ('route', current.route), ('status', str(status))))
+    registry.observe('http_request_duration_seconds', (('method', method), ('route', current.route)),
+                     elapsed, LATENCY_BUCKETS)
+
+# Connection pool query listener
+def record_query(event):
+    current = g.get('_metrics') if has_request_context() else None
+    route = current.route if current is not None else 'background'
+    if current is not None:
+        current.queries += 1
+        current.rows += event.rows
+        current.db_seconds += event.seconds
+
+    labels = (('route', route),)
+    registry.inc('db_queries_total', labels)
+    registry.inc('db_rows_fetched_total', labels, event.rows)
+    registry.inc('db_seconds_total', labels, event.seconds)
+    if event.error is not None:
+        registry.inc('db_query_errors_total', labels)
+
+def metrics_view():
+    return Response(registry.render(), mimetype='text/plain', headers={'Content-Type': 'text/plain; version=0.0.4'})
+
+def install(blueprint, pool):
+    registry.set('http_requests_in_flight', (), 0)
+    blueprint.before_request(before_request)
+    blueprint.after_request(after_request)
+    blueprint.teardown_request(teardown_request)
+    blueprint.add_url_rule('/metrics', 'metrics', metrics_view)
+    pool.listen(record_query)
+    stats_collector('db_pool', pool.stats, 'Connection pool')
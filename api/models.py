@@ -1,18 +1,39 @@
 import mysql.connector
 import os
+import threading
 from dotenv import load_dotenv
+from pool import ConnectionPool
 
+load_dotenv()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    {
+                        'host': os.getenv('DB_HOST'),
+                        'port': os.getenv('DB_PORT'),
+                        'user': os.getenv('DB_USER'),
+                        'password': os.getenv('DB_PASS'),
+                        'database': os.getenv('DB_NAME'),
+                    },
+                    size=int(os.getenv('DB_POOL_SIZE', 5)),
+                    max_overflow=int(os.getenv('DB_POOL_MAX_OVERFLOW', 10)),
+                    timeout=float(os.getenv('DB_POOL_TIMEOUT', 30)),
+                    recycle=float(os.getenv('DB_POOL_RECYCLE', 1800)),
+                    pre_ping=os.getenv('DB_POOL_PRE_PING', '1') not in ('0', 'false', 'False'),
+                )
+    return _pool
+
+# Borrow a connection from the process-wide pool; conn.close() hands it back
 def create_connection():
     try:
-        load_dotenv()
-        conn = mysql.connector.connect(
-            host=os.getenv('DB_HOST'),
-            port=os.getenv('DB_PORT'),
-            user=os.getenv('DB_USER'),
-            password=os.getenv('DB_PASS'),
-            database=os.getenv('DB_NAME')
-        )
-        return conn
+        return get_pool().get_connection()
     except mysql.connector.Error as err:
         print(f"Error: {err}")
         return None
@@ -137,3 +158,258 @@ def create_tables():
     finally:
         cursor.close()
         connection.close()
+
+# Versioned schema steps applied on top of create_tables(). Append new steps
+# with the next version number; never edit a step that has shipped.
+SCHEMA_MIGRATIONS = [
+    (1, 'Secondary indexes for hot route queries', [
+        # ProductHighestBid / ProductBids: WHERE productId = ? ORDER BY bidAmount DESC
+        'CREATE INDEX idx_bid_product_amount ON Bid (productId, bidAmount)',
+        # UserBids: WHERE userId = ?
+        'CREATE INDEX idx_bid_user ON Bid (userId, bidTime)',
+        # ProductList, LHTProducts live section: WHERE status = ? ORDER BY startTime
+        'CREATE INDEX idx_product_status_start ON Product (status, startTime)',
+        # UserOrders: WHERE userId = ?
+        'CREATE INDEX idx_order_user ON `Order` (userId, orderDate)',
+        # UserRegistration relies on this instead of a pre-check SELECT
+        'CREATE UNIQUE INDEX uq_user_username ON User (username)',
+        # CategoryProducts filters Cat_Prod.categoryId, which is already the
+        # leading column of its primary key, so it needs no extra index.
+    ]),
+    (2, 'Denormalized bid aggregates on Product', [
+        '''
+        ALTER TABLE Product
+            ADD COLUMN bidCount INT NOT NULL DEFAULT 0,
+            ADD COLUMN highestBid DECIMAL(10, 2),
+            ADD COLUMN lastBidAt DATETIME
+        ''',
+        # TrendingProducts / LHTProducts rank on these as indexed top-N reads
+        'CREATE INDEX idx_product_bid_count ON Product (bidCount)',
+        'CREATE INDEX idx_product_highest_bid ON Product (highestBid)',
+        # Backfill from the existing bid history
+        '''
+        UPDATE Product p
+        LEFT JOIN (
+            SELECT productId, COUNT(*) AS bidCount, MAX(bidAmount) AS highestBid, MAX(bidTime) AS lastBidAt
+            FROM Bid
+            GROUP BY productId
+        ) b ON b.productId = p.productId
+        SET p.bidCount = COALESCE(b.bidCount, 0), p.highestBid = b.highestBid, p.lastBidAt = b.lastBidAt
+        ''',
+    ]),
+    (3, 'Keyset pagination index for product bid histories', [
+        # ProductBids: WHERE productId = ? ORDER BY bidTime DESC, bidId DESC
+        'CREATE INDEX idx_bid_product_time ON Bid (productId, bidTime)',
+    ]),
+    (4, 'Row versions for conditional catalog requests', [
+        # ON UPDATE only fires when a column value changes; writes that only
+        # touch Product_img set Product.updatedAt explicitly
+        '''
+        ALTER TABLE Product
+            ADD COLUMN updatedAt TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)
+        ''',
+        '''
+        ALTER TABLE Category
+            ADD COLUMN updatedAt TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)
+        ''',
+        # Category: version of the whole listing is MAX(updatedAt)
+        'CREATE INDEX idx_category_updated ON Category (updatedAt)',
+    ]),
+]
+
+# Errors that mean a statement from a partially applied step already ran
+_ALREADY_APPLIED_ERRNOS = {
+    1060,  # ER_DUP_FIELDNAME
+    1061,  # ER_DUP_KEYNAME
+    1091,  # ER_CANT_DROP_FIELD_OR_KEY
+}
+
+def migrate_schema():
+    connection, cursor = None, None
+    try:
+        connection = create_connection()
+        cursor = connection.cursor()
+
+        cursor.execute(
+            '''
+            CREATE TABLE IF NOT EXISTS SchemaVersion (
+                version INT PRIMARY KEY,
+                description VARCHAR(255) NOT NULL,
+                appliedAt DATETIME NOT NULL
+            )
+            '''
+        )
+        cursor.execute('SELECT version FROM SchemaVersion')
+        applied = {row[0] for row in cursor.fetchall()}
+
+        for version, description, statements in SCHEMA_MIGRATIONS:
+            if version in applied:
+                continue
+            # DDL commits implicitly in MySQL, so a step that failed halfway is
+            # retried statement by statement, skipping what already exists.
+            for statement in statements:
+                try:
+                    cursor.execute(statement)
+                except mysql.connector.Error as err:
+                    if err.errno not in _ALREADY_APPLIED_ERRNOS:
+                        raise
+            cursor.execute(
+                'INSERT INTO SchemaVersion (version, description, appliedAt) VALUES (%s, %s, NOW())',
+                (version, description)
+            )
+            connection.commit()
+            print(f"Applied schema version {version}: {description}")
+
+    except mysql.connector.Error as err:
+        print(f"Error: {err}")
+        return None
+
+    finally:
+        if cursor:
+            cursor.close()
+        if connection:
+            connection.close()
+
+# Recompute Product.bidCount/highestBid/lastBidAt from Bid. Runs on the
+# caller's cursor so it joins the caller's transaction; product_ids limits
+# the rebuild to those products, otherwise every product is rebuilt.
+def refresh_bid_aggregates(cursor, product_ids=None):
+    query = '''
+        UPDATE Product p
+        LEFT JOIN (
+            SELECT productId, COUNT(*) AS bidCount, MAX(bidAmount) AS highestBid, MAX(bidTime) AS lastBidAt
+            FROM Bid
+            {bid_filter}
+            GROUP BY productId
+        ) b ON b.productId = p.productId
+        SET p.bidCount = COALESCE(b.bidCount, 0), p.highestBid = b.highestBid, p.lastBidAt = b.lastBidAt
+        {product_filter}
+    '''
+    if product_ids is None:
+        cursor.execute(query.format(bid_filter='', product_filter=''))
+        return cursor.rowcount
+
+    product_ids = list(product_ids)
+    if not product_ids:
+        return 0
+    placeholders = ', '.join(['%s'] * len(product_ids))
+    cursor.execute(
+        query.format(
+            bid_filter=f'WHERE productId IN ({placeholders})',
+            product_filter=f'WHERE p.productId IN ({placeholders})'
+        ),
+        tuple(product_ids) * 2
+    )
+    return cursor.rowcount
+
+def rebuild_bid_aggregates():
+    connection, cursor = None, None
+    try:
+        connection = create_connection()
+        cursor = connection.cursor()
+        updated = refresh_bid_aggregates(cursor)
+        connection.commit()
+        return updated
+
+    except mysql.connector.Error as err:
+        if connection:
+            connection.rollback()
+        print(f"Error: {err}")
+        return None
+
+    finally:
+        if cursor:
+            cursor.close()
+        if connection:
+            connection.close()
+
+# The query shapes issued by the routes, with representative parameters.
+# explain_route_queries() runs EXPLAIN on each so regressions to full table
+# scans are caught before they reach production.
+ROUTE_QUERIES = {
+    'ProductHighestBid': (
+        'SELECT * FROM Bid WHERE productId = %s ORDER BY bidAmount DESC LIMIT 1', (1,)),
+    'ProductBids': (
+        'SELECT * FROM Bid WHERE productId = %s ORDER BY bidTime DESC, bidId DESC LIMIT %s', (1, 51)),
+    'UserBids': (
+        'SELECT * FROM Bid WHERE userId = %s ORDER BY bidTime DESC, bidId DESC LIMIT %s', (1, 51)),
+    'ProductList': (
+        'SELECT * FROM Product WHERE status = %s ORDER BY startTime ASC, productId ASC LIMIT %s', ('live', 6)),
+    'LHTProducts.live': (
+        "SELECT * FROM Product WHERE status = 'live' ORDER BY startTime LIMIT 10", ()),
+    'CategoryProducts': (
+        '''
+        SELECT p.* FROM Product p
+        JOIN Cat_Prod cp ON p.productId = cp.productId
+        WHERE cp.categoryId = %s AND p.status = %s
+        ORDER BY p.startTime ASC, p.productId ASC LIMIT %s
+        ''', (1, 'live', 6)),
+    'TrendingProducts': (
+        'SELECT *, bidCount AS bid_count FROM Product WHERE bidCount > 0 ORDER BY bidCount DESC LIMIT %s', (5,)),
+    'LHTProducts.highBids': (
+        'SELECT *, highestBid AS highest_bid FROM Product ORDER BY highestBid DESC LIMIT 8', ()),
+    'UserOrders': (
+        'SELECT * FROM `Order` WHERE userId = %s', (1,)),
+    'UserLogin': (
+        'SELECT userId, passwdHash FROM User WHERE email = %s', ('user@example.com',)),
+    'UserRegistration': (
+        'SELECT userId FROM User WHERE username = %s', ('user',)),
+}
+
+def explain_route_queries():
+    report = []
+    connection, cursor = None, None
+    try:
+        connection = create_connection()
+        cursor = connection.cursor(dictionary=True)
+
+        for name, (query, params) in ROUTE_QUERIES.items():
+            cursor.execute('EXPLAIN ' + query, params)
+            for row in cursor.fetchall():
+                report.append({
+                    'query': name,
+                    'table': row['table'],
+                    'type': row['type'],
+                    'key': row['key'],
+                    'rows': row['rows'],
+                    'extra': row['Extra'],
+                    'fullScan': row['type'] == 'ALL',
+                })
+        return report
+
+    finally:
+        if cursor:
+            cursor.close()
+        if connection:
+            connection.close()
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description='Schema maintenance for the auction database')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('migrate', help='create tables and apply pending schema versions')
+    commands.add_parser('explain', help='EXPLAIN every route query and fail on full table scans')
+    commands.add_parser('rebuild-bid-aggregates', help='recompute Product bid aggregates from the Bid table')
+    args = parser.parse_args()
+
+    if args.command == 'migrate':
+        create_tables()
+        migrate_schema()
+
+    elif args.command == 'explain':
+        full_scans = 0
+        for entry in explain_route_queries():
+            marker = 'FULL SCAN' if entry['fullScan'] else 'ok'
+            print(f"{entry['query']:<20} {entry['table']:<10} type={entry['type']:<8} "
+                  f"key={entry['key']} rows={entry['rows']} extra={entry['extra']}  [{marker}]")
+            full_scans += entry['fullScan']
+        sys.exit(1 if full_scans else 0)
+
+    elif args.command == 'rebuild-bid-aggregates':
+        updated = rebuild_bid_aggregates()
+        if updated is None:
+            sys.exit(1)
+        print(f"Rebuilt bid aggregates ({updated} products changed)")
@@ -0,0 +1,87 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from flask import request
+
+# Opaque keyset cursors. A cursor carries the sort key and tiebreak id of the
+# last row on a page, plus the sort it was issued for, so the next page is a
+# seek (WHERE (sortKey, id) > (...)) instead of an OFFSET that scans and
+# discards every earlier row.
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+class InvalidCursor(ValueError):
+    pass
+
+def _dump(value):
+    if isinstance(value, datetime):
+        return ['dt', value.isoformat()]
+    if isinstance(value, date):
+        return ['d', value.isoformat()]
+    if isinstance(value, Decimal):
+        return ['dec', str(value)]
+    return ['v', value]
+
+def _load(item):
+    kind, value = item
+    if kind == 'dt':
+        return datetime.fromisoformat(value)
+    if kind == 'd':
+        return date.fromisoformat(value)
+    if kind == 'dec':
+        return Decimal(value)
+    return value
+
+def encode_cursor(sort, values):
+    raw = json.dumps({'s': sort, 'k': [_dump(value) for value in values]}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(token, sort, size):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        data = json.loads(raw)
+        values = [_load(item) for item in data['k']]
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursor('Invalid cursor')
+    if data.get('s') != sort or len(values) != size:
+        raise InvalidCursor('Cursor does not match the requested sort')
+    return values
+
+def page_limit(default=DEFAULT_PAGE_SIZE):
+    limit = request.args.get('limit', default=default, type=int)
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+def wants_cursor():
+    return 'cursor' in request.args
+
+# Build the seek condition for rows after the cursor. All columns are sorted in
+# the same direction, so a row-constructor comparison expresses it exactly.
+def seek(columns, sort, descending):
+    token = request.args.get('cursor')
+    if not token:
+        return None, []
+    values = decode_cursor(token, sort, len(columns))
+    placeholders = ', '.join(['%s'] * len(columns))
+    operator = '<' if descending else '>'
+    return f"({', '.join(columns)}) {operator} ({placeholders})", values
+
+# Rows are fetched with LIMIT limit + 1; the extra row only tells us whether
+# another page exists.
+def split_page(rows, limit, sort, keys):
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(sort, [last[key] for key in keys])
+
+# Clients that opt in with ?cursor= get {'items': [...], 'nextCursor': ...};
+# older clients keep the bare list and find the cursor in X-Next-Cursor.
+def page_response(items, next_cursor, status=200, headers=None):
+    headers = dict(headers or {})
+    if wants_cursor():
+        return {'items': items, 'nextCursor': next_cursor}, status, headers
+    if next_cursor:
+        headers['X-Next-Cursor'] = next_cursor
+    return items, status, headers
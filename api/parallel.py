@@ -0,0 +1,32 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# Shared, bounded pool for running the independent queries of a composite
+# endpoint side by side. Each task borrows its own pooled connection, so the
+# endpoint's latency approaches its slowest section instead of the sum.
+MAX_WORKERS = int(os.getenv('SECTION_WORKERS', 8))
+
+# Seconds to wait for all sections before answering with what has finished
+SECTION_TIMEOUT = float(os.getenv('SECTION_TIMEOUT', 2.0))
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='section')
+
+# Run every callable in `sections` (name -> fn) concurrently. Returns
+# (results, failures): results maps each finished section to its value,
+# failures maps each section that raised or missed the deadline to a reason.
+# A section that times out keeps running in the background until its query
+# returns; its result is simply not used.
+def fetch_sections(sections, timeout=SECTION_TIMEOUT):
+    futures = {name: _executor.submit(fn) for name, fn in sections.items()}
+    done, _ = wait(futures.values(), timeout=timeout)
+
+    results, failures = {}, {}
+    for name, future in futures.items():
+        if future not in done:
+            future.cancel()
+            failures[name] = 'timeout'
+        elif future.exception() is not None:
+            failures[name] = str(future.exception())
+        else:
+            results[name] = future.result()
+    return results, failures
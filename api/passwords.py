@@ -0,0 +1,115 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeout
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+
+# werkzeug method string for new hashes, e.g. 'pbkdf2:sha256:600000' or
+# 'scrypt:32768:8:1'. Raising the cost makes existing users' hashes stale;
+# they are rehashed transparently on their next login.
+HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', f'pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}')
+
+# Worker processes for hashing; 0 hashes on the request thread
+WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+
+# Hash jobs queued or running before new ones are turned away with a 503
+MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', max(WORKERS, 1) * 4))
+
+# Seconds a request waits for its hash job
+TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', 10))
+
+class HashingSaturated(Exception):
+    pass
+
+# Workers re-import the parent's __main__ unless it is already loaded; under
+# `python run.py` that must not pull in index (tables, migrations, the
+# scheduler thread), so run.py imports the app under its __main__ guard and
+# the fork server preloads only this module
+def _mp_context():
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('spawn')
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload([__name__])
+    return context
+
+# Runs the CPU-bound pbkdf2/scrypt work on a bounded process pool so a login
+# storm saturates those processes instead of stalling every request thread.
+class HashingPool:
+    def __init__(self, workers=WORKERS, max_pending=MAX_PENDING, timeout=TIMEOUT):
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None and self.workers > 0:
+            with self._lock:
+                if self._executor is None:
+                    try:
+                        # Created lazily from a request thread while other
+                        # threads (pool, snapshots, scheduler) may hold locks;
+                        # forked workers would inherit them held. Start them
+                        # from a clean process instead.
+                        self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=_mp_context())
+                    except (OSError, NotImplementedError) as e:
+                        # e.g. no /dev/shm on some serverless runtimes
+                        print(f"Password hashing pool unavailable, hashing inline: {e}")
+                        self.workers = 0
+        return self._executor
+
+    def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingSaturated('Too many password operations in progress')
+        try:
+            executor = self._get_executor()
+            if executor is not None:
+                future = executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        if executor is None:
+            try:
+                return fn(*args)
+            finally:
+                self._slots.release()
+
+        # Free the slot when the job finishes, even if the caller gave up on it
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FuturesTimeout:
+            raise HashingSaturated('Timed out waiting for a password worker')
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+_pool = HashingPool()
+
+def hash_password(password):
+    return _pool.run(generate_password_hash, password, HASH_METHOD)
+
+def verify_password(pwhash, password):
+    return _pool.run(check_password_hash, pwhash, password)
+
+# werkzeug's defaults for parameters left out of a method string
+_METHOD_DEFAULTS = {
+    'pbkdf2': ['sha256', str(DEFAULT_PBKDF2_ITERATIONS)],
+    'scrypt': [str(2 ** 15), '8', '1'],
+}
+
+def _normalize(method):
+    # 'pbkdf2:sha256' and 'pbkdf2:sha256:600000' are the same parameters, as
+    # are 'scrypt' and 'scrypt:32768:8:1'
+    parts = method.split(':')
+    defaults = _METHOD_DEFAULTS.get(parts[0], [])
+    parts.extend(defaults[len(parts) - 1:])
+    return ':'.join(parts)
+
+# True when `pwhash` was made with different parameters than HASH_METHOD
+def needs_rehash(pwhash):
+    return _normalize(pwhash.split('$', 1)[0]) != _normalize(HASH_METHOD)
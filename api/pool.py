@@ -0,0 +1,279 @@
+import threading
+import time
+from collections import deque
+import mysql.connector
+from mysql.connector import errors
+
+# Raised when no connection could be borrowed within the pool timeout
+class PoolTimeout(errors.PoolError):
+    pass
+
+# One statement as seen by query listeners. `seconds` covers execute() plus
+# every fetch until the cursor moves on, since unbuffered cursors pull rows
+# from the server while fetching; `rows` counts rows fetched. `connection` is
+# the raw session the statement ran on, for follow-up diagnostics.
+class QueryEvent:
+    __slots__ = ('statement', 'params', 'many', 'seconds', 'rows', 'error', 'connection')
+
+    def __init__(self, statement, params, many, seconds, connection, error=None):
+        self.statement = statement
+        self.params = params
+        self.many = many
+        self.seconds = seconds
+        self.rows = 0
+        self.error = error
+        self.connection = connection
+
+# Cursor proxy that times statements and counts fetched rows, reporting each
+# statement to the pool's listeners once the cursor moves on or closes
+class TrackedCursor:
+    def __init__(self, raw, listeners, connection):
+        self._raw = raw
+        self._listeners = listeners
+        self._connection = connection
+        self._event = None
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def _run(self, method, operation, params, many, kwargs):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            result = method(operation, params, **kwargs) if params is not None else method(operation, **kwargs)
+        except Exception as e:
+            self._event = QueryEvent(operation, params, many, time.perf_counter() - started, self._connection, error=e)
+            self._finish()
+            raise
+        self._event = QueryEvent(operation, params, many, time.perf_counter() - started, self._connection)
+        return result
+
+    def execute(self, operation, params=None, **kwargs):
+        return self._run(self._raw.execute, operation, params, False, kwargs)
+
+    def executemany(self, operation, seq_params, **kwargs):
+        return self._run(self._raw.executemany, operation, seq_params, True, kwargs)
+
+    def _fetch(self, method, *args):
+        started = time.perf_counter()
+        result = method(*args)
+        event = self._event
+        if event is not None:
+            event.seconds += time.perf_counter() - started
+            if isinstance(result, list):
+                event.rows += len(result)
+            elif result is not None:
+                event.rows += 1
+        return result
+
+    def fetchone(self):
+        return self._fetch(self._raw.fetchone)
+
+    def fetchmany(self, size=1):
+        return self._fetch(self._raw.fetchmany, size)
+
+    def fetchall(self):
+        return self._fetch(self._raw.fetchall)
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        self._finish()
+        return self._raw.close()
+
+    def _finish(self):
+        event, self._event = self._event, None
+        if event is None:
+            return
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                print(f"Query listener failed: {e}")
+
+# Thin proxy handed out to the routes: close() returns the connection to the
+# pool instead of tearing down the TCP/auth session.
+class PooledConnection:
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+        self._closed = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def cursor(self, *args, **kwargs):
+        raw = self._raw.cursor(*args, **kwargs)
+        listeners = self._pool._query_listeners
+        return TrackedCursor(raw, listeners, self._raw) if listeners else raw
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._pool._release(self._raw, self._created_at)
+
+    # Close the underlying session instead of pooling it, e.g. when a streamed
+    # result was abandoned halfway and the session still has unread rows
+    def invalidate(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._pool._discard(self._raw)
+        self._pool._forget()
+
+
+class ConnectionPool:
+    def __init__(self, connect_args, size=5, max_overflow=10, timeout=30, recycle=1800, pre_ping=True):
+        self.connect_args = connect_args
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+
+        self._idle = deque()   # (raw connection, created_at, returned_at)
+        self._cond = threading.Condition()
+        self._open = 0         # connections currently alive (idle + checked out)
+        self._query_listeners = []
+
+        self._stats = {
+            'checkouts': 0,
+            'timeouts': 0,
+            'connects': 0,
+            'recycled': 0,
+            'failed_pings': 0,
+            'wait_count': 0,
+            'wait_total': 0.0,
+            'wait_max': 0.0,
+        }
+
+    # Call fn(QueryEvent) for every statement run on a pooled connection's
+    # cursors; with no listeners cursors are handed out unwrapped
+    def listen(self, fn):
+        self._query_listeners.append(fn)
+
+    def _bump(self, key):
+        with self._cond:
+            self._stats[key] += 1
+
+    def _connect(self):
+        raw = mysql.connector.connect(**self.connect_args)
+        self._bump('connects')
+        return raw, time.monotonic()
+
+    def _discard(self, raw):
+        try:
+            raw.close()
+        except errors.Error:
+            pass
+
+    def _is_usable(self, raw, created_at, returned_at):
+        now = time.monotonic()
+        if self.recycle and now - created_at > self.recycle:
+            self._bump('recycled')
+            return False
+        # Only ping connections that have sat idle for a while; a connection
+        # returned a moment ago is almost certainly still alive.
+        if self.pre_ping and now - returned_at > 1:
+            try:
+                raw.ping(reconnect=False)
+            except errors.Error:
+                self._bump('failed_pings')
+                return False
+        return True
+
+    def get_connection(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+
+        with self._cond:
+            while not self._idle and self._open >= self.size + self.max_overflow:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeout(f'Timed out after {self.timeout}s waiting for a database connection')
+                waited = True
+                self._cond.wait(remaining)
+
+            if self._idle:
+                raw, created_at, returned_at = self._idle.pop()
+            else:
+                raw, created_at, returned_at = None, None, None
+                self._open += 1
+
+        if raw is not None and not self._is_usable(raw, created_at, returned_at):
+            # Drop the stale connection and open a fresh one in its slot
+            self._discard(raw)
+            raw = None
+
+        if raw is None:
+            try:
+                raw, created_at = self._connect()
+            except errors.Error:
+                with self._cond:
+                    self._open -= 1
+                    self._cond.notify()
+                raise
+
+        self._record_checkout(time.monotonic() - started, waited)
+        return PooledConnection(self, raw, created_at)
+
+    def _record_checkout(self, wait, waited):
+        with self._cond:
+            self._stats['checkouts'] += 1
+            if waited:
+                self._stats['wait_count'] += 1
+                self._stats['wait_total'] += wait
+                self._stats['wait_max'] = max(self._stats['wait_max'], wait)
+
+    def _release(self, raw, created_at):
+        # End whatever transaction the route left open so the next borrower
+        # does not inherit locks or a stale REPEATABLE READ snapshot.
+        try:
+            if raw.is_connected():
+                raw.rollback()
+            else:
+                raw = None
+        except errors.Error:
+            self._discard(raw)
+            raw = None
+
+        with self._cond:
+            if raw is not None and len(self._idle) < self.size:
+                self._idle.append((raw, created_at, time.monotonic()))
+                raw = None
+            else:
+                self._open -= 1
+            self._cond.notify()
+
+        # Overflow connections beyond the steady-state size are closed on return
+        if raw is not None:
+            self._discard(raw)
+
+    def _forget(self):
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+    def dispose(self):
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+        for raw, _, _ in idle:
+            self._discard(raw)
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats['size'] = self.size
+            stats['max_overflow'] = self.max_overflow
+            stats['open'] = self._open
+            stats['idle'] = len(self._idle)
+            stats['checked_out'] = self._open - len(self._idle)
+        stats['wait_avg'] = stats['wait_total'] / stats['wait_count'] if stats['wait_count'] else 0.0
+        return stats
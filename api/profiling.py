@@ -0,0 +1,186 @@
+import cProfile
+import hmac
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from flask import g, request
+
+# On-demand request profiling. Two modes:
+#
+#   sample   - a shared background thread snapshots the request thread's stack
+#              every PROFILE_SAMPLE_INTERVAL seconds and the counts are stored
+#              as collapsed stacks (flamegraph.pl / speedscope input). Cheap
+#              enough to leave on for PROFILE_SAMPLE_RATE of production traffic.
+#   cprofile - deterministic cProfile of the request thread, stored as a
+#              .pstats file. Much higher overhead; only on request.
+#
+# A request is profiled when it is picked by PROFILE_SAMPLE_RATE, or when it
+# carries X-Profile-Token matching PROFILE_TOKEN (X-Profile-Mode picks the
+# mode, cprofile by default). Results land in PROFILE_DIR/<route>/<request id>.*
+# and the request id is echoed in X-Request-ID.
+
+SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL', 0.01))
+TOKEN = os.getenv('PROFILE_TOKEN')
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'probidder-profiles'))
+
+# Files kept per route; the oldest are removed past this
+MAX_FILES_PER_ROUTE = int(os.getenv('PROFILE_MAX_FILES', 200))
+
+MODES = ('sample', 'cprofile')
+
+_SAFE_ID = re.compile(r'[A-Za-z0-9_-]{1,64}')
+
+class StackSampler:
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._active = {}   # thread id -> Counter of collapsed stacks
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self, thread_id):
+        counts = Counter()
+        with self._lock:
+            self._active[thread_id] = counts
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+                self._thread.start()
+            self._wake.set()
+        return counts
+
+    def stop(self, thread_id):
+        with self._lock:
+            return self._active.pop(thread_id, Counter())
+
+    def _run(self):
+        own = threading.get_ident()
+        while True:
+            # Checked and cleared under the lock start() sets the event
+            # under, so a request starting in between is not slept through
+            with self._lock:
+                active = dict(self._active)
+                if not active:
+                    self._wake.clear()
+            if not active:
+                self._wake.wait()
+                continue
+            frames = sys._current_frames()
+            for thread_id, counts in active.items():
+                frame = frames.get(thread_id)
+                if frame is not None and thread_id != own:
+                    counts[_collapse(frame)] += 1
+            del frames
+            time.sleep(self.interval)
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{getattr(code, 'co_qualname', code.co_name)}"
+
+# Root-first, ';'-separated stack, the collapsed format flamegraph tools read
+def _collapse(frame):
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+sampler = StackSampler()
+
+def _requested_mode():
+    token = request.headers.get('X-Profile-Token')
+    if token and TOKEN and hmac.compare_digest(token, TOKEN):
+        mode = request.headers.get('X-Profile-Mode', 'cprofile')
+        return mode if mode in MODES else 'cprofile'
+    if SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE:
+        return 'sample'
+    return None
+
+# Caller's X-Request-ID when it is safe to use in a file name
+def _request_id():
+    request_id = request.headers.get('X-Request-ID', '')
+    return request_id if _SAFE_ID.fullmatch(request_id) else uuid.uuid4().hex
+
+def before_request():
+    mode = _requested_mode()
+    if mode is None:
+        return
+    g._profile = {
+        'mode': mode,
+        'id': _request_id(),
+        'thread': threading.get_ident(),
+        'started': time.perf_counter(),
+    }
+    if mode == 'cprofile' and not _start_cprofile(g._profile):
+        # Another request holds the profiler; sample this one instead
+        g._profile['mode'] = 'sample'
+    if g._profile['mode'] == 'sample':
+        g._profile['counts'] = sampler.start(threading.get_ident())
+
+# From Python 3.12 cProfile sits on the single sys.monitoring profiler slot:
+# a second enable() raises ValueError, and the profile also covers other
+# threads. Only one cprofile session runs at a time.
+_cprofile_lock = threading.Lock()
+
+def _start_cprofile(profile):
+    if not _cprofile_lock.acquire(blocking=False):
+        return False
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # The slot is taken outside this module, e.g. by a debugger
+        _cprofile_lock.release()
+        return False
+    profile['profiler'] = profiler
+    return True
+
+def after_request(response):
+    profile = g.get('_profile')
+    if profile is not None:
+        response.headers['X-Request-ID'] = profile['id']
+    return response
+
+# Runs once the response (including a streamed body) is finished
+def teardown_request(exc):
+    profile = g.pop('_profile', None)
+    if profile is None:
+        return
+    if profile['mode'] == 'cprofile':
+        profile['profiler'].disable()
+        _cprofile_lock.release()
+    else:
+        sampler.stop(profile['thread'])
+    elapsed = time.perf_counter() - profile['started']
+
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    try:
+        directory = os.path.join(PROFILE_DIR, re.sub(r'[^A-Za-z0-9_.-]+', '_', route).strip('_') or 'root')
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, f"{int(time.time())}-{profile['id']}-{int(elapsed * 1000)}ms")
+        if profile['mode'] == 'cprofile':
+            profile['profiler'].dump_stats(base + '.pstats')
+        else:
+            with open(base + '.collapsed', 'w') as f:
+                for stack, count in profile['counts'].most_common():
+                    f.write(f'{stack} {count}\n')
+        _prune(directory)
+    except Exception as e:
+        print(f"Storing profile {profile['id']} failed: {e}")
+
+def _prune(directory):
+    entries = sorted(os.scandir(directory), key=lambda entry: entry.stat().st_mtime)
+    for entry in entries[:-MAX_FILES_PER_ROUTE]:
+        os.remove(entry.path)
+
+def install(app):
+    app.before_request(before_request)
+    app.after_request(after_request)
+    app.teardown_request(teardown_request)
@@ -0,0 +1,131 @@
+import bisect
+import os
+import queue
+import threading
+from collections import OrderedDict, deque
+
+# Events kept per topic so reconnecting clients can resume from Last-Event-ID
+HISTORY_SIZE = int(os.getenv('PUBSUB_HISTORY', 200))
+
+# Topics with history kept; the least recently published ones are evicted
+MAX_TOPICS = int(os.getenv('PUBSUB_TOPICS', 10000))
+
+# Events buffered per subscriber before it is considered too slow and dropped
+SUBSCRIBER_BUFFER = int(os.getenv('PUBSUB_BUFFER', 1000))
+
+class Subscription:
+    def __init__(self, hub, topic):
+        self.hub = hub
+        self.topic = topic
+        self.closed = False
+        self._queue = queue.Queue(maxsize=SUBSCRIBER_BUFFER)
+
+    def _deliver(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            # A subscriber that cannot keep up is cut off; it reconnects and
+            # resumes from the last event id it saw.
+            self.closed = True
+
+    # Next (id, event, data) tuple, or None when nothing arrived within timeout
+    def get(self, timeout=None):
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+# In-process publish/subscribe hub. Publishers push (id, event, data) onto a
+# topic; every subscriber of that topic gets its own queue, and listeners see
+# every event on every topic. Ids are supplied by the publisher and order
+# events per topic; they may arrive out of order (e.g. bids committed back to
+# back and published from different threads), so the history is kept sorted
+# and subscribers get events in arrival order.
+# Insert into a bounded deque kept sorted by id. Nearly always an append; a
+# late event older than everything in a full history is not kept.
+def _insert_sorted(history, item):
+    if not history or history[-1][0] < item[0]:
+        history.append(item)
+        return
+    ids = [entry[0] for entry in history]
+    position = bisect.bisect_left(ids, item[0])
+    if position < len(ids) and ids[position] == item[0]:
+        return
+    if len(history) == history.maxlen:
+        if position == 0:
+            return
+        history.popleft()
+        position -= 1
+    history.insert(position, item)
+
+class Hub:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._history = OrderedDict()
+        self._listeners = []
+
+    def publish(self, topic, event_id, event, data):
+        item = (event_id, event, data)
+        with self._lock:
+            history = self._history.get(topic)
+            if history is None:
+                history = self._history[topic] = deque(maxlen=HISTORY_SIZE)
+                if len(self._history) > MAX_TOPICS:
+                    self._history.popitem(last=False)
+            else:
+                self._history.move_to_end(topic)
+            _insert_sorted(history, item)
+            subscribers = list(self._subscribers.get(topic, ()))
+            listeners = list(self._listeners)
+
+        for subscription in subscribers:
+            subscription._deliver(item)
+        for listener in listeners:
+            try:
+                listener(topic, item)
+            except Exception as e:
+                print(f"Pub/sub listener failed: {e}")
+
+    def subscribe(self, topic):
+        subscription = Subscription(self, topic)
+        with self._lock:
+            self._subscribers.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.topic)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.topic]
+
+    # Call fn(topic, (id, event, data)) for every published event
+    def listen(self, fn):
+        with self._lock:
+            self._listeners.append(fn)
+
+    # Events on `topic` after `last_id`, or None when the history does not
+    # provably reach back that far and the caller has to fill the gap itself
+    def since(self, topic, last_id):
+        with self._lock:
+            history = list(self._history.get(topic, ()))
+        if not history or history[0][0] > last_id + 1:
+            return None
+        return [item for item in history if item[0] > last_id]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'topics': len(self._history),
+                'subscribers': sum(len(subs) for subs in self._subscribers.values()),
+            }
+
+
+# Accepted bids, one topic per productId, keyed by bidId
+bid_events = Hub()
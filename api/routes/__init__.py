@@ -1,8 +1,41 @@
-from flask import Blueprint
+from flask import Blueprint, Response
 from flask_restful import Api
+from encoding import dumps
+import capture
+import compress
+import metrics
+import slow_queries
+from compress import compress_response
+from models import get_pool
+from pubsub import bid_events
+from scheduler import auction_scheduler
 
 appbp = Blueprint('appbp', __name__)
 
 api = Api(appbp)
 
+# Encode every resource's return value with the shared encoder, which also
+# takes the Decimal and datetime values rows carry
+@api.representation('application/json')
+def output_json(data, code, headers=None):
+    response = Response(dumps(data), status=code, mimetype='application/json')
+    response.headers.extend(headers or {})
+    return response
+
+# Negotiated gzip/br/zstd for every response from the API
+appbp.after_request(compress_response)
+
+# Per-route latency and query metrics, scraped from /metrics
+metrics.install(appbp, get_pool())
+metrics.stats_collector('pubsub', bid_events.stats, 'Bid event hub')
+metrics.stats_collector('auction_scheduler', auction_scheduler.stats, 'Auction scheduler')
+metrics.stats_collector('compression', compress.stats, 'Response compression', nested_label='encoding')
+
+# Statements over SLOW_QUERY_THRESHOLD, summarized at /debug/slow-queries
+slow_queries.install(appbp, get_pool())
+
+# Sampled request log (CAPTURE_SAMPLE_RATE) for bench/replay.py
+capture.install(appbp)
+metrics.stats_collector('capture', capture.traffic_log.stats, 'Traffic capture')
+
 from routes import  bid, category, order, product, user, shipment
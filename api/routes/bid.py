@@ -1,62 +1,89 @@
-from flask import request, jsonify
+import os
+import time
+from flask import request, jsonify, Response, stream_with_context
 from flask_restful import Resource
 from mysql.connector import Error
-from models import create_connection
+from models import create_connection, refresh_bid_aggregates
+from bidding import place_bid, place_bids, BidRejected
+from pubsub import bid_events
+from pagination import InvalidCursor, seek, split_page, page_response, page_limit, wants_cursor
+from streaming import stream_format, stream_rows
+from tokens import request_user_id, InvalidToken
+from serializers import serialize_bid, serialize_product_bid, serialize_user_bid
+from encoding import dumps
 from routes import api
 
+# Tell watchers of the product about an accepted bid. The bidId doubles as the
+# event id, so clients can resume from it after a reconnect.
+def publish_bid(result):
+    event = {key: value for key, value in result.items() if key not in ('accepted', 'index', 'message')}
+    bid_events.publish(result['productId'], result['bidId'], 'bid', event)
+
 class Bid(Resource):
     def post(self):
-        connection, cursor = None, None
+        connection = None
         try:
             # Parse the incoming JSON data
             data = request.get_json()
 
-            # Validate input data
-            required_fields = ['bidAmount', 'bidTime', 'isWinningBid', 'userId', 'productId']
+            # Validate input data. bidTime and isWinningBid are decided by the
+            # server when the bid is accepted, so clients no longer send them.
+            required_fields = ['bidAmount', 'userId', 'productId']
             for field in required_fields:
                 if field not in data:
                     return {'error': f'Missing required field: {field}'}, 400
             
-            # Check data types
-            if not isinstance(data['bidAmount'], (int, float)):
-                return {'error': 'bidAmount must be a number'}, 400
-            if not isinstance(data['isWinningBid'], bool):
-                return {'error': 'isWinningBid must be a boolean'}, 400
-            
             # Establish database connection
             connection = create_connection()
-            cursor = connection.cursor()
 
-            # Prepare the insert query
-            insert_query = """
-            INSERT INTO Bid (bidAmount, bidTime, isWinningBid, userId, productId)
-            VALUES (%s, %s, %s, %s, %s)
-            """
-            bid_values = (
-                data['bidAmount'],
-                data['bidTime'],  # Ensure that this is in the correct format (e.g., 'YYYY-MM-DD HH:MM:SS')
-                data['isWinningBid'],
-                data['userId'],
-                data['productId']
-            )
-            
-            # Execute the query
-            cursor.execute(insert_query, bid_values)
-            connection.commit()
+            # Validate against the live auction and apply atomically
+            result = place_bid(connection, data['userId'], data['productId'], data['bidAmount'])
+            publish_bid(result)
+            result['message'] = 'Bid placed successfully'
+            return result, 201
+
+        except BidRejected as rejected:
+            return rejected.to_response()
+        except Error as err:
+            # Handle MySQL-specific errors
+            return {'error': f'MySQL error: {str(err)}'}, 500
+        except Exception as e:
+            # Handle general exceptions
+            return {'error': str(e)}, 500
+        finally:
+            # Ensure the connection is returned
+            if connection:
+                connection.close()
+
+# Many bids in one request, applied per product in bid-time order with one
+# multi-row insert and a single commit
+class BidBatch(Resource):
+    def post(self):
+        connection = None
+        try:
+            data = request.get_json()
+            bids = data.get('bids') if isinstance(data, dict) else data
+            if not isinstance(bids, list) or not bids:
+                return {'error': 'bids must be a non-empty list'}, 400
+
+            # Establish database connection
+            connection = create_connection()
+
+            results = place_bids(connection, bids)
+            accepted = 0
+            for result in sorted(results, key=lambda result: result.get('bidId', 0)):
+                if result['accepted']:
+                    publish_bid(result)
+                    accepted += 1
 
-            # Get the ID of the newly created bid
-            bid_id = cursor.lastrowid
-            
             return {
-                'message': 'Bid placed successfully',
-                'bidId': bid_id,
-                'bidAmount': data['bidAmount'],
-                'bidTime': data['bidTime'],
-                'isWinningBid': data['isWinningBid'],
-                'userId': data['userId'],
-                'productId': data['productId']
-            }, 201
+                'accepted': accepted,
+                'rejected': len(results) - accepted,
+                'results': results
+            }, 200
 
+        except BidRejected as rejected:
+            return rejected.to_response()
         except Error as err:
             # Handle MySQL-specific errors
             return {'error': f'MySQL error: {str(err)}'}, 500
@@ -64,9 +91,7 @@ class Bid(Resource):
             # Handle general exceptions
             return {'error': str(e)}, 500
         finally:
-            # Ensure the cursor and connection are closed
-            if cursor:
-                cursor.close()
+            # Ensure the connection is returned
             if connection:
                 connection.close()
 
@@ -88,14 +113,7 @@ class BidDetail(Resource):
             if not bid:
                 return {'error': 'Bid not found'}, 404
             
-            return {
-                'bidId': bid['bidId'],
-                'bidAmount': float(bid['bidAmount']),
-                'bidTime': bid['bidTime'].isoformat() if bid['bidTime'] else None,  # Handle None case
-                'isWinningBid': bid['isWinningBid'],
-                'userId': bid['userId'],
-                'productId': bid['productId']
-            }
+            return serialize_bid(bid)
         except Error as err:
             # Handle MySQL-specific errors
             return {'error': f'MySQL error: {str(err)}'}, 500
@@ -117,16 +135,22 @@ class BidDetail(Resource):
             connection = create_connection()
             cursor = connection.cursor()
 
+            # Lock the bid so its product's aggregates can be recomputed after the delete
+            cursor.execute("SELECT productId FROM Bid WHERE bidId = %s FOR UPDATE", (bid_id,))
+            bid = cursor.fetchone()
+            if not bid:
+                return {'error': 'Bid not found'}, 404
+
             # Prepare the delete query
             delete_query = "DELETE FROM Bid WHERE bidId = %s"
             cursor.execute(delete_query, (bid_id,))
+            refresh_bid_aggregates(cursor, [bid[0]])
             connection.commit()
             
-            if cursor.rowcount == 0:
-                return {'error': 'Bid not found'}, 404
-            
             return {'message': 'Bid deleted successfully'}
         except Error as err:
+            if connection:
+                connection.rollback()
             # Handle MySQL-specific errors
             return {'error': f'MySQL error: {str(err)}'}, 500
         except Exception as e:
@@ -142,29 +166,30 @@ class BidDetail(Resource):
 class ProductBids(Resource):
     def get(self):
         product_id = request.args.get('productId')
+
+        # Stream the full history straight from the server-side cursor
+        fmt = stream_format()
+        if fmt:
+            try:
+                return stream_rows(BID_HISTORY_QUERY.format(column='productId'), (product_id,), serialize_product_bid, fmt)
+            except Error as err:
+                return {'error': f'MySQL error: {str(err)}'}, 500
+
         connection, cursor = None, None
         try:
             # Establish database connection
             connection = create_connection()
             cursor = connection.cursor(dictionary=True)  # Use dictionary for easier access to columns
             
-            # Prepare the select query
-            select_query = "SELECT * FROM Bid WHERE productId = %s"
-            cursor.execute(select_query, (product_id,))
-            bids = cursor.fetchall()  # Fetch all results
+            # Fetch the bid history, a page at a time if requested
+            bids, next_cursor = fetch_bid_history(cursor, 'productId', product_id)
             
             # Prepare the response
-            bids_list = [
-                {
-                    'bidId': bid['bidId'],
-                    'bidAmount': float(bid['bidAmount']),
-                    'bidTime': bid['bidTime'].isoformat() if bid['bidTime'] else None,  # Handle None case
-                    'isWinningBid': bid['isWinningBid'],
-                    'userId': bid['userId']
-                } for bid in bids
-            ]
+            bids_list = [serialize_product_bid(bid) for bid in bids]
             
-            return bids_list if bids_list else [], 200  # Return an empty list if no bids found
+            return page_response(bids_list, next_cursor)  # Return an empty list if no bids found
+        except InvalidCursor as err:
+            return {'error': str(err)}, 400
         except Error as err:
             # Handle MySQL-specific errors
             return {'error': f'MySQL error: {str(err)}'}, 500
@@ -180,9 +205,20 @@ class ProductBids(Resource):
 
 class UserBids(Resource):
     def get(self):
-        user_id = request.args.get('userId')
+        try:
+            user_id = request_user_id()
+        except InvalidToken as e:
+            return e.to_response()
         if not user_id:
-            return {'error': 'Product ID is required'}, 400
+            return {'error': 'User ID is required'}, 400
+
+        # Stream the full history straight from the server-side cursor
+        fmt = stream_format()
+        if fmt:
+            try:
+                return stream_rows(BID_HISTORY_QUERY.format(column='userId'), (user_id,), serialize_user_bid, fmt)
+            except Error as err:
+                return {'error': f'MySQL error: {str(err)}'}, 500
         
         connection, cursor = None, None
         try:
@@ -191,23 +227,15 @@ class UserBids(Resource):
             connection = create_connection()
             cursor = connection.cursor(dictionary=True)  # Use dictionary for easier access to columns
             
-            # Prepare the select query
-            select_query = "SELECT * FROM Bid WHERE userId = %s"
-            cursor.execute(select_query, (user_id,))
-            bids = cursor.fetchall()  # Fetch all results
+            # Fetch the bid history, a page at a time if requested
+            bids, next_cursor = fetch_bid_history(cursor, 'userId', user_id)
             
             # Prepare the response
-            bids_list = [
-                {
-                    'bidId': bid['bidId'],
-                    'bidAmount': float(bid['bidAmount']),
-                    'bidTime': bid['bidTime'].isoformat() if bid['bidTime'] else None,  # Handle None case
-                    'isWinningBid': bid['isWinningBid'],
-                    'productId': bid['productId']
-                } for bid in bids
-            ]
+            bids_list = [serialize_user_bid(bid) for bid in bids]
             
-            return bids_list if bids_list else [], 200  # Return an empty list if no bids found
+            return page_response(bids_list, next_cursor)  # Return an empty list if no bids found
+        except InvalidCursor as err:
+            return {'error': str(err)}, 400
         except Error as err:
             # Handle MySQL-specific errors
             return {'error': f'MySQL error: {str(err)}'}, 500
@@ -243,15 +271,7 @@ class ProductHighestBid(Resource):
             bids = cursor.fetchall()  # Fetch all results
             
             # Prepare the response
-            bids_list = [
-                {
-                    'bidId': bid['bidId'],
-                    'bidAmount': float(bid['bidAmount']),
-                    'bidTime': bid['bidTime'].isoformat() if bid['bidTime'] else None,  # Handle None case
-                    'isWinningBid': bid['isWinningBid'],
-                    'userId': bid['userId']
-                } for bid in bids
-            ]
+            bids_list = [serialize_product_bid(bid) for bid in bids]
             
             return bids_list if bids_list else [], 200  # Return an empty list if no bids found
         except Error as err:
@@ -267,9 +287,134 @@ class ProductHighestBid(Resource):
             if connection:
                 connection.close()
 
+# Bid histories are listed newest first, with bidId as the tiebreak. Pages are
+# only applied when the client asks for them (cursor= or limit=); otherwise the
+# full history is returned as before.
+BID_HISTORY_SORT = 'bidTime:desc'
+BID_HISTORY_QUERY = "SELECT * FROM Bid WHERE {column} = %s ORDER BY bidTime DESC, bidId DESC"
+
+def fetch_bid_history(cursor, column, value):
+    query = f"SELECT * FROM Bid WHERE {column} = %s"
+    params = [value]
+
+    paginate = wants_cursor() or 'limit' in request.args
+    seek_sql, seek_params = seek(['bidTime', 'bidId'], BID_HISTORY_SORT, True)
+    if seek_sql:
+        query += f" AND {seek_sql}"
+        params.extend(seek_params)
+
+    query += " ORDER BY bidTime DESC, bidId DESC"
+    if not paginate:
+        cursor.execute(query, tuple(params))
+        return cursor.fetchall(), None
+
+    limit = page_limit()
+    query += " LIMIT %s"
+    params.append(limit + 1)
+    cursor.execute(query, tuple(params))
+    return split_page(cursor.fetchall(), limit, BID_HISTORY_SORT, ['bidTime', 'bidId'])
+
+# Seconds between keep-alive comments on an idle stream
+SSE_KEEPALIVE = float(os.getenv('SSE_KEEPALIVE', 15))
+# A stream is closed after this long; the client reconnects with Last-Event-ID
+SSE_MAX_DURATION = float(os.getenv('SSE_MAX_DURATION', 300))
+
+def sse_event(event_id, event, data):
+    return f"id: {event_id}\nevent: {event}\ndata: {dumps(data).decode('utf-8')}\n\n"
+
+# Bids after last_id for a client whose Last-Event-ID is older than the hub's
+# history, e.g. one that reconnects to a different worker
+def missed_bids(product_id, last_id):
+    connection, cursor = None, None
+    try:
+        connection = create_connection()
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute(
+            """
+            SELECT bidId, bidAmount, bidTime, isWinningBid, userId, productId
+            FROM Bid
+            WHERE productId = %s AND bidId > %s
+            ORDER BY bidId
+            LIMIT 500
+            """,
+            (product_id, last_id)
+        )
+        return [
+            (bid['bidId'], 'bid', {**serialize_bid(bid), 'currentBidPrice': bid['bidAmount']})
+            for bid in cursor.fetchall()
+        ]
+    finally:
+        if cursor:
+            cursor.close()
+        if connection:
+            connection.close()
+
+# Server-Sent Events stream of accepted bids (and so price changes) for a
+# product. Every watcher in this process shares the hub's in-memory feed, so
+# none of them touches the database except once to catch up on reconnect.
+class ProductBidStream(Resource):
+    def get(self):
+        product_id = request.args.get('productId', type=int)
+        if not product_id:
+            return {'error': 'productId is required'}, 400
+
+        last_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+        try:
+            last_id = int(last_id) if last_id else None
+        except ValueError:
+            return {'error': 'Last-Event-ID must be a bid id'}, 400
+
+        # Subscribe before catching up so nothing published in between is lost
+        subscription = bid_events.subscribe(product_id)
+        try:
+            backlog = []
+            if last_id is not None:
+                backlog = bid_events.since(product_id, last_id)
+                if backlog is None:
+                    backlog = missed_bids(product_id, last_id)
+        except Error as err:
+            subscription.close()
+            return {'error': f'MySQL error: {str(err)}'}, 500
+
+        def generate():
+            # Bids are published after commit, so two committed back to back
+            # can arrive in either order. Only events already sent (from the
+            # backlog, or resumed past) are skipped; a late lower id is still
+            # delivered rather than dropped.
+            sent = set()
+            deadline = time.monotonic() + SSE_MAX_DURATION
+            try:
+                yield "retry: 3000\n\n"
+                for event_id, event, data in backlog:
+                    yield sse_event(event_id, event, data)
+                    sent.add(event_id)
+
+                while not subscription.closed and time.monotonic() < deadline:
+                    item = subscription.get(timeout=SSE_KEEPALIVE)
+                    if item is None:
+                        yield ": keepalive\n\n"
+                        continue
+                    event_id, event, data = item
+                    if event_id in sent or (last_id is not None and event_id == last_id):
+                        continue
+                    yield sse_event(event_id, event, data)
+                    sent.add(event_id)
+            finally:
+                subscription.close()
+
+        response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        # A response closed before its first chunk never runs generate();
+        # unsubscribing twice is harmless
+        response.call_on_close(subscription.close)
+        return response
+
 # Add the resources to the API
 api.add_resource(Bid, '/api/v2/bid')
+api.add_resource(BidBatch, '/api/v2/bid/batch')
 api.add_resource(BidDetail, '/api/v2/bids')
 api.add_resource(ProductBids, '/api/v2/product/bids') #productId
 api.add_resource(UserBids, '/api/v2/users/bids') #userId
-api.add_resource(ProductHighestBid, '/api/v2/product/highestbid') #productId
\ No newline at end of file
+api.add_resource(ProductHighestBid, '/api/v2/product/highestbid') #productId
+api.add_resource(ProductBidStream, '/api/v2/product/bids/stream') #productId, Last-Event-ID header
\ No newline at end of file
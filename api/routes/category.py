@@ -3,6 +3,8 @@ from flask_restful import Resource
 from mysql.connector import Error
 from models import create_connection
 from routes import api
+from pagination import InvalidCursor, seek, split_page, page_response, page_limit
+from conditional import make_etag, validator_headers, conditional_response
 
 class Category(Resource):
     def post(self):
@@ -36,17 +38,40 @@ class Category(Resource):
             connection.close()
 
     def get(self):
-        limit = request.args.get('limit', default=10, type=int)
+        limit = page_limit(default=10)
         offset = request.args.get('offset', default=0, type=int)
 
         try:
             connection = create_connection()
             cursor = connection.cursor(dictionary=True)
-            
-            cursor.execute("SELECT * FROM Category LIMIT %s OFFSET %s", (limit, offset))
-            categories = cursor.fetchall()
 
-            return categories, 200
+            # Version of the whole listing: inserts and renames move
+            # MAX(updatedAt), deletes change the count
+            cursor.execute("SELECT COUNT(*) AS total, UNIX_TIMESTAMP(MAX(updatedAt)) AS version FROM Category")
+            state = cursor.fetchone()
+            etag = make_etag('categories', state['version'], state['total'], request.query_string)
+            unchanged = conditional_response(etag, state['version'])
+            if unchanged:
+                return unchanged
+
+            seek_sql, seek_params = seek(['categoryId'], 'categoryId:asc', False)
+            if offset and not seek_sql:
+                # Legacy offset paging; cursor paging is preferred for deep pages
+                cursor.execute(
+                    "SELECT categoryId, categoryName FROM Category ORDER BY categoryId LIMIT %s OFFSET %s", (limit + 1, offset)
+                )
+            elif seek_sql:
+                cursor.execute(
+                    f"SELECT categoryId, categoryName FROM Category WHERE {seek_sql} ORDER BY categoryId LIMIT %s",
+                    (*seek_params, limit + 1)
+                )
+            else:
+                cursor.execute("SELECT categoryId, categoryName FROM Category ORDER BY categoryId LIMIT %s", (limit + 1,))
+            categories, next_cursor = split_page(cursor.fetchall(), limit, 'categoryId:asc', ['categoryId'])
+
+            return page_response(categories, next_cursor, headers=validator_headers(etag, state['version']))
+        except InvalidCursor as e:
+            return {'error': str(e)}, 400
         except Error as e:
             return {'error': str(e)}, 500
         finally:
@@ -60,13 +85,18 @@ class CategoryDetail(Resource):
             connection = create_connection()
             cursor = connection.cursor(dictionary=True)
             
-            cursor.execute("SELECT * FROM Category WHERE categoryId = %s", (category_id,))
+            cursor.execute(
+                "SELECT categoryId, categoryName, UNIX_TIMESTAMP(updatedAt) AS version FROM Category WHERE categoryId = %s",
+                (category_id,)
+            )
             category = cursor.fetchone()
             
             if not category:
                 return {'error': 'Category not found'}, 404
             
-            return category, 200
+            version = category.pop('version')
+            etag = make_etag('category', version, category['categoryId'])
+            return conditional_response(etag, version) or (category, 200, validator_headers(etag, version))
         except Error as e:
             return {'error': str(e)}, 500
         finally:
@@ -3,14 +3,28 @@ from flask_restful import Resource
 from mysql.connector import Error
 from models import create_connection
 from routes import api
+from tokens import request_user_id, InvalidToken
+from streaming import stream_format, stream_rows
+from serializers import serialize_order
 
 # Resource for managing user orders
 class UserOrders(Resource):
     def get(self):
 
-        user_id = request.args.get('userId', default=None, type=int)
+        try:
+            user_id = request_user_id(type=int)
+        except InvalidToken as e:
+            return e.to_response()
 
         connection, cursor = None, None
+
+        # Stream the orders straight from the server-side cursor
+        fmt = stream_format()
+        if fmt:
+            try:
+                return stream_rows("SELECT * FROM `Order` WHERE userId = %s", (user_id,), serialize_order, fmt)
+            except Error as e:
+                return {'error': str(e)}, 500
         
         try:
             connection = create_connection()
@@ -18,12 +32,7 @@ class UserOrders(Resource):
             cursor.execute(
                 "SELECT * FROM `Order` WHERE userId = %s", (user_id,)
             )
-            orders = cursor.fetchall()
-            # Format the orders' paymentTime and orderDate if necessary
-            for order in orders:
-                order['orderDate'] = order['orderDate'].isoformat() if order['orderDate'] else None
-                order['paymentTime'] = order['paymentTime'].isoformat() if order['paymentTime'] else None
-                order['totalAmount'] = float(order['totalAmount'])
+            orders = [serialize_order(order) for order in cursor.fetchall()]
             return orders, 200
         except Error as e:
             return {'error': str(e)}, 500
@@ -32,7 +41,10 @@ class UserOrders(Resource):
             connection.close()
 
     def post(self):
-        user_id = request.args.get('userId')
+        try:
+            user_id = request_user_id()
+        except InvalidToken as e:
+            return e.to_response()
 
         connection, cursor = None, None
         data = request.get_json()
@@ -58,7 +70,10 @@ class UserOrders(Resource):
             connection.close()
 
     def put(self):
-        user_id = request.args.get('userId')
+        try:
+            user_id = request_user_id()
+        except InvalidToken as e:
+            return e.to_response()
         order_id = request.args.get('orderId')
 
         connection, cursor = None, None
@@ -90,7 +105,10 @@ class UserOrders(Resource):
             connection.close()
 
     def delete(self):
-        user_id = request.args.get('userId')
+        try:
+            user_id = request_user_id()
+        except InvalidToken as e:
+            return e.to_response()
         order_id = request.args.get('orderId')
 
         connection, cursor = None, None
@@ -1,8 +1,44 @@
-from flask import request
+import io
+import os
+from datetime import datetime
+from flask import request, Response
 from flask_restful import Resource
 from mysql.connector import Error
 from routes import api
 from models import create_connection
+from snapshot import Snapshot
+from compress import negotiate
+import metrics
+from parallel import fetch_sections
+from pubsub import bid_events
+from scheduler import auction_scheduler
+from pagination import InvalidCursor, seek, split_page, page_response, page_limit
+from catalog_import import import_products, INSERT_IMAGE_QUERY, DEFAULT_BATCH_SIZE
+from serializers import serialize_trending_product, serialize_high_bid_product, serialize_live_product
+from conditional import make_etag, validator_headers, conditional_response
+from fieldsets import (InvalidFields, product_fields, trending_fields,
+                       PRODUCT_DETAIL_FIELDS, PRODUCT_LIST_FIELDS, TRENDING_FIELDS)
+
+# Load the images of a whole page of products with a single IN (...) query and
+# attach them to each row as product['images']
+def hydrate_images(cursor, products):
+    if not products:
+        return products
+
+    product_ids = list({product['productId'] for product in products})
+    placeholders = ', '.join(['%s'] * len(product_ids))
+    cursor.execute(
+        f"SELECT productId, imageURL FROM Product_img WHERE productId IN ({placeholders}) ORDER BY imageId",
+        tuple(product_ids)
+    )
+
+    images_by_product = {}
+    for img in cursor.fetchall():
+        images_by_product.setdefault(img['productId'], []).append({'imageURL': img['imageURL']})
+
+    for product in products:
+        product['images'] = images_by_product.get(product['productId'], [])
+    return products
 
 # Resource for managing a single product
 class Product(Resource):
@@ -10,34 +46,44 @@ class Product(Resource):
         product_id = request.args.get('id')
         if not product_id:
             return {'error': 'Product ID is required'}, 400
-        
+
+        try:
+            fields = product_fields.requested(PRODUCT_DETAIL_FIELDS)
+        except InvalidFields as e:
+            return {'error': str(e)}, 400
+        serialize = product_fields.serializer(fields)
+
         conn, cursor = None, None
         try:
             conn = create_connection()
             cursor = conn.cursor(dictionary=True)
             
-            cursor.execute('SELECT * FROM Product WHERE productId = %s', (product_id,))
+            # Revalidation only needs the row version
+            if request.if_none_match or request.if_modified_since:
+                cursor.execute('SELECT UNIX_TIMESTAMP(updatedAt) AS version FROM Product WHERE productId = %s',
+                               (product_id,))
+                row = cursor.fetchone()
+                if row:
+                    etag = make_etag('product', row['version'], product_id, fields)
+                    unchanged = conditional_response(etag, row['version'])
+                    if unchanged:
+                        return unchanged
+
+            columns = product_fields.select(fields, required=['productId'])
+            cursor.execute(f'SELECT {columns}, UNIX_TIMESTAMP(updatedAt) AS version FROM Product WHERE productId = %s',
+                           (product_id,))
             product = cursor.fetchone()
             
             if not product:
                 return {'error': 'Product not found'}, 404
             
-            cursor.execute('SELECT imageURL FROM Product_img WHERE productId = %s', (product_id,))
-            images = cursor.fetchall()
-            product['images'] = [{'imageURL': img['imageURL']} for img in images]
+            if 'images' in fields:
+                cursor.execute('SELECT imageURL FROM Product_img WHERE productId = %s', (product_id,))
+                images = cursor.fetchall()
+                product['images'] = [{'imageURL': img['imageURL']} for img in images]
             
-            return [{
-                    'productId': product['productId'],
-                    'title': product['title'],
-                    'description': product['description'],
-                    'condition': product['condition'],
-                    'initialBid': float(product['initialBid']),
-                    'currentBidPrice': float(product['currentBidPrice']),
-                    'status': product['status'],
-                    'startTime': product['startTime'].isoformat(),
-                    'endTime': product['endTime'].isoformat(),
-                    'images': product['images']
-                }]
+            etag = make_etag('product', product['version'], product_id, fields)
+            return [serialize(product)], 200, validator_headers(etag, product['version'])
         except Error as e:
             return {'error': str(e)}, 500
         finally:
@@ -45,9 +91,10 @@ class Product(Resource):
             conn.close()
 
     def put(self):
-        product_id = request.args.get('id')
+        # Validated up front: the transition is scheduled after the commit
+        product_id = request.args.get('id', type=int)
         if not product_id:
-            return {'error': 'Product ID is required'}, 400
+            return {'error': 'Product ID is required and must be an integer'}, 400
 
         data = request.get_json()
 
@@ -59,7 +106,8 @@ class Product(Resource):
             # Update the product details
             update_query = '''
             UPDATE Product 
-            SET title = %s, description = %s, condition = %s, initialBid = %s, status = %s, startTime = %s, endTime = %s
+            SET title = %s, description = %s, `condition` = %s, initialBid = %s, status = %s, startTime = %s, endTime = %s,
+                updatedAt = CURRENT_TIMESTAMP(6)
             WHERE productId = %s
             '''
             cursor.execute(update_query, (
@@ -76,10 +124,11 @@ class Product(Resource):
             # Delete existing images and add new ones
             if 'images' in data:
                 cursor.execute('DELETE FROM Product_img WHERE productId = %s', (product_id,))
-                for image_url in data['images']:
-                    cursor.execute('INSERT INTO Product_img (productId, imageURL) VALUES (%s, %s)', (product_id, image_url))
+                if data['images']:
+                    cursor.executemany(INSERT_IMAGE_QUERY, [(product_id, image_url) for image_url in data['images']])
 
             conn.commit()
+            schedule_transition(product_id, data)
             return {'message': 'Product updated successfully'}, 200
         except Error as e:
             conn.rollback()
@@ -121,7 +170,7 @@ class ProductCreate(Resource):
 
             # Insert product
             insert_product_query = '''
-            INSERT INTO Product (title, description, condition, initialBid, status, startTime, endTime)
+            INSERT INTO Product (title, description, `condition`, initialBid, status, startTime, endTime)
             VALUES (%s, %s, %s, %s, %s, %s, %s)
             '''
             cursor.execute(insert_product_query, (
@@ -134,13 +183,12 @@ class ProductCreate(Resource):
             insert_catprod_query = 'INSERT INTO Cat_Prod (categoryId, productId) VALUES (%s, %s)'
             cursor.execute(insert_catprod_query, (data['categoryId'], new_product_id))
 
-            # Insert product images if provided
-            if 'images' in data:
-                for image_url in data['images']:
-                    insert_image_query = 'INSERT INTO Product_img (productId, imageURL) VALUES (%s, %s)'
-                    cursor.execute(insert_image_query, (new_product_id, image_url))
+            # Insert product images if provided, as one multi-row INSERT
+            if data.get('images'):
+                cursor.executemany(INSERT_IMAGE_QUERY, [(new_product_id, image_url) for image_url in data['images']])
 
             conn.commit()
+            schedule_transition(new_product_id, data)
             return {'message': 'Product created successfully'}, 201
         except Error as e:
             conn.rollback()
@@ -149,68 +197,112 @@ class ProductCreate(Resource):
             cursor.close()
             conn.close()
 
+# Allowed sort fields and order for safety
+ALLOWED_SORT_FIELDS = {'startTime', 'endTime', 'title'}
+ALLOWED_SORT_ORDERS = {'asc', 'desc'}
+
+# Bulk import products from a JSONL or CSV body (or a 'file' upload),
+# streamed in chunked transactions
+class ProductImport(Resource):
+    def post(self):
+        fmt = request.args.get('format', 'jsonl')
+        batch_size = request.args.get('batchSize', default=DEFAULT_BATCH_SIZE, type=int)
+        if fmt not in ('jsonl', 'csv'):
+            return {'error': 'format must be jsonl or csv'}, 400
+        if batch_size < 1:
+            return {'error': 'batchSize must be positive'}, 400
+
+        upload = request.files.get('file')
+        raw = upload.stream if upload else request.stream
+        stream = io.TextIOWrapper(raw, encoding='utf-8', newline='')
+
+        conn = None
+        try:
+            conn = create_connection()
+            report = import_products(conn, stream, fmt, batch_size)
+            return report, 200 if not report['failed'] else 207
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        except Error as e:
+            return {'error': str(e)}, 500
+        finally:
+            if conn:
+                conn.close()
+
 # Resource for listing products with optional filters
 class ProductList(Resource):
     def get(self):
         status = request.args.get('status', None)
         sort_by = request.args.get('sort_by', 'startTime')
         sort_order = request.args.get('sort_order', 'asc')
-        limit = request.args.get('limit', default=5, type=int)  # Convert limit to integer
-        
+        limit = page_limit(default=5)
+
+        if sort_by not in ALLOWED_SORT_FIELDS:
+            return {'error': f"Invalid sort_by parameter. Allowed values are {', '.join(ALLOWED_SORT_FIELDS)}"}, 400
+
+        if sort_order.lower() not in ALLOWED_SORT_ORDERS:
+            return {'error': f"Invalid sort_order parameter. Allowed values are {', '.join(ALLOWED_SORT_ORDERS)}"}, 400
+
+        sort = f'{sort_by}:{sort_order.lower()}'
+        descending = sort_order.lower() == 'desc'
+
+        try:
+            fields = product_fields.requested(PRODUCT_LIST_FIELDS)
+        except InvalidFields as e:
+            return {'error': str(e)}, 400
+        serialize = product_fields.serializer(fields)
+
         conn, cursor = None, None
         try:
             conn = create_connection()
             cursor = conn.cursor(dictionary=True)
 
             # Build the base SQL query
-            query = "SELECT * FROM Product"
-            params = []
+            query = f"SELECT {product_fields.select(fields, required=[sort_by, 'productId'])} FROM Product"
+            conditions, params = [], []
 
             # Apply status filter if provided
             if status:
-                query += " WHERE status = %s"
+                conditions.append("status = %s")
                 params.append(status)
 
-            # Apply sorting
-            query += f" ORDER BY {sort_by} {sort_order.upper()}"
+            # Seek past the previous page
+            seek_sql, seek_params = seek([sort_by, 'productId'], sort, descending)
+            if seek_sql:
+                conditions.append(seek_sql)
+                params.extend(seek_params)
+
+            if conditions:
+                query += " WHERE " + " AND ".join(conditions)
+
+            # Apply sorting, with productId as the tiebreak
+            direction = sort_order.upper()
+            query += f" ORDER BY {sort_by} {direction}, productId {direction}"
 
-            # Apply limit
+            # Apply limit, fetching one extra row to detect a next page
             query += " LIMIT %s"
-            params.append(limit)
+            params.append(limit + 1)
 
             # Execute the query
             cursor.execute(query, tuple(params))
-            products = cursor.fetchall()
+            products, next_cursor = split_page(cursor.fetchall(), limit, sort, [sort_by, 'productId'])
 
-            # Fetch product images for each product
-            products_list = []
-            for product in products:
-                cursor.execute("SELECT imageURL FROM Product_img WHERE productId = %s", (product['productId'],))
-                images = cursor.fetchall()
-                product['images'] = [{'imageURL': img['imageURL']} for img in images]
-                products_list.append({
-                    'productId': product['productId'],
-                    'title': product['title'],
-                    'description': product['description'],
-                    'condition': product['condition'],
-                    'initialBid': float(product['initialBid']),
-                    'currentBidPrice': float(product['currentBidPrice']),
-                    'status': product['status'],
-                    'startTime': product['startTime'].isoformat(),
-                    'endTime': product['endTime'].isoformat(),
-                    'images': product['images']
-                })
-
-            return products_list
+            # Fetch images for the whole page at once
+            if 'images' in fields:
+                hydrate_images(cursor, products)
+
+            products_list = [serialize(product) for product in products]
+
+            return page_response(products_list, next_cursor)
+        except InvalidCursor as e:
+            return {'error': str(e)}, 400
         except Error as e:
             return {'error': str(e)}, 500
         finally:
-            cursor.close()
-            conn.close()
-
-# Allowed sort fields and order for safety
-ALLOWED_SORT_FIELDS = {'startTime', 'endTime', 'title'}
-ALLOWED_SORT_ORDERS = {'asc', 'desc'}
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
 
 class CategoryProducts(Resource):
     def get(self):
@@ -218,7 +310,7 @@ class CategoryProducts(Resource):
         status = request.args.get('status', 'live')
         sort_by = request.args.get('sortBy', 'startTime')
         sort_order = request.args.get('sortOrder', 'asc')
-        limit = request.args.get('limit', default=5, type=int)  # Convert limit to integer
+        limit = page_limit(default=5)
         offset = request.args.get('offset', default=None, type=int)
 
         if not category_id:
@@ -230,14 +322,23 @@ class CategoryProducts(Resource):
         if sort_order.lower() not in ALLOWED_SORT_ORDERS:
             return {'error': f"Invalid sortOrder parameter. Allowed values are {', '.join(ALLOWED_SORT_ORDERS)}"}, 400
 
+        sort = f'{sort_by}:{sort_order.lower()}'
+        descending = sort_order.lower() == 'desc'
+
+        try:
+            fields = product_fields.requested(PRODUCT_LIST_FIELDS)
+        except InvalidFields as e:
+            return {'error': str(e)}, 400
+        serialize = product_fields.serializer(fields)
+
         conn, cursor = None, None
         try:
             conn = create_connection()
             cursor = conn.cursor(dictionary=True)
 
             # Base SQL query for fetching products in a category
-            query = """
-                SELECT p.* 
+            query = f"""
+                SELECT {product_fields.select(fields, required=[sort_by, 'productId'], table='p')}
                 FROM Product p
                 JOIN Cat_Prod cp ON p.productId = cp.productId
                 WHERE cp.categoryId = %s
@@ -249,53 +350,43 @@ class CategoryProducts(Resource):
                 query += " AND p.status = %s"
                 params.append(status)
 
-            # Apply sorting with validated parameters
-            query += f" ORDER BY {sort_by} {sort_order.upper()}"
+            # Seek past the previous page
+            seek_sql, seek_params = seek([f'p.{sort_by}', 'p.productId'], sort, descending)
+            if seek_sql:
+                query += f" AND {seek_sql}"
+                params.extend(seek_params)
 
-            # Apply limit
+            # Apply sorting with validated parameters, productId as the tiebreak
+            direction = sort_order.upper()
+            query += f" ORDER BY p.{sort_by} {direction}, p.productId {direction}"
+
+            # Apply limit, fetching one extra row to detect a next page
             query += " LIMIT %s"
-            params.append(limit)
+            params.append(limit + 1)
 
-            if offset:
+            # Legacy offset paging; cursor paging is preferred for deep pages
+            if offset and not seek_sql:
                 query += " OFFSET %s"
                 params.append(offset)
 
-            # Debug: Print the final SQL query and parameters
-            print(f"Executing Query: {query} with params: {params}")
-
             # Execute the query
             cursor.execute(query, tuple(params))
-            products = cursor.fetchall()
-
-            # Debug: Check fetched products
-            print(f"Fetched Products: {products}")
+            products, next_cursor = split_page(cursor.fetchall(), limit, sort, [sort_by, 'productId'])
 
             # Check if products are found
-            if not products:
+            if not products and not seek_sql:
                 return {'message': 'No products found for the specified category'}, 404
 
-            # Fetch product images for each product
-            products_list = []
-            
-            for product in products:
-                # Corrected method call
-                product['images'] = self.fetch_product_images(cursor, product['productId'])
-                
-                products_list.append({
-                    'productId': product['productId'],
-                    'title': product['title'],
-                    'description': product['description'],
-                    'condition': product['condition'],
-                    'initialBid': float(product['initialBid']) if product['initialBid'] is not None else None,
-                    'currentBidPrice': float(product['currentBidPrice']) if product['currentBidPrice'] is not None else None,
-                    'status': product['status'],
-                    'startTime': product['startTime'].isoformat() if product['startTime'] else None,
-                    'endTime': product['endTime'].isoformat() if product['endTime'] else None,
-                    'images': product['images']
-                })
-
-            return products_list, 200
+            # Fetch images for the whole page at once
+            if 'images' in fields:
+                hydrate_images(cursor, products)
+
+            products_list = [serialize(product) for product in products]
 
+            return page_response(products_list, next_cursor)
+
+        except InvalidCursor as e:
+            return {'error': str(e)}, 400
         except Error as e:
             return {'error': str(e)}, 500
 
@@ -305,28 +396,29 @@ class CategoryProducts(Resource):
             if conn:
                 conn.close()
 
-    def fetch_product_images(self, cursor, product_id):
-        cursor.execute("SELECT imageURL FROM Product_img WHERE productId = %s", (product_id,))
-        images = cursor.fetchall()
-        return [{'imageURL': img['imageURL']} for img in images]
-                  
 class TrendingProducts(Resource):
     def get(self):
         # Get the number of products to return from query parameters, default to 2
         num_products = request.args.get('limit', default=5, type=int)
 
+        try:
+            fields = trending_fields.requested(TRENDING_FIELDS)
+        except InvalidFields as e:
+            return {'error': str(e)}, 400
+        serialize = trending_fields.serializer(fields)
+
         conn, cursor = None, None
         try:
             conn = create_connection()
             cursor = conn.cursor(dictionary=True)
 
-            # SQL query to get products with the highest number of bids
-            query = """
-                SELECT p.*, COUNT(b.bidId) AS bid_count
-                FROM Product p
-                JOIN Bid b ON p.productId = b.productId
-                GROUP BY p.productId
-                ORDER BY bid_count DESC
+            # SQL query to get products with the highest number of bids,
+            # read from the maintained Product.bidCount column
+            query = f"""
+                SELECT {trending_fields.select(fields, required=['productId'])}
+                FROM Product
+                WHERE bidCount > 0
+                ORDER BY bidCount DESC
                 LIMIT %s
             """
 
@@ -334,24 +426,11 @@ class TrendingProducts(Resource):
             cursor.execute(query, (num_products,))
             trending_products = cursor.fetchall()
 
-            # Prepare the response
-            response = []
-            for product in trending_products:
-                cursor.execute("SELECT imageURL FROM Product_img WHERE productId = %s", (product['productId'],))
-                images = cursor.fetchall()
+            if 'images' in fields:
+                hydrate_images(cursor, trending_products)
 
-                response.append({
-                    'productId': product['productId'],
-                    'title': product['title'],
-                    'description': product['description'],
-                    'bid_count': product['bid_count'],
-                    'currentBidPrice': float(product['currentBidPrice']) if product['currentBidPrice'] is not None else None,
-                    'condition': product['condition'],
-                    'status': product['status'],
-                    'startTime': product['startTime'].isoformat() if product['startTime'] else None,
-                    'endTime': product['endTime'].isoformat() if product['endTime'] else None,
-                    'images': [{'imageURL': img['imageURL']} for img in images]
-                })
+            # Prepare the response
+            response = [serialize(product) for product in trending_products]
 
             return response
         except Error as e:
@@ -364,127 +443,133 @@ class TrendingProducts(Resource):
             cursor.close()
             conn.close()
 
+# Homepage sections. Each runs on its own pooled connection so LHTProducts can
+# fetch all three concurrently.
+def fetch_lht_section(query, serialize):
+    conn, cursor = None, None
+    try:
+        conn = create_connection()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(query)
+        products = cursor.fetchall()
+        hydrate_images(cursor, products)
+        return [serialize(product) for product in products]
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+def fetch_trending_section():
+    # Fetch Trending Products
+    trending_query = """
+        SELECT *, bidCount AS bid_count
+        FROM Product
+        ORDER BY bidCount DESC
+        LIMIT 10
+    """
+    return fetch_lht_section(trending_query, serialize_trending_product)
+
+def fetch_high_bids_section():
+    # Fetch Products with Highest Bids
+    high_bid_query = """
+        SELECT *, highestBid AS highest_bid
+        FROM Product
+        ORDER BY highestBid DESC
+        LIMIT 8
+    """
+    return fetch_lht_section(high_bid_query, serialize_high_bid_product)
+
+def fetch_live_section():
+    # Fetch Live Auctions
+    live_auction_query = """
+        SELECT *
+        FROM Product
+        WHERE status = 'live'
+        ORDER BY startTime
+        LIMIT 10
+    """
+    return fetch_lht_section(live_auction_query, serialize_live_product)
+
+LHT_SECTIONS = {
+    'trending': fetch_trending_section,
+    'highBids': fetch_high_bids_section,
+    'live': fetch_live_section,
+}
+
+# Last good value of each section, served when a section fails or times out
+_last_lht_sections = {}
+
+# Build the homepage payload (trending, highest bids, live auctions). It is the
+# same for every visitor, so LHTProducts serves it from lht_snapshot.
+def build_lht_payload():
+    results, failures = fetch_sections(LHT_SECTIONS)
+    if not results:
+        raise RuntimeError(f"All homepage sections failed: {failures}")
+
+    response = []
+    for name in LHT_SECTIONS:
+        if name in results:
+            _last_lht_sections[name] = results[name]
+        else:
+            print(f"LHT section {name} failed: {failures[name]}")
+        response.append({name: _last_lht_sections.get(name, [])})
+    return response
+
+lht_snapshot = Snapshot(
+    'lht',
+    build_lht_payload,
+    interval=float(os.getenv('LHT_SNAPSHOT_INTERVAL', 5)),
+    max_staleness=float(os.getenv('LHT_SNAPSHOT_MAX_STALENESS', 30)),
+    debounce=float(os.getenv('LHT_SNAPSHOT_DEBOUNCE', 0.5))
+)
+
+metrics.stats_collector('snapshot', lht_snapshot.stats, 'Snapshot', snapshot='lht')
+
+# Accepted bids and auctions going live or closing move the homepage
+# sections; refresh it ahead of schedule
+bid_events.listen(lambda topic, event: lht_snapshot.notify())
+auction_scheduler.listen(lambda transition, product_ids: lht_snapshot.notify())
+
+# Queue the product's next status transition; rows the scheduler cannot
+# parse here are picked up by its next reload from Product
+def schedule_transition(product_id, data):
+    try:
+        start_time = datetime.fromisoformat(str(data.get('startTime')))
+        end_time = datetime.fromisoformat(str(data.get('endTime')))
+    except ValueError:
+        return
+    # The heap holds naive local times; an offset-aware value cannot be
+    # compared with them
+    if start_time.tzinfo is not None:
+        start_time = start_time.astimezone().replace(tzinfo=None)
+    if end_time.tzinfo is not None:
+        end_time = end_time.astimezone().replace(tzinfo=None)
+    auction_scheduler.schedule(product_id, data.get('status'), start_time, end_time)
+
 class LHTProducts(Resource):
     def get(self):
-
-        conn, cursor = None, None  # Initialize outside try block
         try:
-            conn = create_connection()  # Create connection
-            cursor = conn.cursor(dictionary=True)  # Create cursor
-
-            # Prepare the response
-            response = []
-
-            # Helper function to fetch images for a product
-            def fetch_images(product_id):
-                cursor.execute("SELECT imageURL FROM Product_img WHERE productId = %s", (product_id,))
-                return [{'imageURL': img['imageURL']} for img in cursor.fetchall()]
-
-            # Fetch Trending Products
-            trending_query = """
-                SELECT p.*, COUNT(b.bidId) AS bid_count
-                FROM Product p
-                LEFT JOIN Bid b ON p.productId = b.productId
-                GROUP BY p.productId
-                ORDER BY bid_count DESC
-                LIMIT 10
-            """
-            cursor.execute(trending_query)
-            trending_products = cursor.fetchall()
-
-            trending_sub = []
-            for product in trending_products:
-                images = fetch_images(product['productId'])
-                trending_sub.append({
-                    'productId': product['productId'],
-                    'title': product['title'],
-                    'description': product['description'],
-                    'bid_count': product['bid_count'],
-                    'currentBidPrice': float(product['currentBidPrice']) if product['currentBidPrice'] is not None else None,
-                    'condition': product['condition'],
-                    'status': product['status'],
-                    'startTime': product['startTime'].isoformat() if product['startTime'] else None,
-                    'endTime': product['endTime'].isoformat() if product['endTime'] else None,
-                    'images': images
-                })
-
-            response.append({'trending': trending_sub})
-
-            # Fetch Products with Highest Bids
-            high_bid_query = """
-                SELECT p.*, MAX(b.bidAmount) AS highest_bid
-                FROM Product p
-                LEFT JOIN Bid b ON p.productId = b.productId
-                GROUP BY p.productId
-                ORDER BY highest_bid DESC
-                LIMIT 8
-            """
-            cursor.execute(high_bid_query)
-            high_bid_products = cursor.fetchall()
-
-            high_bid_sub = []
-            for product in high_bid_products:
-                images = fetch_images(product['productId'])
-                high_bid_sub.append({
-                    'productId': product['productId'],
-                    'title': product['title'],
-                    'description': product['description'],
-                    'highest_bid': float(product['highest_bid']) if product['highest_bid'] is not None else None,
-                    'currentBidPrice': float(product['currentBidPrice']) if product['currentBidPrice'] is not None else None,
-                    'condition': product['condition'],
-                    'status': product['status'],
-                    'startTime': product['startTime'].isoformat() if product['startTime'] else None,
-                    'endTime': product['endTime'].isoformat() if product['endTime'] else None,
-                    'images': images
-                })
-
-            response.append({'highBids': high_bid_sub})
-
-            # Fetch Live Auctions
-            live_auction_query = """
-                SELECT *
-                FROM Product
-                WHERE status = 'live'
-                ORDER BY startTime
-                LIMIT 10
-            """
-            cursor.execute(live_auction_query)
-            live_auction_products = cursor.fetchall()
-
-            live_sub = []
-            for product in live_auction_products:
-                images = fetch_images(product['productId'])
-                live_sub.append({
-                    'productId': product['productId'],
-                    'title': product['title'],
-                    'description': product['description'],
-                    'currentBidPrice': float(product['currentBidPrice']) if product['currentBidPrice'] is not None else None,
-                    'condition': product['condition'],
-                    'status': product['status'],
-                    'startTime': product['startTime'].isoformat() if product['startTime'] else None,
-                    'endTime': product['endTime'].isoformat() if product['endTime'] else None,
-                    'images': images
-                })
-
-            response.append({'live': live_sub})
-
-            return response, 200
-
+            # Served from the snapshot's pre-compressed bytes; the blueprint's
+            # compression hook leaves responses with Content-Encoding alone
+            encoding = negotiate()
+            body = lht_snapshot.get_encoded(encoding)
+            response = Response(body, status=200, mimetype='application/json')
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+            response.vary.add('Accept-Encoding')
+            response.headers['X-Snapshot-Age'] = f'{lht_snapshot.age():.3f}'
+            return response
         except Error as e:
             return {'error': str(e)}, 500
         except Exception as e:
             return {'error': str(e)}, 500
-        finally:
-            # Ensure cursor and connection are closed if they were created
-            if cursor:
-                cursor.close()
-            if conn:
-                conn.close()
 
 # Register resources with the API
 api.add_resource(Product, '/api/v2/products/product')   #id
 api.add_resource(ProductList, '/api/v2/products')   #status,limit for getting list of products of specified status
 api.add_resource(ProductCreate, '/api/v2/products/create')    #POST for creating product
+api.add_resource(ProductImport, '/api/v2/products/import')    #POST JSONL/CSV body, format=jsonl|csv, batchSize
 api.add_resource(CategoryProducts, '/api/v2/categories/products')   #categoryId, sortBy=currentBidPrice, sortOrder=desc (default asc)
                                                                             #limit, status
 api.add_resource(TrendingProducts, '/api/v2/products/trending')    #limit
@@ -3,12 +3,22 @@ from flask_restful import Resource
 from mysql.connector import Error
 from routes import api
 from models import create_connection
+from streaming import stream_format, stream_rows
+from serializers import serialize_shipment
 
 class Shipment(Resource):
     def get(self):
         shipment_id = request.args.get('shippingId')
         connection, cursor = None, None
 
+        # Stream the full listing straight from the server-side cursor
+        fmt = stream_format()
+        if fmt and not shipment_id:
+            try:
+                return stream_rows("SELECT * FROM Shipment", (), serialize_shipment, fmt)
+            except Error as e:
+                return {'error': str(e)}, 500
+
         try:
             connection = create_connection()
             cursor = connection.cursor(dictionary=True)
@@ -18,39 +28,13 @@ class Shipment(Resource):
                 )
                 shipment = cursor.fetchone()
                 if shipment:
-                    return [{
-                        'shippingId': shipment['shippingId'],
-                        'shippingMethod': shipment['shippingMethod'],
-                        'trackingNumber': shipment['trackingNumber'],
-                        'carrierName': shipment['carrierName'],
-                        'shippingStatus': shipment['shippingStatus'],
-                        'shippingCost': float(shipment['shippingCost']) if shipment['shippingCost'] is not None else None,
-                        'estimatedDeliveryDate': shipment['estimatedDeliveryDate'].isoformat() if shipment['estimatedDeliveryDate'] else None,
-                        'houseFlatNo': shipment['houseFlatNo'],
-                        'street': shipment['street'],
-                        'city': shipment['city'],
-                        'pincode': shipment['pincode'],
-                        'orderId': shipment['orderId']
-                    }], 200
+                    return [serialize_shipment(shipment)], 200
                 else:
                     return {'error': 'Shipment not found'}, 404
             else:
                 cursor.execute("SELECT * FROM Shipment")
                 shipments = cursor.fetchall()
-                result = [{
-                    'shippingId': shipment['shippingId'],
-                    'shippingMethod': shipment['shippingMethod'],
-                    'trackingNumber': shipment['trackingNumber'],
-                    'carrierName': shipment['carrierName'],
-                    'shippingStatus': shipment['shippingStatus'],
-                    'shippingCost': float(shipment['shippingCost']) if shipment['shippingCost'] is not None else None,
-                    'estimatedDeliveryDate': shipment['estimatedDeliveryDate'].isoformat() if shipment['estimatedDeliveryDate'] else None,
-                    'houseFlatNo': shipment['houseFlatNo'],
-                    'street': shipment['street'],
-                    'city': shipment['city'],
-                    'pincode': shipment['pincode'],
-                    'orderId': shipment['orderId']
-                } for shipment in shipments]
+                result = [serialize_shipment(shipment) for shipment in shipments]
                 return result, 200
             
         except Error as e:
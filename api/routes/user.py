@@ -1,10 +1,11 @@
 from flask import request, jsonify
 from flask_restful import Resource
-from mysql.connector import Error
-from werkzeug.security import generate_password_hash, check_password_hash
+from mysql.connector import Error, IntegrityError
+from passwords import hash_password, verify_password, needs_rehash, HashingSaturated
 from models import create_connection
 from routes import api
-from datetime import datetime
+from tokens import issue_tokens, verify_refresh_token, request_user_id, InvalidToken
+from fieldsets import InvalidFields, user_fields, USER_DETAIL_FIELDS
 
 # User Registration Resource
 class UserRegistration(Resource):
@@ -19,13 +20,9 @@ class UserRegistration(Resource):
 
             conn = create_connection()
             cursor = conn.cursor()
-            # Check if username or email already exists
-            cursor.execute("SELECT userId FROM User WHERE username = %s OR email = %s", (username, email))
-            if cursor.fetchone():
-                return {'error': 'Username or email already exists'}, 400
 
-            # Hash the password
-            hashed_password = generate_password_hash(password, method='pbkdf2:sha256')
+            # Hash the password on the hashing worker pool
+            hashed_password = hash_password(password)
 
             # Create a new user instance
             cursor.execute(
@@ -42,6 +39,13 @@ class UserRegistration(Resource):
             # Get the userId of the newly created user
             new_user_id = cursor.lastrowid
             return {'message': 'User registered successfully', 'userId': new_user_id}, 201
+        except HashingSaturated as e:
+            return {'error': str(e)}, 503, {'Retry-After': '1'}
+        except IntegrityError as e:
+            # Unique indexes on username and email reject duplicates
+            if e.errno == 1062:
+                return {'error': 'Username or email already exists'}, 400
+            return {'error': str(e)}, 400
         except Error as e:
             return {'error': str(e)}, 400
         finally:
@@ -60,54 +64,86 @@ class UserLogin(Resource):
 
             conn = create_connection()
             cursor = conn.cursor()
-            cursor.execute("SELECT userId, passwdHash FROM User WHERE email = %s", (email,))
+            cursor.execute("SELECT userId, passwdHash, isVerified FROM User WHERE email = %s", (email,))
             user = cursor.fetchone()
-            if user and check_password_hash(user[1], password):
-                return {'message': 'Login successful', 'userId': user[0]}, 200
+            if user and verify_password(user[1], password):
+                # Upgrade hashes made with older cost parameters while we
+                # still have the plaintext; a busy pool just defers it
+                if needs_rehash(user[1]):
+                    try:
+                        cursor.execute("UPDATE User SET passwdHash = %s WHERE userId = %s",
+                                       (hash_password(password), user[0]))
+                        conn.commit()
+                    except HashingSaturated:
+                        pass
+                return {'message': 'Login successful', 'userId': user[0], **issue_tokens(user[0], user[2])}, 200
             return {'error': 'Invalid credentials'}, 401
+        except HashingSaturated as e:
+            return {'error': str(e)}, 503, {'Retry-After': '1'}
         except Error as e:
             return {'error': str(e)}, 500
         finally:
             cursor.close()
             conn.close()
 
+# Exchange a refresh token for a new token pair. The User row is re-read
+# here so deleted users lose access and isVerified changes reach the next
+# access token.
+class TokenRefresh(Resource):
+    def post(self):
+        data = request.get_json(silent=True) or {}
+        token = data.get('refreshToken')
+        if not token:
+            return {'error': 'refreshToken is required'}, 400
+
+        conn, cursor = None, None
+        try:
+            claims = verify_refresh_token(token)
+
+            conn = create_connection()
+            cursor = conn.cursor()
+            cursor.execute("SELECT userId, isVerified FROM User WHERE userId = %s", (claims['uid'],))
+            user = cursor.fetchone()
+            if not user:
+                return {'error': 'User not found'}, 401
+            return {'userId': user[0], **issue_tokens(user[0], user[1])}, 200
+        except InvalidToken as e:
+            return e.to_response()
+        except Error as e:
+            return {'error': str(e)}, 500
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+
 # Resource for managing user details
 class UserDetails(Resource):
     def get(self):
-        user_id = request.args.get('userId')
+        try:
+            user_id = request_user_id()
+        except InvalidToken as e:
+            return e.to_response()
         if not user_id:
             return {'error': 'User ID is required'}, 400
         
+        try:
+            fields = user_fields.requested(USER_DETAIL_FIELDS)
+        except InvalidFields as e:
+            return {'error': str(e)}, 400
+
         conn, cursor = None, None
         try:
             conn = create_connection()
             cursor = conn.cursor(dictionary=True)
             
-            cursor.execute("SELECT * FROM User WHERE userId = %s", (user_id,))
+            # Only the requested columns; passwdHash is never read here
+            cursor.execute(f"SELECT {user_fields.select(fields)} FROM User WHERE userId = %s", (user_id,))
             user = cursor.fetchone()
             if not user:
                 return {'error': 'User not found'}, 404
-            
-            # Format the dateJoined if it's a datetime object
-            date_joined = user['dateJoined']
-            if isinstance(date_joined, str):
-                date_joined = datetime.fromisoformat(date_joined)
-
-            user_details = {
-                'userId': user['userId'],
-                'username': user['username'],
-                'phone': user['phone'],
-                'email': user['email'],
-                'firstName': user['firstName'],
-                'lastName': user['lastName'],
-                'houseFlatNo': user['houseFlatNo'],
-                'street': user['street'],
-                'city': user['city'],
-                'pincode': user['pincode'],
-                'dateJoined': date_joined.isoformat() if isinstance(date_joined, datetime) else None,
-                'isVerified': user['isVerified']
-            }
-            return user_details, 200
+
+            return user_fields.serializer(fields)(user), 200
         except Error as e:
             return {'error': str(e)}, 500
         finally:
@@ -117,7 +153,10 @@ class UserDetails(Resource):
                 conn.close()
 
     def put(self):
-        user_id = request.args.get('userId')
+        try:
+            user_id = request_user_id()
+        except InvalidToken as e:
+            return e.to_response()
         if not user_id:
             return {'error': 'User ID is required'}, 400
 
@@ -176,7 +215,10 @@ class UserDetails(Resource):
                 conn.close()
 
     def delete(self):
-        user_id = request.args.get('userId')
+        try:
+            user_id = request_user_id()
+        except InvalidToken as e:
+            return e.to_response()
         if not user_id:
             return {'error': 'User ID is required'}, 400
 
@@ -206,4 +248,5 @@ class UserDetails(Resource):
 # Register Resources with Flask-RESTful
 api.add_resource(UserRegistration, '/api/v2/register')
 api.add_resource(UserLogin, '/api/v2/login')
+api.add_resource(TokenRefresh, '/api/v2/token/refresh')
 api.add_resource(UserDetails, '/api/v2/users') #userId
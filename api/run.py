@@ -1,4 +1,5 @@
-from index import app
-
+# The app is imported under the guard: password hashing workers re-import
+# this module, and must not create tables or start the scheduler
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    from index import app
+    app.run(debug=True)
@@ -0,0 +1,279 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from models import create_connection
+
+# Transitions fired per transaction
+BATCH_SIZE = int(os.getenv('SCHEDULER_BATCH_SIZE', 1000))
+
+# Seconds between full reloads from Product, which picks up auctions created
+# or rescheduled by other workers
+RELOAD_INTERVAL = float(os.getenv('SCHEDULER_RELOAD_INTERVAL', 300))
+
+# paymentMethod is NOT NULL on Order; winners pick the real one at checkout
+ORDER_PAYMENT_METHOD = os.getenv('AUCTION_ORDER_PAYMENT_METHOD', 'bank_transfer')
+
+START = 'start'   # upcoming -> live at startTime
+CLOSE = 'close'   # live -> sold at endTime
+
+# Keeps pending auction transitions in a priority queue ordered by due time
+# and fires them in batches. The queue is rebuilt from Product on start and
+# on every reload, and every transition re-checks status and time in SQL
+# under row locks, so stale queue entries and other workers running their
+# own scheduler are harmless.
+class AuctionScheduler:
+    def __init__(self):
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._listeners = []
+        # DB clock minus local clock, so due times compare against NOW()
+        self._clock_offset = timedelta(0)
+        self._stats = {'started': 0, 'closed': 0, 'orders': 0, 'batches': 0, 'failures': 0}
+
+    # Call fn(transition, product_ids) after each committed batch
+    def listen(self, fn):
+        self._listeners.append(fn)
+
+    def _push(self, due, product_id, transition):
+        heapq.heappush(self._heap, (due, next(self._seq), product_id, transition))
+
+    def schedule(self, product_id, status, start_time, end_time):
+        with self._cond:
+            if status == 'upcoming':
+                self._push(start_time, product_id, START)
+            elif status == 'live':
+                self._push(end_time, product_id, CLOSE)
+            self._cond.notify()
+
+    def load(self):
+        connection, cursor = None, None
+        try:
+            connection = create_connection()
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute("SELECT NOW() AS now")
+            db_now = cursor.fetchone()['now']
+            cursor.execute(
+                "SELECT productId, status, startTime, endTime FROM Product WHERE status IN ('upcoming', 'live')"
+            )
+            products = cursor.fetchall()
+        finally:
+            if cursor:
+                cursor.close()
+            if connection:
+                connection.close()
+
+        with self._cond:
+            self._clock_offset = db_now - datetime.now()
+            self._heap = []
+            for product in products:
+                if product['status'] == 'upcoming':
+                    self._push(product['startTime'], product['productId'], START)
+                else:
+                    self._push(product['endTime'], product['productId'], CLOSE)
+            self._cond.notify()
+        return len(products)
+
+    def _now(self):
+        return datetime.now() + self._clock_offset
+
+    def _pop_due(self):
+        now = self._now()
+        due = {START: [], CLOSE: []}
+        while self._heap and self._heap[0][0] <= now:
+            _, _, product_id, transition = heapq.heappop(self._heap)
+            due[transition].append(product_id)
+        return due
+
+    # Fire everything that is due now; returns the number of products changed
+    def run_due(self):
+        with self._cond:
+            due = self._pop_due()
+        changed = 0
+        for transition, handler in ((START, self._start_auctions), (CLOSE, self._close_auctions)):
+            product_ids = list(dict.fromkeys(due[transition]))
+            for i in range(0, len(product_ids), BATCH_SIZE):
+                batch = product_ids[i:i + BATCH_SIZE]
+                try:
+                    fired = handler(batch)
+                except Exception as e:
+                    self._stats['failures'] += 1
+                    print(f"Scheduler {transition} batch failed: {e}")
+                    # Put the batch back; it is retried on the next pass
+                    with self._cond:
+                        retry_at = self._now() + timedelta(seconds=5)
+                        for product_id in batch:
+                            self._push(retry_at, product_id, transition)
+                    continue
+                self._stats['batches'] += 1
+                changed += len(fired)
+                for listener in self._listeners:
+                    listener(transition, fired)
+        return changed
+
+    def _start_auctions(self, product_ids):
+        connection, cursor = None, None
+        try:
+            connection = create_connection()
+            cursor = connection.cursor(dictionary=True)
+            placeholders = ', '.join(['%s'] * len(product_ids))
+            cursor.execute(
+                f"""
+                SELECT productId, endTime FROM Product
+                WHERE productId IN ({placeholders}) AND status = 'upcoming' AND startTime <= NOW()
+                ORDER BY productId
+                FOR UPDATE
+                """,
+                tuple(product_ids)
+            )
+            starting = cursor.fetchall()
+            if not starting:
+                connection.rollback()
+                return []
+
+            ids = [product['productId'] for product in starting]
+            placeholders = ', '.join(['%s'] * len(ids))
+            cursor.execute(f"UPDATE Product SET status = 'live' WHERE productId IN ({placeholders})", tuple(ids))
+            connection.commit()
+        finally:
+            if cursor:
+                cursor.close()
+            if connection:
+                connection.close()
+
+        with self._cond:
+            for product in starting:
+                self._push(product['endTime'], product['productId'], CLOSE)
+            self._cond.notify()
+        self._stats['started'] += len(ids)
+        return ids
+
+    # Close a batch of auctions in one transaction: mark them sold, flag each
+    # one's highest bid (earliest on ties) as the winner and create the
+    # winner's Order. Auctions without bids are closed without an order.
+    def _close_auctions(self, product_ids):
+        connection, cursor = None, None
+        try:
+            connection = create_connection()
+            cursor = connection.cursor(dictionary=True)
+            placeholders = ', '.join(['%s'] * len(product_ids))
+            cursor.execute(
+                f"""
+                SELECT productId FROM Product
+                WHERE productId IN ({placeholders}) AND status = 'live' AND endTime <= NOW()
+                ORDER BY productId
+                FOR UPDATE
+                """,
+                tuple(product_ids)
+            )
+            closing = [row['productId'] for row in cursor.fetchall()]
+            if not closing:
+                connection.rollback()
+                return []
+
+            placeholders = ', '.join(['%s'] * len(closing))
+            cursor.execute(
+                f"""
+                SELECT bidId, productId, userId, bidAmount FROM (
+                    SELECT bidId, productId, userId, bidAmount,
+                           ROW_NUMBER() OVER (PARTITION BY productId ORDER BY bidAmount DESC, bidId ASC) AS position
+                    FROM Bid
+                    WHERE productId IN ({placeholders})
+                ) ranked
+                WHERE position = 1
+                """,
+                tuple(closing)
+            )
+            winners = cursor.fetchall()
+
+            cursor.execute(
+                f"UPDATE Bid SET isWinningBid = FALSE WHERE productId IN ({placeholders}) AND isWinningBid = TRUE",
+                tuple(closing)
+            )
+            if winners:
+                winner_placeholders = ', '.join(['%s'] * len(winners))
+                cursor.execute(
+                    f"UPDATE Bid SET isWinningBid = TRUE WHERE bidId IN ({winner_placeholders})",
+                    tuple(winner['bidId'] for winner in winners)
+                )
+                cursor.executemany(
+                    """
+                    INSERT INTO `Order` (orderDate, orderStatus, paymentStatus, paymentMethod, totalAmount, userId, productId)
+                    VALUES (NOW(), 'pending', 'unpaid', %s, %s, %s, %s)
+                    """,
+                    [
+                        (ORDER_PAYMENT_METHOD, winner['bidAmount'], winner['userId'], winner['productId'])
+                        for winner in winners
+                    ]
+                )
+
+            cursor.execute(f"UPDATE Product SET status = 'sold' WHERE productId IN ({placeholders})", tuple(closing))
+            connection.commit()
+        finally:
+            if cursor:
+                cursor.close()
+            if connection:
+                connection.close()
+
+        self._stats['closed'] += len(closing)
+        self._stats['orders'] += len(winners)
+        return closing
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='auction-scheduler', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        next_reload = 0
+        backoff = 0
+        while True:
+            try:
+                if time.monotonic() >= next_reload:
+                    self.load()
+                    next_reload = time.monotonic() + RELOAD_INTERVAL
+                self.run_due()
+                backoff = 0
+            except Exception as e:
+                # Back off instead of spinning while the database is
+                # unavailable: 5s, doubling up to a minute, then a full reload
+                backoff = min(backoff * 2 or 5, 60)
+                print(f"Scheduler pass failed, retrying in {backoff}s: {e}")
+                next_reload = time.monotonic() + backoff
+
+            with self._cond:
+                wait = next_reload - time.monotonic()
+                if self._heap and not backoff:
+                    wait = min(wait, (self._heap[0][0] - self._now()).total_seconds())
+                self._cond.wait(max(wait, 0.05))
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats['pending'] = len(self._heap)
+            stats['next_due'] = self._heap[0][0].isoformat() if self._heap else None
+        return stats
+
+
+auction_scheduler = AuctionScheduler()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Fire due auction status transitions')
+    parser.add_argument('--once', action='store_true', help='fire what is due now and exit (for cron)')
+    args = parser.parse_args()
+
+    pending = auction_scheduler.load()
+    print(f"Loaded {pending} upcoming/live auctions")
+    if args.once:
+        print(f"Changed {auction_scheduler.run_due()} auctions")
+    else:
+        auction_scheduler.start()
+        auction_scheduler._thread.join()
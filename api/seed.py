@@ -0,0 +1,381 @@
+import os
+import random
+import tempfile
+import time
+from array import array
+from datetime import datetime, timedelta
+from itertools import accumulate
+import mysql.connector
+from models import get_pool, create_tables, migrate_schema
+from passwords import hash_password
+
+# Deterministic bulk data for scaling work. The same seed, sizes and --now
+# always produce the same rows: users, categories, products with images and
+# denormalized bid aggregates, bid histories, and orders/shipments for won
+# auctions. Every user shares one (salted) hash of SEED_PASSWORD. Popularity is Zipf-skewed: with --skew 1.2 a handful of hot
+# auctions take a large share of all bids, and --bidder-skew does the same
+# for power bidders. Rows get explicit ids after the tables' current maximum,
+# so references never need a read back.
+#
+# Two loaders:
+#   insert    - multi-row INSERTs of --batch-size rows over one connection
+#   load-data - tab separated files per table, then LOAD DATA LOCAL INFILE;
+#               several times faster (needs local_infile=ON on the server).
+#               --files-only just writes the files, e.g. for a server-side
+#               LOAD DATA INFILE.
+
+SEED_PASSWORD = os.getenv('SEED_PASSWORD', 'seed-password')
+
+# Rows per multi-row INSERT for the insert loader
+DEFAULT_BATCH_SIZE = int(os.getenv('SEED_BATCH_SIZE', 5000))
+
+COLUMNS = {
+    'User': ('userId', 'username', 'phone', 'email', 'passwdHash', 'firstName', 'lastName',
+             'houseFlatNo', 'street', 'city', 'pincode', 'dateJoined', 'isVerified'),
+    'Category': ('categoryId', 'categoryName'),
+    'Product': ('productId', 'title', 'description', '`condition`', 'initialBid', 'currentBidPrice', 'status',
+                'startTime', 'endTime', 'userId', 'bidCount', 'highestBid', 'lastBidAt'),
+    'Product_img': ('productId', 'imageURL'),
+    'Cat_Prod': ('categoryId', 'productId'),
+    'Bid': ('bidId', 'bidAmount', 'bidTime', 'isWinningBid', 'userId', 'productId'),
+    '`Order`': ('orderId', 'orderDate', 'orderStatus', 'paymentTime', 'paymentStatus', 'paymentMethod',
+                'totalAmount', 'transactionId', 'userId', 'productId'),
+    'Shipment': ('shippingId', 'shippingMethod', 'trackingNumber', 'carrierName', 'shippingStatus', 'shippingCost',
+                 'estimatedDeliveryDate', 'houseFlatNo', 'street', 'city', 'pincode', 'orderId'),
+}
+
+# Parents before children, for loaders that keep foreign key checks on
+LOAD_ORDER = ('User', 'Category', 'Product', 'Product_img', 'Cat_Prod', 'Bid', '`Order`', 'Shipment')
+
+ID_COLUMNS = {'User': 'userId', 'Category': 'categoryId', 'Product': 'productId', 'Bid': 'bidId',
+              '`Order`': 'orderId', 'Shipment': 'shippingId'}
+
+# Truncated children first
+TRUNCATE_ORDER = tuple(reversed(LOAD_ORDER))
+
+CONDITIONS = ('new', 'used', 'refurbished')
+CITIES = ('Bengaluru', 'Mumbai', 'Delhi', 'Chennai', 'Kolkata', 'Hyderabad', 'Pune', 'Kochi', 'Jaipur', 'Lucknow')
+FIRST_NAMES = ('Aarav', 'Diya', 'Ishaan', 'Meera', 'Kabir', 'Ananya', 'Rohan', 'Saanvi', 'Vihaan', 'Zara')
+LAST_NAMES = ('Sharma', 'Nair', 'Iyer', 'Reddy', 'Das', 'Khan', 'Patel', 'Menon', 'Singh', 'Gupta')
+NOUNS = ('watch', 'camera', 'guitar', 'lamp', 'bicycle', 'painting', 'phone', 'vase', 'chair', 'record player',
+         'laptop', 'coin', 'sneakers', 'jacket', 'clock', 'telescope', 'keyboard', 'drone', 'book', 'ring')
+ADJECTIVES = ('vintage', 'rare', 'signed', 'limited', 'classic', 'antique', 'modern', 'handmade', 'boxed', 'mint')
+WORDS = ('great', 'condition', 'original', 'box', 'works', 'perfectly', 'minor', 'scratches', 'collector',
+         'item', 'shipped', 'carefully', 'tested', 'authentic', 'receipt', 'included', 'rarely', 'used')
+PAYMENT_METHODS = ('credit_card', 'debit_card', 'paypal', 'bank_transfer')
+
+def zipf_cum_weights(n, skew):
+    return list(accumulate(1.0 / (rank ** skew) for rank in range(1, n + 1)))
+
+def _money(cents):
+    return f'{cents // 100}.{cents % 100:02d}'
+
+def _time(value):
+    return value.strftime('%Y-%m-%d %H:%M:%S')
+
+_TSV_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n'})
+
+def _tsv_field(value):
+    if value is None:
+        return '\\N'
+    if value is True or value is False:
+        return '1' if value else '0'
+    return str(value).translate(_TSV_ESCAPES)
+
+
+class InsertSink:
+    def __init__(self, connection, batch_size=DEFAULT_BATCH_SIZE):
+        self.connection = connection
+        self.cursor = connection.cursor()
+        self.batch_size = batch_size
+        self.rows = {table: 0 for table in COLUMNS}
+        self._buffers = {table: [] for table in COLUMNS}
+        self._queries = {
+            table: f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+            for table, columns in COLUMNS.items()
+        }
+
+    def add(self, table, row):
+        buffer = self._buffers[table]
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self._flush(table)
+
+    def _flush(self, table):
+        buffer = self._buffers[table]
+        if buffer:
+            self.cursor.executemany(self._queries[table], buffer)
+            self.connection.commit()
+            self.rows[table] += len(buffer)
+            buffer.clear()
+
+    def close(self):
+        for table in LOAD_ORDER:
+            self._flush(table)
+        self.cursor.close()
+
+
+class FileSink:
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.rows = {table: 0 for table in COLUMNS}
+        self.paths = {table: os.path.join(directory, f"{table.strip('`')}.tsv") for table in COLUMNS}
+        self._files = {table: open(path, 'w', encoding='utf-8', newline='\n') for table, path in self.paths.items()}
+
+    def add(self, table, row):
+        self._files[table].write('\t'.join(map(_tsv_field, row)) + '\n')
+        self.rows[table] += 1
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+
+    def load(self, connection):
+        cursor = connection.cursor()
+        try:
+            for table in LOAD_ORDER:
+                started = time.perf_counter()
+                cursor.execute(
+                    f"LOAD DATA LOCAL INFILE %s INTO TABLE {table} CHARACTER SET utf8mb4 "
+                    f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' "
+                    f"({', '.join(COLUMNS[table])})",
+                    (self.paths[table],)
+                )
+                connection.commit()
+                print(f"loaded {self.rows[table]} rows into {table} in {time.perf_counter() - started:.1f}s")
+        finally:
+            cursor.close()
+
+
+class Seeder:
+    def __init__(self, seed, users, categories, products, bids, images_per_product=3, skew=1.2, bidder_skew=1.0,
+                 now=None, start_ids=None):
+        self.rng = random.Random(seed)
+        self.users = users
+        self.categories = categories
+        self.products = products
+        self.bids = bids
+        self.images_per_product = images_per_product
+        self.skew = skew
+        self.bidder_skew = bidder_skew
+        self.now = now or datetime.now().replace(minute=0, second=0, microsecond=0)
+        self.start_ids = {table: 1 for table in ID_COLUMNS}
+        self.start_ids.update(start_ids or {})
+
+    def run(self, sink):
+        user_ids = self._users(sink)
+        category_ids = self._categories(sink)
+        self._products(sink, user_ids, category_ids)
+
+    def _users(self, sink):
+        rng, first = self.rng, self.start_ids['User']
+        password_hash = hash_password(SEED_PASSWORD)
+        for offset in range(self.users):
+            user_id = first + offset
+            first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            sink.add('User', (
+                user_id, f'user{user_id}', f'9{rng.randrange(10 ** 9):09d}', f'user{user_id}@seed.invalid',
+                password_hash, first_name, last_name, str(rng.randint(1, 999)), f'{rng.randint(1, 99)} Main Road',
+                rng.choice(CITIES), str(rng.randint(110001, 855999)),
+                _time(self.now - timedelta(seconds=rng.randrange(3 * 365 * 86400))), rng.random() < 0.8
+            ))
+        return range(first, first + self.users)
+
+    def _categories(self, sink):
+        first = self.start_ids['Category']
+        for offset in range(self.categories):
+            sink.add('Category', (first + offset, f'{ADJECTIVES[offset % len(ADJECTIVES)].title()} '
+                                                  f'{NOUNS[offset % len(NOUNS)]}s {offset // len(NOUNS) + 1}'))
+        return range(first, first + self.categories)
+
+    # Spread `self.bids` over the products with Zipf weights on a random
+    # permutation, so hot auctions are scattered across ids. Upcoming
+    # auctions take no bids.
+    def _bid_counts(self, statuses):
+        rng = self.rng
+        biddable = [index for index, status in enumerate(statuses) if status != 'upcoming']
+        rng.shuffle(biddable)
+        counts = array('L', [0]) * len(statuses)
+        if not biddable:
+            return counts
+        cum_weights = zipf_cum_weights(len(biddable), self.skew)
+        remaining = self.bids
+        while remaining:
+            chunk = min(remaining, 1_000_000)
+            for pick in rng.choices(biddable, cum_weights=cum_weights, k=chunk):
+                counts[pick] += 1
+            remaining -= chunk
+        return counts
+
+    def _products(self, sink, user_ids, category_ids):
+        rng, now = self.rng, self.now
+        first_product = self.start_ids['Product']
+        next_bid, next_order, next_shipment = self.start_ids['Bid'], self.start_ids['`Order`'], self.start_ids['Shipment']
+
+        # Most listings are finished auctions; a quarter are live
+        statuses = rng.choices(('sold', 'live', 'upcoming'), weights=(60, 25, 15), k=self.products)
+        bid_counts = self._bid_counts(statuses)
+        category_weights = zipf_cum_weights(len(category_ids), 1.0)
+        bidder_weights = zipf_cum_weights(len(user_ids), self.bidder_skew)
+        # Power bidders are not simply the oldest accounts
+        bidders = list(user_ids)
+        rng.shuffle(bidders)
+
+        for index, status in enumerate(statuses):
+            product_id = first_product + index
+            seller = rng.choice(user_ids)
+            if status == 'sold':
+                end = now - timedelta(seconds=rng.randrange(60, 365 * 86400))
+                start = end - timedelta(days=rng.randint(1, 14))
+            elif status == 'live':
+                start = now - timedelta(seconds=rng.randrange(60, 7 * 86400))
+                end = now + timedelta(seconds=rng.randrange(3600, 14 * 86400))
+            else:
+                start = now + timedelta(seconds=rng.randrange(3600, 14 * 86400))
+                end = start + timedelta(days=rng.randint(1, 14))
+
+            # Bid histories: increasing amounts at increasing times inside the auction
+            initial_cents = int(rng.lognormvariate(8.5, 1.2)) + 100
+            cents, count = initial_cents, bid_counts[index]
+            window = (min(end, now) - start).total_seconds()
+            offsets = sorted(rng.random() * window for _ in range(count))
+            picks = rng.choices(bidders, cum_weights=bidder_weights, k=count) if count else ()
+            bid_time = bidder = None
+            for n, (offset, bidder) in enumerate(zip(offsets, picks)):
+                if bidder == seller:
+                    bidder = user_ids[(bidder - user_ids[0] + 1) % len(user_ids)]
+                # Up to 1% over the minimum increment, capped so the hottest
+                # auctions stay inside DECIMAL(10, 2)
+                cents += 100 + rng.randrange(min(cents // 100, 400) + 1)
+                bid_time = _time(start + timedelta(seconds=offset))
+                winner = n == count - 1
+                sink.add('Bid', (next_bid, _money(cents), bid_time, winner, bidder, product_id))
+                next_bid += 1
+
+            highest = _money(cents) if count else None
+            sink.add('Product', (
+                product_id, f'{rng.choice(ADJECTIVES).title()} {rng.choice(NOUNS)} #{product_id}',
+                ' '.join(rng.choices(WORDS, k=rng.randint(8, 120))).capitalize() + '.', rng.choice(CONDITIONS),
+                _money(initial_cents), highest, status, _time(start), _time(end), seller, count, highest, bid_time
+            ))
+            for category_id in set(rng.choices(category_ids, cum_weights=category_weights, k=rng.randint(1, 2))):
+                sink.add('Cat_Prod', (category_id, product_id))
+            for n in range(rng.randint(1, 2 * self.images_per_product - 1)):
+                sink.add('Product_img', (product_id, f'https://img.seed.invalid/{product_id}/{n}.jpg'))
+
+            # Most won auctions turn into an order, most orders get shipped
+            if status == 'sold' and count and rng.random() < 0.8:
+                order_time = end + timedelta(minutes=rng.randint(1, 2880))
+                delivered = order_time < now - timedelta(days=7)
+                sink.add('`Order`', (
+                    next_order, _time(order_time), 'delivered' if delivered else 'confirmed', _time(order_time),
+                    'paid', rng.choice(PAYMENT_METHODS), _money(cents), f'txn-{next_order:012d}', bidder, product_id
+                ))
+                if rng.random() < 0.9:
+                    sink.add('Shipment', (
+                        next_shipment, rng.choice(('standard', 'express')), f'TRK{next_shipment:010d}',
+                        rng.choice(('BlueDart', 'Delhivery', 'DTDC', 'India Post')),
+                        'delivered' if delivered else 'in_transit', _money(rng.randint(0, 50000)),
+                        (order_time + timedelta(days=rng.randint(2, 7))).date().isoformat(),
+                        str(rng.randint(1, 999)), f'{rng.randint(1, 99)} Main Road', rng.choice(CITIES),
+                        str(rng.randint(110001, 855999)), next_order
+                    ))
+                    next_shipment += 1
+                next_order += 1
+
+
+# First free id per table, so seeding into a non-empty database never collides
+def next_ids(cursor):
+    ids = {}
+    for table, column in ID_COLUMNS.items():
+        cursor.execute(f'SELECT COALESCE(MAX({column}), 0) + 1 FROM {table}')
+        ids[table] = cursor.fetchone()[0]
+    return ids
+
+def truncate(cursor):
+    cursor.execute('SET FOREIGN_KEY_CHECKS = 0')
+    try:
+        for table in TRUNCATE_ORDER:
+            cursor.execute(f'TRUNCATE TABLE {table}')
+    finally:
+        cursor.execute('SET FOREIGN_KEY_CHECKS = 1')
+
+# A dedicated connection: bulk-load session settings should not leak back
+# into the pool
+def bulk_connection(local_infile=False):
+    connection = mysql.connector.connect(**get_pool().connect_args, allow_local_infile=local_infile, autocommit=False)
+    cursor = connection.cursor()
+    # Ids are generated consistently, so per-row FK and uniqueness checks are
+    # pure overhead during the load
+    cursor.execute('SET SESSION foreign_key_checks = 0, unique_checks = 0')
+    cursor.close()
+    return connection
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Generate deterministic bulk data for the auction schema')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--categories', type=int, default=200)
+    parser.add_argument('--products', type=int, default=300_000)
+    parser.add_argument('--bids', type=int, default=10_000_000)
+    parser.add_argument('--images-per-product', type=int, default=3, help='mean images per product')
+    parser.add_argument('--skew', type=float, default=1.2, help='Zipf exponent of bids per auction; 0 is uniform')
+    parser.add_argument('--bidder-skew', type=float, default=1.0, help='Zipf exponent of bids per user')
+    parser.add_argument('--now', type=datetime.fromisoformat,
+                        help='reference time for auction windows; pass the same value to reproduce a run exactly')
+    parser.add_argument('--method', choices=['insert', 'load-data'], default='load-data')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='rows per INSERT for --method insert')
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'probidder-seed'),
+                        help='where --method load-data writes its files')
+    parser.add_argument('--files-only', action='store_true', help='write the load-data files and stop')
+    parser.add_argument('--truncate', action='store_true', help='empty every table first')
+    args = parser.parse_args()
+    if args.files_only and args.method == 'insert':
+        parser.error('--files-only only applies to --method load-data')
+    if args.files_only and args.truncate:
+        parser.error('--truncate needs a database; it cannot be combined with --files-only')
+
+    started = time.perf_counter()
+    start_ids = None
+    if not args.files_only:
+        create_tables()
+        migrate_schema()
+        connection = bulk_connection(local_infile=args.method == 'load-data')
+        cursor = connection.cursor()
+        if args.truncate:
+            truncate(cursor)
+        start_ids = next_ids(cursor)
+        cursor.close()
+
+    seeder = Seeder(args.seed, args.users, args.categories, args.products, args.bids,
+                    images_per_product=args.images_per_product, skew=args.skew, bidder_skew=args.bidder_skew,
+                    now=args.now, start_ids=start_ids)
+    print(f"seed {args.seed}, reference time {seeder.now.isoformat(' ')}, ids from {seeder.start_ids}")
+
+    if args.method == 'insert':
+        sink = InsertSink(connection, args.batch_size)
+        seeder.run(sink)
+        sink.close()
+    else:
+        sink = FileSink(args.data_dir)
+        seeder.run(sink)
+        sink.close()
+        print(f"wrote {args.data_dir} in {time.perf_counter() - started:.1f}s")
+        if not args.files_only:
+            sink.load(connection)
+
+    if not args.files_only:
+        cursor = connection.cursor()
+        # Fresh index statistics, so plans reflect the new volumes
+        cursor.execute(f"ANALYZE TABLE {', '.join(LOAD_ORDER)}")
+        cursor.fetchall()
+        cursor.close()
+        connection.close()
+
+    for table in LOAD_ORDER:
+        print(f"{table:<12} {sink.rows[table]:>12,} rows")
+    print(f"done in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,44 @@
+from operator import itemgetter
+
+# Row serializers shared by the routes, the streaming endpoints and the
+# homepage snapshot. Each one is built once from a field list and picks those
+# columns off a cursor row with a single itemgetter call; Decimal and datetime
+# values pass through untouched and are converted by the encoder
+# (encoding.dumps).
+
+def row_serializer(*fields):
+    getter = itemgetter(*fields)
+    if len(fields) == 1:
+        def serialize(row):
+            return {fields[0]: getter(row)}
+    else:
+        def serialize(row):
+            return dict(zip(fields, getter(row)))
+    serialize.fields = fields
+    return serialize
+
+PRODUCT_FIELDS = ('productId', 'title', 'description', 'condition', 'initialBid', 'currentBidPrice',
+                  'status', 'startTime', 'endTime')
+BID_FIELDS = ('bidId', 'bidAmount', 'bidTime', 'isWinningBid', 'userId', 'productId')
+ORDER_FIELDS = ('orderId', 'orderDate', 'orderStatus', 'paymentTime', 'paymentStatus', 'paymentMethod',
+                'totalAmount', 'transactionId', 'userId', 'productId')
+SHIPMENT_FIELDS = ('shippingId', 'shippingMethod', 'trackingNumber', 'carrierName', 'shippingStatus',
+                   'shippingCost', 'estimatedDeliveryDate', 'houseFlatNo', 'street', 'city', 'pincode', 'orderId')
+
+# Products are serialized after hydrate_images() has attached 'images'
+serialize_product = row_serializer(*PRODUCT_FIELDS, 'images')
+
+# Homepage and trending listings
+serialize_trending_product = row_serializer('productId', 'title', 'description', 'bid_count', 'currentBidPrice',
+                                            'condition', 'status', 'startTime', 'endTime', 'images')
+serialize_high_bid_product = row_serializer('productId', 'title', 'description', 'highest_bid', 'currentBidPrice',
+                                            'condition', 'status', 'startTime', 'endTime', 'images')
+serialize_live_product = row_serializer('productId', 'title', 'description', 'currentBidPrice',
+                                        'condition', 'status', 'startTime', 'endTime', 'images')
+
+serialize_bid = row_serializer(*BID_FIELDS)
+serialize_product_bid = row_serializer('bidId', 'bidAmount', 'bidTime', 'isWinningBid', 'userId')
+serialize_user_bid = row_serializer('bidId', 'bidAmount', 'bidTime', 'isWinningBid', 'productId')
+
+serialize_order = row_serializer(*ORDER_FIELDS)
+serialize_shipment = row_serializer(*SHIPMENT_FIELDS)
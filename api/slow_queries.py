@@ -0,0 +1,355 @@
+import hashlib
+import json
+import logging
+import os
+import queue
+import re
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from logging.handlers import RotatingFileHandler
+from flask import request, has_request_context, Response
+from flask_restful import Resource
+from encoding import dumps
+
+# Slow-query log. A query listener on the connection pool picks out
+# statements slower than THRESHOLD and writes one JSON line per statement to
+# a rotating log: normalized SQL, the shape (never the values) of its
+# parameters, rows fetched and examined, and the Resource.method that ran it.
+# The first time a normalized statement turns up slow its EXPLAIN plan is
+# captured and logged with it. Aggregates per statement are served at
+# /debug/slow-queries, worst first.
+#
+# The listener runs on the request thread, often inside the statement's
+# transaction (e.g. with a product row locked for a bid), so it only takes
+# the caller and, for plain reads, rows examined. EXPLAIN and the log write
+# happen on a background thread with a pooled connection of its own.
+
+# Seconds; statements at or above this are logged. A negative value disables
+# the log.
+THRESHOLD = float(os.getenv('SLOW_QUERY_THRESHOLD', 0.2))
+
+LOG_PATH = os.getenv('SLOW_QUERY_LOG', os.path.join(tempfile.gettempdir(), 'probidder-slow-queries.log'))
+LOG_MAX_BYTES = int(os.getenv('SLOW_QUERY_LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_BACKUPS = int(os.getenv('SLOW_QUERY_LOG_BACKUPS', 5))
+
+# Distinct normalized statements kept in the summary
+MAX_STATEMENTS = 500
+
+# Errors that mean rows examined can never be read on this server: no grant
+# on performance_schema, the table is absent, or PS_CURRENT_THREAD_ID() is
+# (before 8.0.16). Anything else, e.g. a lost connection, skips one read.
+ER_TABLEACCESS_DENIED_ERROR = 1142
+ER_NO_SUCH_TABLE = 1146
+ER_SP_DOES_NOT_EXIST = 1305
+ROWS_EXAMINED_UNAVAILABLE = (ER_TABLEACCESS_DENIED_ERROR, ER_NO_SUCH_TABLE, ER_SP_DOES_NOT_EXIST)
+
+EXPLAINABLE = ('SELECT', 'WITH', 'UPDATE', 'DELETE', 'INSERT', 'REPLACE')
+
+# Slow statements waiting for EXPLAIN and the log write; more are dropped
+QUEUE_SIZE = 1000
+
+_LOCKING = re.compile(r'\bFOR\s+(?:UPDATE|SHARE)\b|\bLOCK\s+IN\s+SHARE\s+MODE\b', re.IGNORECASE)
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER = re.compile(r'(?<![\w`])-?\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%\(\w+\)s|%s')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_VALUES_LIST = re.compile(r'(\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+')
+_SPACE = re.compile(r'\s+')
+
+def normalize(statement):
+    if isinstance(statement, (bytes, bytearray)):
+        statement = statement.decode('utf-8', 'replace')
+    sql = _SPACE.sub(' ', statement).strip()
+    sql = _STRING.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('(...)', sql)
+    return _VALUES_LIST.sub(r'\1', sql)
+
+# Writes and locking reads keep row locks until their transaction ends
+def _holds_locks(statement):
+    return not statement.lstrip().upper().startswith(('SELECT', 'WITH')) or _LOCKING.search(statement) is not None
+
+def digest(normalized):
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:16]
+
+def _type_name(value):
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, int):
+        return 'int'
+    if isinstance(value, (float, Decimal)):
+        return 'number'
+    if isinstance(value, (datetime, date)):
+        return 'datetime'
+    if isinstance(value, (bytes, bytearray)):
+        return 'bytes'
+    if isinstance(value, str):
+        return 'str'
+    return type(value).__name__
+
+# Parameter types only, so the log never holds user data
+def param_shape(params, many=False):
+    if many:
+        params = list(params or [])
+        return {'rows': len(params), 'row': param_shape(params[0]) if params else None}
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: _type_name(value) for key, value in params.items()}
+    return [_type_name(value) for value in params]
+
+_INTERNAL_MODULES = {__name__, 'pool', 'metrics', 'streaming', 'contextlib', 'threading'}
+
+# Resource.method of the route that ran the statement, else the first
+# module.function outside the DB layer, else the request's endpoint
+def caller():
+    frame = sys._getframe(2)
+    fallback = None
+    while frame is not None:
+        candidate = frame.f_locals.get('self')
+        if isinstance(candidate, Resource):
+            return f'{type(candidate).__name__}.{frame.f_code.co_name}'
+        module = frame.f_globals.get('__name__', '')
+        if fallback is None and module not in _INTERNAL_MODULES and not module.startswith(('flask', 'werkzeug', 'mysql')):
+            fallback = f'{module}.{frame.f_code.co_name}'
+        frame = frame.f_back
+    if fallback is None and has_request_context():
+        return request.endpoint
+    return fallback
+
+
+class SlowQueryLog:
+    def __init__(self, threshold=THRESHOLD, path=LOG_PATH, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS):
+        self.threshold = threshold
+        self.path = path
+        self._lock = threading.Lock()
+        self._statements = {}
+        self._logger = None
+        self._log_args = (max_bytes, backups)
+        # Cleared the first time performance_schema turns out to be off or
+        # not readable, so the lookup is not retried for every statement
+        self._rows_examined = True
+        self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._worker = None
+        self.dropped = 0
+        # Set by install(); EXPLAIN borrows its connections from here
+        self.pool = None
+
+    def _get_logger(self):
+        if self._logger is None:
+            logger = logging.getLogger('probidder.slow_queries')
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            max_bytes, backups = self._log_args
+            try:
+                handler = RotatingFileHandler(self.path, maxBytes=max_bytes, backupCount=backups)
+            except OSError as e:
+                print(f"Slow-query log unavailable, writing to stderr: {e}")
+                handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+            self._logger = logger
+        return self._logger
+
+    # Pool query listener
+    def record(self, event):
+        if self.threshold < 0 or event.seconds < self.threshold or self._is_worker():
+            return
+
+        # rows examined has to be read on the statement's own session before
+        # anything else runs on it. A slow write or locking read (a bid's
+        # SELECT ... FOR UPDATE) still holds its row locks here, so those
+        # are not held up for it.
+        statement = event.statement
+        if isinstance(statement, (bytes, bytearray)):
+            statement = statement.decode('utf-8', 'replace')
+        examined = None
+        if event.connection is not None and not _holds_locks(statement):
+            examined = self._read_rows_examined(event.connection)
+
+        job = {
+            'statement': event.statement,
+            'params': event.params,
+            'many': event.many,
+            'seconds': event.seconds,
+            'rows': event.rows,
+            'error': str(event.error) if event.error is not None else None,
+            'examined': examined,
+            'caller': caller(),
+            'route': request.url_rule.rule if has_request_context() and request.url_rule else None,
+            'ts': datetime.now(timezone.utc).isoformat(),
+        }
+        self._start_worker()
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            self.dropped += 1
+
+    def _is_worker(self):
+        return self._worker is not None and threading.get_ident() == self._worker.ident
+
+    def _start_worker(self):
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name='slow-query-log', daemon=True)
+                    self._worker.start()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            try:
+                self._process(job)
+            except Exception as e:
+                print(f"Slow-query log failed: {e}")
+
+    def _process(self, job):
+        normalized = normalize(job['statement'])
+        key = digest(normalized)
+        with self._lock:
+            entry = self._statements.get(key)
+            first = entry is None
+            if first:
+                if len(self._statements) >= MAX_STATEMENTS:
+                    return
+                entry = self._statements[key] = {
+                    'digest': key,
+                    'statement': normalized,
+                    'count': 0,
+                    'totalSeconds': 0.0,
+                    'maxSeconds': 0.0,
+                    'rows': 0,
+                    'rowsExamined': 0,
+                    'errors': 0,
+                    'callers': {},
+                    'plan': None,
+                }
+
+        plan = self._explain(job) if first else None
+
+        with self._lock:
+            entry['count'] += 1
+            entry['totalSeconds'] += job['seconds']
+            entry['maxSeconds'] = max(entry['maxSeconds'], job['seconds'])
+            entry['rows'] += job['rows']
+            entry['rowsExamined'] += job['examined'] or 0
+            entry['errors'] += job['error'] is not None
+            entry['callers'][job['caller']] = entry['callers'].get(job['caller'], 0) + 1
+            entry['lastSeen'] = time.time()
+            if plan is not None:
+                entry['plan'] = plan
+
+        record = {
+            'ts': job['ts'],
+            'digest': key,
+            'seconds': round(job['seconds'], 6),
+            'statement': normalized,
+            'params': param_shape(job['params'], job['many']),
+            'rows': job['rows'],
+            'rowsExamined': job['examined'],
+            'caller': job['caller'],
+            'route': job['route'],
+            'error': job['error'],
+        }
+        if plan is not None:
+            record['plan'] = plan
+        self._get_logger().info(dumps(record).decode('utf-8'))
+
+    def _read_rows_examined(self, connection):
+        if not self._rows_examined or connection is None:
+            return None
+        cursor = None
+        try:
+            cursor = connection.cursor()
+            cursor.execute(
+                """
+                SELECT ROWS_EXAMINED FROM performance_schema.events_statements_history
+                WHERE THREAD_ID = PS_CURRENT_THREAD_ID()
+                ORDER BY EVENT_ID DESC LIMIT 1
+                """
+            )
+            row = cursor.fetchone()
+            return int(row[0]) if row else None
+        except Exception as e:
+            if getattr(e, 'errno', None) in ROWS_EXAMINED_UNAVAILABLE:
+                print(f"Slow-query log cannot read rows examined, disabling: {e}")
+                self._rows_examined = False
+            return None
+        finally:
+            self._close(cursor)
+
+    # EXPLAIN on a pooled connection of the worker's own. Locking reads are
+    # explained without their FOR UPDATE / FOR SHARE clause.
+    def _explain(self, job):
+        statement = job['statement']
+        if isinstance(statement, (bytes, bytearray)):
+            statement = statement.decode('utf-8', 'replace')
+        if job['many'] or self.pool is None or not statement.lstrip().upper().startswith(EXPLAINABLE):
+            return None
+        statement = _LOCKING.sub('', statement)
+        connection, cursor = None, None
+        try:
+            connection = self.pool.get_connection()
+            cursor = connection.cursor()
+            if job['params'] is not None:
+                cursor.execute(f'EXPLAIN FORMAT=JSON {statement}', job['params'])
+            else:
+                cursor.execute(f'EXPLAIN FORMAT=JSON {statement}')
+            row = cursor.fetchone()
+            return json.loads(row[0]) if row else None
+        except Exception as e:
+            return {'error': str(e)}
+        finally:
+            self._close(cursor)
+            if connection is not None:
+                connection.close()
+
+    def _close(self, cursor):
+        if cursor is not None:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+
+    # Aggregates per normalized statement, worst first by `sort`
+    def summary(self, sort='totalSeconds', limit=20):
+        with self._lock:
+            entries = [dict(entry, callers=dict(entry['callers'])) for entry in self._statements.values()]
+        for entry in entries:
+            entry['avgSeconds'] = entry['totalSeconds'] / entry['count'] if entry['count'] else 0.0
+        entries.sort(key=lambda entry: entry[sort], reverse=True)
+        return entries[:limit]
+
+
+slow_queries = SlowQueryLog()
+
+SUMMARY_SORTS = ('totalSeconds', 'maxSeconds', 'avgSeconds', 'count', 'rowsExamined')
+
+def summary_view():
+    sort = request.args.get('sort', 'totalSeconds')
+    if sort not in SUMMARY_SORTS:
+        return Response(dumps({'error': f"Invalid sort parameter. Allowed values are {', '.join(SUMMARY_SORTS)}"}),
+                        status=400, mimetype='application/json')
+    limit = max(1, request.args.get('limit', default=20, type=int))
+    body = {
+        'threshold': slow_queries.threshold,
+        'log': slow_queries.path,
+        'dropped': slow_queries.dropped,
+        'statements': slow_queries.summary(sort, limit),
+    }
+    return Response(dumps(body), mimetype='application/json')
+
+def install(blueprint, pool):
+    if slow_queries.threshold < 0:
+        return
+    slow_queries.pool = pool
+    pool.listen(slow_queries.record)
+    blueprint.add_url_rule('/debug/slow-queries', 'slow_queries', summary_view)
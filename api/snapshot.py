@@ -0,0 +1,130 @@
+import threading
+import time
+from encoding import dumps
+from compress import compress, ENCODERS
+
+# A payload that is the same for every visitor, materialized as pre-encoded
+# JSON bytes. A background thread rebuilds it every `interval` seconds (or
+# sooner after notify()), and get() never hands out anything older than
+# `max_staleness` seconds: past that it rebuilds inline.
+class Snapshot:
+    def __init__(self, name, builder, interval=5, max_staleness=30, debounce=0.5):
+        self.name = name
+        self.builder = builder
+        self.interval = interval
+        self.max_staleness = max_staleness
+        self.debounce = debounce
+
+        self._body = None
+        # (body, {encoding: compressed body}) for the current version
+        self._compressed = (None, {})
+        self._built_at = 0.0
+        self._version = 0
+        self._build_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+        self._stats = {
+            'refreshes': 0,
+            'failures': 0,
+            'inline_refreshes': 0,
+            'eager_requests': 0,
+            'last_duration': 0.0,
+            'max_duration': 0.0,
+            'total_duration': 0.0,
+        }
+
+    def encode(self, payload):
+        return dumps(payload)
+
+    def refresh(self):
+        # Single flight: concurrent callers wait for the build in progress
+        # instead of running the same queries again.
+        version = self._version
+        with self._build_lock:
+            if self._version != version:
+                return self._body
+
+            started = time.perf_counter()
+            try:
+                body = self.encode(self.builder())
+            except Exception:
+                self._stats['failures'] += 1
+                raise
+            duration = time.perf_counter() - started
+
+            # Compress for every encoding here, at the slow static levels,
+            # so requests after a rebuild never pay for it themselves
+            compressed = {}
+            for encoding in ENCODERS:
+                try:
+                    compressed[encoding] = compress(body, encoding, static=True)
+                except Exception as e:
+                    print(f"Snapshot {self.name} {encoding} compression failed: {e}")
+
+            self._compressed = (body, compressed)
+            self._body = body
+            self._built_at = time.monotonic()
+            self._version += 1
+
+            self._stats['refreshes'] += 1
+            self._stats['last_duration'] = duration
+            self._stats['total_duration'] += duration
+            self._stats['max_duration'] = max(self._stats['max_duration'], duration)
+            return body
+
+    # The current body compressed with `encoding` (None for identity), as
+    # compressed by refresh() for this version
+    def get_encoded(self, encoding):
+        self.get()
+        body, compressed = self._compressed
+        if encoding is None:
+            return body
+        encoded = compressed.get(encoding)
+        if encoded is None:
+            # Only if compressing failed during the refresh
+            encoded = compress(body, encoding)
+        return encoded
+
+    def age(self):
+        return time.monotonic() - self._built_at if self._body is not None else None
+
+    def get(self):
+        self.start()
+        age = self.age()
+        if age is None or age > self.max_staleness:
+            self._stats['inline_refreshes'] += 1
+            return self.refresh()
+        return self._body
+
+    # Ask for an early rebuild, e.g. after bids changed the rankings. Bursts
+    # of notifications within `debounce` seconds collapse into one rebuild.
+    def notify(self):
+        self._stats['eager_requests'] += 1
+        self._wake.set()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f'snapshot-{self.name}', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            if self._wake.wait(self.interval):
+                time.sleep(self.debounce)
+            self._wake.clear()
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Snapshot {self.name} refresh failed: {e}")
+
+    def stats(self):
+        stats = dict(self._stats)
+        stats['age'] = self.age()
+        stats['version'] = self._version
+        stats['bytes'] = len(self._body) if self._body is not None else 0
+        return stats
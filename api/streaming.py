@@ -0,0 +1,92 @@
+import os
+from flask import Response, request, stream_with_context
+from models import create_connection
+from encoding import dumps
+
+# Rows pulled from the server per round trip while streaming
+CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', 500))
+
+MIMETYPES = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Streaming is opt-in: ?stream=json (or stream=1) for a JSON array,
+# ?stream=ndjson or Accept: application/x-ndjson for one object per line.
+def stream_format():
+    fmt = request.args.get('stream')
+    if fmt == 'ndjson':
+        return 'ndjson'
+    if fmt in ('1', 'true', 'json'):
+        return 'json'
+    if 'application/x-ndjson' in request.headers.get('Accept', ''):
+        return 'ndjson'
+    return None
+
+def _encode(rows, serialize, fmt, first):
+    parts = []
+    for row in rows:
+        encoded = dumps(serialize(row))
+        if fmt == 'ndjson':
+            parts.append(encoded + b'\n')
+        elif first:
+            parts.append(encoded)
+            first = False
+        else:
+            parts.append(b',' + encoded)
+    return b''.join(parts)
+
+# Run `query` on an unbuffered cursor and stream the serialized rows out in
+# chunks, so memory stays flat however large the result is. The query is
+# executed before the response starts, so SQL errors still surface to the
+# caller as exceptions rather than as a truncated body.
+def stream_rows(query, params, serialize, fmt, chunk_size=CHUNK_SIZE):
+    connection = create_connection()
+    cursor = None
+    try:
+        cursor = connection.cursor(dictionary=True, buffered=False)
+        cursor.execute(query, params)
+    except Exception:
+        if cursor:
+            cursor.close()
+        if connection:
+            connection.invalidate()
+        raise
+
+    state = {'exhausted': False, 'released': False}
+
+    # Runs from the generator's finally or from the response's close(),
+    # whichever comes first: a response closed before its first chunk was
+    # pulled never runs the generator at all
+    def release():
+        if state['released']:
+            return
+        state['released'] = True
+        if state['exhausted']:
+            cursor.close()
+            connection.close()
+        else:
+            # The client went away mid-stream; the session still has
+            # unread rows, so drop it rather than drain it
+            connection.invalidate()
+
+    def generate():
+        try:
+            if fmt == 'json':
+                yield b'['
+            first = True
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield _encode(rows, serialize, fmt, first)
+                first = False
+            if fmt == 'json':
+                yield b']'
+            state['exhausted'] = True
+        finally:
+            release()
+
+    response = Response(stream_with_context(generate()), mimetype=MIMETYPES[fmt])
+    response.call_on_close(release)
+    return response
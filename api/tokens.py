@@ -0,0 +1,79 @@
+import os
+from functools import lru_cache
+from flask import current_app, request
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+
+# Signed, stateless session tokens. An access token carries the userId and
+# verification state and is checked with an HMAC, no database lookup; a
+# refresh token only carries the userId and is exchanged for a new pair at
+# /api/v2/token/refresh, which is the one place the User row is re-read.
+
+ACCESS_TOKEN_TTL = int(os.getenv('ACCESS_TOKEN_TTL', 15 * 60))
+REFRESH_TOKEN_TTL = int(os.getenv('REFRESH_TOKEN_TTL', 30 * 24 * 3600))
+
+class InvalidToken(Exception):
+    def __init__(self, message, status=401):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+    def to_response(self):
+        return {'error': self.message}, self.status, {'WWW-Authenticate': 'Bearer error="invalid_token"'}
+
+@lru_cache(maxsize=8)
+def _serializer(secret_keys, salt):
+    # itsdangerous signs with the last key and accepts any of them
+    return URLSafeTimedSerializer(list(secret_keys), salt=salt)
+
+def _secret_keys():
+    config = current_app.config
+    return tuple(config.get('SECRET_KEY_FALLBACKS') or ()) + (config['SECRET_KEY'],)
+
+def _dumps(salt, payload):
+    return _serializer(_secret_keys(), salt).dumps(payload)
+
+def _loads(salt, token, max_age):
+    try:
+        return _serializer(_secret_keys(), salt).loads(token, max_age=max_age)
+    except SignatureExpired:
+        raise InvalidToken('Token has expired')
+    except BadSignature:
+        raise InvalidToken('Invalid token')
+
+def issue_tokens(user_id, is_verified):
+    return {
+        'accessToken': _dumps('access', {'uid': user_id, 'vf': bool(is_verified)}),
+        'refreshToken': _dumps('refresh', {'uid': user_id}),
+        'tokenType': 'Bearer',
+        'expiresIn': ACCESS_TOKEN_TTL,
+    }
+
+# Claims of a refresh token: {'uid': ...}
+def verify_refresh_token(token):
+    return _loads('refresh', token, REFRESH_TOKEN_TTL)
+
+def bearer_token():
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not token:
+        return None
+    return token.strip()
+
+# Claims of the request's access token ({'uid': ..., 'vf': ...}), or None
+# when no bearer token was sent
+def authenticate():
+    token = bearer_token()
+    if token is None:
+        return None
+    return _loads('access', token, ACCESS_TOKEN_TTL)
+
+# The caller's userId: from the bearer token when one is sent, otherwise the
+# legacy ?userId= parameter. A token for a different user than ?userId=
+# names is refused.
+def request_user_id(type=str):
+    claims = authenticate()
+    query_id = request.args.get('userId', type=type)
+    if claims is None:
+        return query_id
+    if query_id is not None and str(query_id) != str(claims['uid']):
+        raise InvalidToken('Token does not match userId', 403)
+    return claims['uid']
@@ -0,0 +1,187 @@
+"""Concurrency stress test for the bid acceptance engine (api/bidding.py).
+
+Hammers a single live product with bids from many threads and then checks
+that no update was lost:
+
+  * every accepted bid is in the Bid table and nothing else is
+  * accepted amounts are strictly increasing by at least BID_MIN_INCREMENT
+  * Product.currentBidPrice / highestBid / bidCount match the accepted bids
+  * exactly one bid is flagged isWinningBid and it is the highest one
+
+Needs the same DB_* environment as the app:
+
+    python bench/bid_stress.py --threads 200 --bids-per-thread 10
+
+With --batch-size N each round submits N bids at once through place_bids(),
+the path behind /api/v2/bid/batch, for comparing throughput.
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def create_product(create_connection):
+    connection = create_connection()
+    cursor = connection.cursor()
+    try:
+        cursor.execute(
+            """
+            INSERT INTO Product (title, description, `condition`, initialBid, currentBidPrice, status, startTime, endTime)
+            VALUES ('bid stress test', NULL, 'new', 1.00, NULL, 'live', NOW() - INTERVAL 1 HOUR, NOW() + INTERVAL 1 HOUR)
+            """
+        )
+        connection.commit()
+        return cursor.lastrowid
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def delete_product(create_connection, product_id):
+    connection = create_connection()
+    cursor = connection.cursor()
+    try:
+        cursor.execute("DELETE FROM Bid WHERE productId = %s", (product_id,))
+        cursor.execute("DELETE FROM Product WHERE productId = %s", (product_id,))
+        connection.commit()
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=200)
+    parser.add_argument('--bids-per-thread', type=int, default=10)
+    parser.add_argument('--batch-size', type=int, default=1, help='bids per round, submitted through place_bids()')
+    parser.add_argument('--product-id', type=int, help='bid on an existing live product instead of a throwaway one')
+    parser.add_argument('--keep', action='store_true', help='keep the throwaway product and its bids')
+    args = parser.parse_args()
+
+    # One pooled connection per bidder so the lock, not the pool, is the bottleneck
+    os.environ.setdefault('DB_POOL_SIZE', str(args.threads))
+    os.environ.setdefault('DB_POOL_MAX_OVERFLOW', '0')
+
+    from models import create_connection
+    from bidding import place_bid, place_bids, BidRejected, MIN_INCREMENT
+
+    product_id = args.product_id or create_product(create_connection)
+
+    accepted, rejected, latencies = [], {}, []
+    lock = threading.Lock()
+    start_gate = threading.Barrier(args.threads)
+
+    def bidder(worker):
+        rng = random.Random(worker)
+        connection = create_connection()
+        cursor = connection.cursor()
+        try:
+            start_gate.wait()
+            for _ in range(args.bids_per_thread):
+                # Read the price without a lock, like a client would, and
+                # outbid it; many of these race and must be rejected cleanly
+                cursor.execute("SELECT COALESCE(currentBidPrice, initialBid) FROM Product WHERE productId = %s", (product_id,))
+                current = cursor.fetchone()[0]
+                connection.commit()
+                amount = current + MIN_INCREMENT * rng.randint(1, 3)
+
+                # Bidders are anonymous (userId NULL) to keep the test self-contained
+                started = time.perf_counter()
+                if args.batch_size > 1:
+                    batch = [
+                        {'bidAmount': amount + MIN_INCREMENT * i, 'userId': None, 'productId': product_id}
+                        for i in range(args.batch_size)
+                    ]
+                    try:
+                        outcomes = place_bids(connection, batch)
+                    except BidRejected as err:
+                        outcomes = [err.to_dict()] * len(batch)
+                else:
+                    try:
+                        outcomes = [place_bid(connection, None, product_id, amount)]
+                    except BidRejected as err:
+                        outcomes = [err.to_dict()]
+                elapsed = time.perf_counter() - started
+
+                with lock:
+                    latencies.append(elapsed)
+                    for outcome in outcomes:
+                        if outcome['accepted']:
+                            accepted.append(outcome)
+                        else:
+                            rejected[outcome['reason']] = rejected.get(outcome['reason'], 0) + 1
+        finally:
+            cursor.close()
+            connection.close()
+
+    threads = [threading.Thread(target=bidder, args=(i,)) for i in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - started
+
+    connection = create_connection()
+    cursor = connection.cursor(dictionary=True)
+    cursor.execute("SELECT currentBidPrice, highestBid, bidCount FROM Product WHERE productId = %s", (product_id,))
+    product = cursor.fetchone()
+    cursor.execute("SELECT bidId, bidAmount, isWinningBid FROM Bid WHERE productId = %s ORDER BY bidId", (product_id,))
+    bids = cursor.fetchall()
+    cursor.close()
+    connection.close()
+
+    total = len(latencies) * args.batch_size
+    print(f"product {product_id}: {total} bids in {duration:.2f}s ({total / duration:.0f} bids/s)")
+    print(f"accepted {len(accepted)}, rejected {rejected}")
+    print(f"request latency p50={percentile(latencies, 50) * 1000:.1f}ms p99={percentile(latencies, 99) * 1000:.1f}ms "
+          f"max={max(latencies) * 1000:.1f}ms")
+
+    failures = []
+    accepted_ids = sorted(result['bidId'] for result in accepted)
+    if not args.product_id and [bid['bidId'] for bid in bids] != accepted_ids:
+        failures.append('Bid table does not match the accepted bids')
+
+    amounts = [Decimal(str(result['bidAmount'])) for result in sorted(accepted, key=lambda r: r['bidId'])]
+    for previous, current in zip(amounts, amounts[1:]):
+        if current < previous + MIN_INCREMENT:
+            failures.append(f'bid {current} accepted after {previous} without the minimum increment')
+            break
+
+    if amounts:
+        if product['currentBidPrice'] != amounts[-1]:
+            failures.append(f"currentBidPrice {product['currentBidPrice']} != last accepted bid {amounts[-1]}")
+        if product['highestBid'] != max(amounts):
+            failures.append(f"highestBid {product['highestBid']} != highest accepted bid {max(amounts)}")
+    if product['bidCount'] != len(bids):
+        failures.append(f"bidCount {product['bidCount']} != {len(bids)} bids stored")
+
+    winners = [bid for bid in bids if bid['isWinningBid']]
+    if bids and (len(winners) != 1 or winners[0]['bidAmount'] != max(bid['bidAmount'] for bid in bids)):
+        failures.append(f'expected exactly one winning bid on the highest amount, found {len(winners)}')
+
+    if not args.product_id and not args.keep:
+        delete_product(create_connection, product_id)
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print('OK: no lost updates')
+
+
+if __name__ == '__main__':
+    main()
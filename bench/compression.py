@@ -0,0 +1,84 @@
+"""CPU cost versus bytes saved for the response encodings in api/compress.py.
+
+Compresses a JSON payload with every available encoding at a range of
+levels and prints the compressed size, ratio and compression time per
+response. By default the payload is a synthetic bid history encoded the way
+the API encodes it; pass --file with a captured response body to measure a
+real one:
+
+    python bench/compression.py --rows 500
+    curl -s 'localhost:3000/api/v2/shipment' > shipments.json
+    python bench/compression.py --file shipments.json
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from compress import ENCODERS, LEVELS, STATIC_LEVELS
+from encoding import dumps
+from serializers import serialize_bid
+
+LEVEL_RANGES = {
+    'gzip': [1, 3, 5, 6, 9],
+    'br': [1, 4, 6, 9, 11],
+    'zstd': [1, 3, 6, 12, 19],
+}
+
+
+def synthetic_payload(rows):
+    rng = random.Random(42)
+    started = datetime(2024, 1, 1)
+    bids = [
+        {
+            'bidId': bid_id,
+            'bidAmount': Decimal(rng.randint(100, 100000)) / 100,
+            'bidTime': started + timedelta(seconds=rng.randint(0, 86400 * 30)),
+            'isWinningBid': 0,
+            'userId': rng.randint(1, 5000),
+            'productId': rng.randint(1, 20000),
+        }
+        for bid_id in range(1, rows + 1)
+    ]
+    return dumps([serialize_bid(bid) for bid in bids])
+
+
+def measure(fn, data, level, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        compressed = fn(data, level)
+        best = min(best, time.perf_counter() - started)
+    return len(compressed), best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=500, help='rows in the synthetic payload')
+    parser.add_argument('--file', help='measure this response body instead')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, 'rb') as f:
+            data = f.read()
+    else:
+        data = synthetic_payload(args.rows)
+
+    print(f"payload {len(data)} bytes; encodings available: {', '.join(ENCODERS)}")
+    print(f"{'encoding':>8} {'level':>5} {'bytes':>10} {'ratio':>7} {'ms':>8} {'MB/s':>8}")
+    for name, (fn, _) in ENCODERS.items():
+        for level in LEVEL_RANGES[name]:
+            size, seconds = measure(fn, data, level, args.repeat)
+            marker = ' (dynamic)' if level == LEVELS[name] else ' (snapshot)' if level == STATIC_LEVELS[name] else ''
+            print(f"{name:>8} {level:>5} {size:>10} {size / len(data):>7.3f} {seconds * 1000:>8.2f} "
+                  f"{len(data) / seconds / 1e6:>8.1f}{marker}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,416 @@
+"""Latency, throughput and DB queries per request for the API routes.
+
+Seeds a small deterministic fixture (users, categories, products with images
+and bid histories, orders, shipments) into the database named by the usual
+DB_* environment, then drives each route registered in api/routes through
+the Flask test client of the real app (index.py, with every request hook in
+place) and reports per scenario:
+
+  * p50 / p95 / p99 / mean latency and requests per second
+  * SQL statements per request, counted by a connection pool listener
+  * responses with an unexpected status
+
+Point DB_NAME at a scratch database: fixture rows are tagged ('bench ...'
+titles, @bench.invalid emails) and deleted afterwards unless --keep is given.
+
+    python bench/endpoints.py --output results.json
+    python bench/endpoints.py --save-baseline bench/baseline.json
+    python bench/endpoints.py --baseline bench/baseline.json --threshold 0.25
+
+With --baseline the run fails (exit status 1) when a scenario's p95 grows by
+more than --threshold (and by at least --min-delta-ms), when it issues more
+SQL statements per request, or when it returns unexpected statuses the
+baseline did not. The SSE bid stream and bulk product import are not
+driven here; bench/bid_stress.py covers bid contention.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+BENCH_PASSWORD = 'bench-password'
+CONDITIONS = ('new', 'used', 'refurbished')
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+# Fixture
+
+def seed_fixture(create_connection, hash_password, rng, users, products, bids_per_product):
+    connection = create_connection()
+    cursor = connection.cursor()
+    now = datetime.now().replace(microsecond=0)
+    try:
+        password_hash = hash_password(BENCH_PASSWORD)
+        cursor.executemany(
+            """
+            INSERT INTO User (username, phone, email, passwdHash, firstName, lastName,
+                              houseFlatNo, street, city, pincode, dateJoined, isVerified)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """,
+            [(f'bench-user-{i}', f'90000{i:05d}', f'bench-{i}@bench.invalid', password_hash, 'Bench', f'User{i}',
+              str(i), 'Bench Street', 'Bench City', '560001', now - timedelta(days=i), True)
+             for i in range(users)]
+        )
+        cursor.execute("SELECT userId FROM User WHERE email LIKE 'bench-%@bench.invalid' ORDER BY userId")
+        user_ids = [row[0] for row in cursor.fetchall()]
+
+        cursor.executemany("INSERT INTO Category (categoryName) VALUES (%s)",
+                           [(f'bench category {i}',) for i in range(10)])
+        cursor.execute("SELECT categoryId FROM Category WHERE categoryName LIKE 'bench %' ORDER BY categoryId")
+        category_ids = [row[0] for row in cursor.fetchall()]
+
+        # Mostly live auctions, with a tail of upcoming and sold ones
+        rows = []
+        for i in range(products):
+            status = rng.choices(('live', 'upcoming', 'sold'), weights=(6, 2, 2))[0]
+            start = now + timedelta(hours=rng.randint(1, 72)) if status == 'upcoming' else now - timedelta(hours=rng.randint(1, 72))
+            end = now - timedelta(minutes=rng.randint(1, 600)) if status == 'sold' else now + timedelta(hours=rng.randint(24, 240))
+            rows.append((f'bench product {i}', 'Bench fixture product. ' * rng.randint(1, 20), rng.choice(CONDITIONS),
+                         rng.randint(100, 10000) / 100, status, start, end, rng.choice(user_ids[1:])))
+        cursor.executemany(
+            """
+            INSERT INTO Product (title, description, `condition`, initialBid, status, startTime, endTime, userId)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            """,
+            rows
+        )
+        cursor.execute("SELECT productId, status, initialBid, userId FROM Product WHERE title LIKE 'bench %' ORDER BY productId")
+        product_rows = cursor.fetchall()
+        product_ids = [row[0] for row in product_rows]
+
+        cursor.executemany("INSERT INTO Cat_Prod (categoryId, productId) VALUES (%s, %s)",
+                           [(rng.choice(category_ids), product_id) for product_id in product_ids])
+        cursor.executemany("INSERT INTO Product_img (productId, imageURL) VALUES (%s, %s)",
+                           [(product_id, f'https://img.bench.invalid/{product_id}/{n}.jpg')
+                            for product_id in product_ids for n in range(rng.randint(1, 4))])
+
+        # Bid histories skewed towards a few popular auctions
+        bids = []
+        for product_id, status, initial_bid, seller in product_rows:
+            if status == 'upcoming':
+                continue
+            count = min(int(bids_per_product * rng.paretovariate(1.5) / 3), bids_per_product * 50)
+            amount = float(initial_bid)
+            for n in range(count):
+                amount += rng.randint(100, 1000) / 100
+                bidder = rng.choice([user_id for user_id in user_ids[:20] if user_id != seller])
+                bids.append((round(amount, 2), now - timedelta(minutes=count - n), n == count - 1, bidder, product_id))
+        cursor.executemany(
+            "INSERT INTO Bid (bidAmount, bidTime, isWinningBid, userId, productId) VALUES (%s, %s, %s, %s, %s)",
+            bids
+        )
+        cursor.execute(
+            """
+            UPDATE Product p
+            JOIN (SELECT productId, COUNT(*) AS bidCount, MAX(bidAmount) AS highestBid, MAX(bidTime) AS lastBidAt
+                  FROM Bid GROUP BY productId) b ON b.productId = p.productId
+            SET p.bidCount = b.bidCount, p.highestBid = b.highestBid, p.lastBidAt = b.lastBidAt,
+                p.currentBidPrice = b.highestBid
+            WHERE p.title LIKE 'bench %'
+            """
+        )
+
+        # Orders and shipments for the first (logged in) user
+        sold = [row[0] for row in product_rows if row[1] == 'sold'] or product_ids
+        cursor.executemany(
+            """
+            INSERT INTO `Order` (orderDate, orderStatus, paymentTime, paymentStatus, paymentMethod,
+                                 totalAmount, transactionId, userId, productId)
+            VALUES (%s, 'confirmed', %s, 'paid', 'credit_card', %s, %s, %s, %s)
+            """,
+            [(now - timedelta(days=i), now - timedelta(days=i), rng.randint(100, 100000) / 100,
+              f'bench-{i}', user_ids[0], rng.choice(sold)) for i in range(50)]
+        )
+        cursor.execute("SELECT orderId FROM `Order` WHERE transactionId LIKE 'bench-%' ORDER BY orderId")
+        order_ids = [row[0] for row in cursor.fetchall()]
+        cursor.executemany(
+            """
+            INSERT INTO Shipment (shippingMethod, trackingNumber, carrierName, shippingStatus, shippingCost,
+                                  estimatedDeliveryDate, houseFlatNo, street, city, pincode, orderId)
+            VALUES ('standard', %s, 'Bench Carrier', 'in_transit', 4.99, %s, '1', 'Bench Street', 'Bench City', '560001', %s)
+            """,
+            [(f'bench-{order_id}', (now + timedelta(days=3)).date(), order_id) for order_id in order_ids]
+        )
+        cursor.execute("SELECT shippingId FROM Shipment WHERE trackingNumber LIKE 'bench-%' ORDER BY shippingId")
+        shipment_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT bidId FROM Bid WHERE productId IN (%s)" % ', '.join(map(str, product_ids)))
+        bid_ids = [row[0] for row in cursor.fetchall()]
+
+        connection.commit()
+
+        live = [row for row in product_rows if row[1] == 'live']
+        return {
+            'user_ids': user_ids,
+            'category_ids': category_ids,
+            'product_ids': product_ids,
+            'bid_ids': bid_ids,
+            'shipment_ids': shipment_ids,
+            # Bids placed during the run go to two live auctions sold by
+            # someone other than the bidding user
+            'hot_products': [row[0] for row in live if row[3] != user_ids[0]][:2],
+            'bids_seeded': len(bids),
+        }
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def delete_fixture(create_connection):
+    connection = create_connection()
+    cursor = connection.cursor()
+    products = "SELECT productId FROM (SELECT productId FROM Product WHERE title LIKE 'bench %') AS p"
+    users = "SELECT userId FROM (SELECT userId FROM User WHERE email LIKE 'bench-%@bench.invalid') AS u"
+    try:
+        cursor.execute("DELETE FROM Shipment WHERE trackingNumber LIKE 'bench-%' OR orderId IN "
+                       f"(SELECT orderId FROM `Order` WHERE userId IN ({users}) OR productId IN ({products}))")
+        cursor.execute(f"DELETE FROM `Order` WHERE userId IN ({users}) OR productId IN ({products})")
+        cursor.execute(f"DELETE FROM Bid WHERE userId IN ({users}) OR productId IN ({products})")
+        cursor.execute(f"DELETE FROM Product_img WHERE productId IN ({products})")
+        cursor.execute(f"DELETE FROM Cat_Prod WHERE productId IN ({products})")
+        cursor.execute("DELETE FROM Product WHERE title LIKE 'bench %'")
+        cursor.execute("DELETE FROM Category WHERE categoryName LIKE 'bench %'")
+        cursor.execute("DELETE FROM User WHERE email LIKE 'bench-%@bench.invalid'")
+        connection.commit()
+    finally:
+        cursor.close()
+        connection.close()
+
+
+# Scenarios: name -> fn(fixture, rng, i) returning (method, path, client kwargs, expected statuses)
+
+def _auth(fixture):
+    return {'Authorization': f"Bearer {fixture['access_token']}"}
+
+def _future(days):
+    return (datetime.now() + timedelta(days=days)).replace(microsecond=0).isoformat()
+
+SCENARIOS = {
+    'product_detail': lambda f, rng, i: (
+        'GET', '/api/v2/products/product', {'query_string': {'id': rng.choice(f['product_ids'])}}, (200,)),
+    'product_list': lambda f, rng, i: (
+        'GET', '/api/v2/products', {'query_string': {'status': 'live', 'limit': 20}}, (200,)),
+    'category_products': lambda f, rng, i: (
+        'GET', '/api/v2/categories/products',
+        {'query_string': {'categoryId': rng.choice(f['category_ids']), 'limit': 20}}, (200,)),
+    'trending_products': lambda f, rng, i: (
+        'GET', '/api/v2/products/trending', {'query_string': {'limit': 10}}, (200,)),
+    'lht_products': lambda f, rng, i: (
+        'GET', '/api/products/lht', {'headers': {'Accept-Encoding': 'gzip'}}, (200,)),
+    'product_create': lambda f, rng, i: (
+        'POST', '/api/v2/products/create',
+        {'json': {'title': f'bench product created {i}', 'description': 'Created by bench/endpoints.py',
+                  'condition': 'new', 'initialBid': 10, 'status': 'upcoming', 'startTime': _future(1),
+                  'endTime': _future(7), 'categoryId': rng.choice(f['category_ids']),
+                  'images': [f'https://img.bench.invalid/created/{i}.jpg']}}, (201,)),
+    'categories': lambda f, rng, i: (
+        'GET', '/api/v2/categories', {'query_string': {'limit': 10}}, (200,)),
+    'category_detail': lambda f, rng, i: (
+        'GET', '/api/v2/category', {'query_string': {'categoryId': rng.choice(f['category_ids'])}}, (200,)),
+    'product_bids': lambda f, rng, i: (
+        'GET', '/api/v2/product/bids', {'query_string': {'productId': rng.choice(f['product_ids'])}}, (200, 404)),
+    'product_highest_bid': lambda f, rng, i: (
+        'GET', '/api/v2/product/highestbid', {'query_string': {'productId': rng.choice(f['product_ids'])}}, (200, 404)),
+    'bid_detail': lambda f, rng, i: (
+        'GET', '/api/v2/bids', {'query_string': {'bidId': rng.choice(f['bid_ids'])}}, (200,)),
+    'bid_place': lambda f, rng, i: (
+        'POST', '/api/v2/bid',
+        {'json': {'userId': f['user_ids'][0], 'productId': f['hot_products'][0], 'bidAmount': 100000 + i}}, (201,)),
+    'bid_batch': lambda f, rng, i: (
+        'POST', '/api/v2/bid/batch',
+        {'json': {'bids': [{'userId': f['user_ids'][0], 'productId': f['hot_products'][1],
+                            'bidAmount': 100000 + i * 10 + n} for n in range(5)]}}, (200,)),
+    'user_bids': lambda f, rng, i: (
+        'GET', '/api/v2/users/bids', {'headers': _auth(f)}, (200, 404)),
+    'user_details': lambda f, rng, i: (
+        'GET', '/api/v2/users', {'headers': _auth(f)}, (200,)),
+    'user_orders': lambda f, rng, i: (
+        'GET', '/api/v2/users/orders', {'headers': _auth(f)}, (200,)),
+    'order_create': lambda f, rng, i: (
+        'POST', '/api/v2/users/orders',
+        {'headers': _auth(f),
+         'json': {'orderDate': _future(0), 'orderStatus': 'pending', 'paymentStatus': 'unpaid',
+                  'paymentMethod': 'paypal', 'totalAmount': 25, 'transactionId': f'bench-created-{i}',
+                  'productId': rng.choice(f['product_ids'])}}, (201,)),
+    'shipment_detail': lambda f, rng, i: (
+        'GET', '/api/v2/shipments', {'query_string': {'shippingId': rng.choice(f['shipment_ids'])}}, (200,)),
+    'shipment_list': lambda f, rng, i: (
+        'GET', '/api/v2/shipments', {}, (200,)),
+    'register': lambda f, rng, i: (
+        'POST', '/api/v2/register',
+        {'json': {'username': f"bench-registered-{f['run']}-{i}", 'email': f"bench-r{f['run']}-{i}@bench.invalid",
+                  'password': BENCH_PASSWORD, 'phone': '9000000000', 'firstName': 'Bench', 'lastName': 'Registered',
+                  'houseFlatNo': '1', 'street': 'Bench Street', 'city': 'Bench City', 'pincode': '560001',
+                  'dateJoined': _future(0), 'isVerified': False}}, (201,)),
+    'login': lambda f, rng, i: (
+        'POST', '/api/v2/login', {'json': {'email': 'bench-0@bench.invalid', 'password': BENCH_PASSWORD}}, (200,)),
+    'token_refresh': lambda f, rng, i: (
+        'POST', '/api/v2/token/refresh', {'json': {'refreshToken': f['refresh_token']}}, (200,)),
+}
+
+
+def run_scenario(client, counter, fixture, name, iterations, warmup, seed):
+    build = SCENARIOS[name]
+    rng = random.Random(f'{seed}:{name}')
+    latencies, queries, unexpected = [], [], {}
+
+    for i in range(warmup + iterations):
+        method, path, kwargs, expected = build(fixture, rng, i)
+        before = counter['queries']
+        started = time.perf_counter()
+        response = client.open(path, method=method, **kwargs)
+        response.get_data()
+        elapsed = time.perf_counter() - started
+        response.close()
+        if i < warmup:
+            continue
+        latencies.append(elapsed)
+        queries.append(counter['queries'] - before)
+        if response.status_code not in expected:
+            unexpected[str(response.status_code)] = unexpected.get(str(response.status_code), 0) + 1
+
+    total = sum(latencies)
+    return {
+        'requests': len(latencies),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'mean_ms': round(total / len(latencies) * 1000, 3) if latencies else 0.0,
+        'throughput_rps': round(len(latencies) / total, 1) if total else 0.0,
+        'queries_per_request': round(sum(queries) / len(queries), 2) if queries else 0.0,
+        'max_queries': max(queries, default=0),
+        'unexpected_status': unexpected,
+    }
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    failures = []
+    for name, current in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if previous is None:
+            continue
+        delta = current['p95_ms'] - previous['p95_ms']
+        if delta > previous['p95_ms'] * threshold and delta >= min_delta_ms:
+            failures.append(f"{name}: p95 {current['p95_ms']:.2f}ms vs baseline {previous['p95_ms']:.2f}ms "
+                            f"(+{delta / previous['p95_ms'] * 100 if previous['p95_ms'] else float('inf'):.0f}%)")
+        if current['queries_per_request'] > previous['queries_per_request'] + 0.5:
+            failures.append(f"{name}: {current['queries_per_request']} queries per request vs baseline "
+                            f"{previous['queries_per_request']}")
+        if sum(current['unexpected_status'].values()) > sum(previous['unexpected_status'].values()):
+            failures.append(f"{name}: unexpected statuses {current['unexpected_status']}")
+    return failures
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200, help='measured requests per scenario')
+    parser.add_argument('--warmup', type=int, default=20, help='unmeasured requests per scenario')
+    parser.add_argument('--scenarios', help=f"comma separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument('--seed', type=int, default=1, help='seed for the fixture and request parameters')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--products', type=int, default=500)
+    parser.add_argument('--bids-per-product', type=int, default=20, help='mean bids per auction; skewed per product')
+    parser.add_argument('--output', help='write the results here as JSON')
+    parser.add_argument('--baseline', help='compare against this results file and fail on regressions')
+    parser.add_argument('--save-baseline', help='write the results here for later --baseline runs')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed relative p95 growth')
+    parser.add_argument('--min-delta-ms', type=float, default=1.0, help='ignore p95 growth smaller than this')
+    parser.add_argument('--keep', action='store_true', help='keep the fixture rows')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(',')] if args.scenarios else list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    # Background work would add queries and CPU to the measured requests
+    os.environ.setdefault('AUCTION_SCHEDULER', '0')
+    os.environ.setdefault('PROFILE_SAMPLE_RATE', '0')
+
+    from index import app
+    from models import create_connection, get_pool
+    from passwords import hash_password
+    from encoding import ENCODER
+
+    # Count statements issued on this thread, i.e. by the request under test
+    main_thread = threading.get_ident()
+    counter = {'queries': 0}
+
+    def count_query(event):
+        if threading.get_ident() == main_thread:
+            counter['queries'] += 1
+
+    get_pool().listen(count_query)
+
+    delete_fixture(create_connection)
+    fixture = seed_fixture(create_connection, hash_password, random.Random(args.seed),
+                           args.users, args.products, args.bids_per_product)
+    fixture['run'] = int(time.time())
+    print(f"fixture: {len(fixture['user_ids'])} users, {len(fixture['product_ids'])} products, "
+          f"{fixture['bids_seeded']} bids")
+
+    client = app.test_client()
+    try:
+        results = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'encoder': ENCODER,
+            'config': {key: getattr(args, key) for key in ('iterations', 'warmup', 'seed', 'users', 'products',
+                                                           'bids_per_product')},
+            'scenarios': {},
+        }
+        print(f"{'scenario':<20} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'queries':>8}")
+        for name in names:
+            # Fresh tokens per scenario so a long run does not outlive them
+            tokens = client.post('/api/v2/login', json={'email': 'bench-0@bench.invalid',
+                                                        'password': BENCH_PASSWORD}).get_json()
+            fixture['access_token'], fixture['refresh_token'] = tokens['accessToken'], tokens['refreshToken']
+            result = run_scenario(client, counter, fixture, name, args.iterations, args.warmup, args.seed)
+            results['scenarios'][name] = result
+            print(f"{name:<20} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+                  f"{result['throughput_rps']:>8.1f} {result['queries_per_request']:>8.2f}"
+                  + (f"  unexpected {result['unexpected_status']}" if result['unexpected_status'] else ''))
+    finally:
+        if not args.keep:
+            delete_fixture(create_connection)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        failures = compare(results, baseline, args.threshold, args.min_delta_ms)
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        if failures:
+            sys.exit(1)
+        print(f"OK: no regressions against {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
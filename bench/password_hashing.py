@@ -0,0 +1,57 @@
+"""Login throughput of the password hashing pool (api/passwords.py).
+
+Runs the same burst of password verifications from many request threads
+against HashingPool instances with 0 (inline), 1, 2, ... worker processes
+and prints verifications per second, which should scale with cores:
+
+    python bench/password_hashing.py --logins 64 --threads 32
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from werkzeug.security import generate_password_hash, check_password_hash
+from passwords import HashingPool, HASH_METHOD
+
+
+def measure(workers, pwhash, logins, threads):
+    pool = HashingPool(workers=workers, max_pending=logins, timeout=600)
+    # Warm up so worker start-up is not counted
+    pool.run(check_password_hash, pwhash, 'secret')
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as requests:
+        results = list(requests.map(lambda _: pool.run(check_password_hash, pwhash, 'secret'), range(logins)))
+    elapsed = time.perf_counter() - started
+    pool.shutdown()
+
+    assert all(results)
+    return logins / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--logins', type=int, default=64)
+    parser.add_argument('--threads', type=int, default=32, help='concurrent request threads')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--method', default=HASH_METHOD)
+    args = parser.parse_args()
+
+    pwhash = generate_password_hash('secret', args.method)
+    print(f"method {args.method}, {args.logins} logins from {args.threads} threads")
+
+    worker_counts = [0] + sorted({1, 2, 4, 8, 16, args.max_workers} & set(range(1, args.max_workers + 1)))
+    baseline = None
+    for workers in worker_counts:
+        rate = measure(workers, pwhash, args.logins, args.threads)
+        baseline = baseline or rate
+        label = 'inline' if workers == 0 else f'{workers} worker{"s" if workers > 1 else ""}'
+        print(f"{label:>12}: {rate:8.1f} logins/s  ({rate / baseline:.1f}x inline)")
+
+
+if __name__ == '__main__':
+    main()
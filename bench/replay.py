@@ -0,0 +1,222 @@
+"""Replay captured API traffic against an instance and report latency per route.
+
+Reads the JSONL written by api/capture.py (CAPTURE_SAMPLE_RATE > 0), ordered
+by arrival time, and re-issues each request at its original offset divided
+by --speed, from --concurrency worker threads with keep-alive sessions.
+--speed 0 sends as fast as the workers allow. Requests captured with a
+bearer token are sent with --token, or with a token from logging in as
+--email/--password.
+
+    python bench/replay.py /tmp/probidder-traffic.jsonl --target http://localhost:3000 --speed 4 --concurrency 32
+    python bench/replay.py traffic.jsonl* --routes /api/products/lht,/api/v2/categories/products --output replay.json
+
+Per route it prints request count, errors (5xx or connection failures),
+p50/p95/p99 latency next to the captured p50, and how far dispatch fell
+behind schedule, which shows when the target, not the clock, set the pace.
+Streamed responses (captured without a size, e.g. the SSE bid stream) are
+skipped unless --include-streamed is given.
+"""
+import argparse
+import heapq
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def read_records(paths, routes=None, limit=None, include_streamed=False):
+    # Rotated captures are each time ordered; merge them by arrival time
+    def records(path):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    record = json.loads(line)
+                    # Streamed responses (SSE, NDJSON exports) were captured
+                    # with no size and time-to-headers only; a replayed SSE
+                    # stream would hold a worker for minutes
+                    if record.get('bytes') is None and not include_streamed:
+                        continue
+                    if routes is None or record.get('route') in routes:
+                        yield record['ts'], record
+
+    merged = heapq.merge(*(records(path) for path in paths), key=lambda item: item[0])
+    result = []
+    for _, record in merged:
+        result.append(record)
+        if limit and len(result) >= limit:
+            break
+    return result
+
+
+def login(target, email, password):
+    response = requests.post(f'{target}/api/v2/login', json={'email': email, 'password': password}, timeout=30)
+    response.raise_for_status()
+    return response.json()['accessToken']
+
+
+class Replayer:
+    def __init__(self, target, concurrency, token=None, timeout=30):
+        self.target = target.rstrip('/')
+        self.token = token
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.results = {}   # (method, route) -> {'latencies', 'captured', 'errors', 'statuses'}
+        self.lag = []
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def send(self, record, due):
+        headers = {'Accept-Encoding': 'gzip'}
+        streamed = record.get('bytes') is None
+        if record.get('auth') and self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        started = time.perf_counter()
+        status, error = None, None
+        try:
+            response = self._session().request(
+                record['method'], self.target + record['path'], params=record.get('args') or None,
+                json=record.get('body'), headers=headers, timeout=self.timeout, stream=True
+            )
+            # Drain the body so responses are timed to the last byte; event
+            # streams never end on their own, so they are timed to headers
+            if response.headers.get('Content-Type', '').startswith('text/event-stream'):
+                response.close()
+            else:
+                for _ in response.iter_content(64 * 1024):
+                    pass
+            status = response.status_code
+        except requests.RequestException as e:
+            error = type(e).__name__
+        elapsed = time.perf_counter() - started
+
+        key = (record['method'], record.get('route') or record['path'])
+        with self._lock:
+            entry = self.results.get(key)
+            if entry is None:
+                entry = self.results[key] = {'latencies': [], 'captured': [], 'errors': 0, 'statuses': {}}
+            entry['latencies'].append(elapsed)
+            # A streamed capture's ms is time-to-headers, not comparable
+            if record.get('ms') is not None and not streamed:
+                entry['captured'].append(record['ms'] / 1000)
+            label = str(status) if status is not None else error
+            entry['statuses'][label] = entry['statuses'].get(label, 0) + 1
+            if status is None or status >= 500:
+                entry['errors'] += 1
+            self.lag.append(max(0.0, started - due))
+
+    def run(self, records, speed):
+        if not records:
+            return 0.0
+        # Bounded hand-off: dispatch blocks instead of queueing unboundedly
+        # when the target falls behind the schedule
+        slots = threading.BoundedSemaphore(self.concurrency * 2)
+        first = records[0]['ts']
+        started = time.perf_counter()
+
+        def task(record, due):
+            try:
+                self.send(record, due)
+            finally:
+                slots.release()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for record in records:
+                due = started + ((record['ts'] - first) / speed if speed > 0 else 0.0)
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                slots.acquire()
+                executor.submit(task, record, due)
+        return time.perf_counter() - started
+
+    def report(self, duration):
+        routes = {}
+        for (method, route), entry in sorted(self.results.items()):
+            latencies = entry['latencies']
+            routes[f'{method} {route}'] = {
+                'requests': len(latencies),
+                'errors': entry['errors'],
+                'statuses': entry['statuses'],
+                'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+                'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+                'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+                'max_ms': round(max(latencies) * 1000, 3),
+                'captured_p50_ms': round(percentile(entry['captured'], 50) * 1000, 3) if entry['captured'] else None,
+            }
+        total = sum(route['requests'] for route in routes.values())
+        return {
+            'requests': total,
+            'seconds': round(duration, 3),
+            'throughput_rps': round(total / duration, 1) if duration else 0.0,
+            'lag_p95_ms': round(percentile(self.lag, 95) * 1000, 3),
+            'lag_max_ms': round(max(self.lag, default=0.0) * 1000, 3),
+            'routes': routes,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='+', help='capture files (rotated ones may be given together)')
+    parser.add_argument('--target', default=os.getenv('REPLAY_TARGET', 'http://localhost:3000'))
+    parser.add_argument('--speed', type=float, default=1.0, help='replay rate versus capture; 0 is unthrottled')
+    parser.add_argument('--concurrency', type=int, default=16, help='requests in flight at most')
+    parser.add_argument('--routes', help='comma separated route rules to replay, e.g. /api/products/lht')
+    parser.add_argument('--limit', type=int, help='replay at most this many requests')
+    parser.add_argument('--token', help='bearer token for requests captured with one')
+    parser.add_argument('--email', help='log in as this user to get a bearer token')
+    parser.add_argument('--password')
+    parser.add_argument('--include-streamed', action='store_true',
+                        help='also replay streamed responses; event streams are timed to headers')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--output', help='write the report here as JSON')
+    args = parser.parse_args()
+
+    routes = {route.strip() for route in args.routes.split(',')} if args.routes else None
+    records = read_records(args.paths, routes, args.limit, args.include_streamed)
+    if not records:
+        sys.exit('no requests to replay')
+
+    token = args.token
+    if token is None and args.email:
+        token = login(args.target, args.email, args.password)
+
+    span = records[-1]['ts'] - records[0]['ts']
+    print(f"replaying {len(records)} requests captured over {span:.1f}s at "
+          f"{'max speed' if args.speed <= 0 else f'{args.speed:g}x'} with {args.concurrency} workers")
+
+    replayer = Replayer(args.target, args.concurrency, token, args.timeout)
+    report = replayer.report(replayer.run(records, args.speed))
+
+    print(f"{'route':<48} {'reqs':>6} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'captured p50':>12}")
+    for name, route in report['routes'].items():
+        captured = f"{route['captured_p50_ms']:.2f}" if route['captured_p50_ms'] is not None else '-'
+        print(f"{name:<48} {route['requests']:>6} {route['errors']:>6} {route['p50_ms']:>8.2f} "
+              f"{route['p95_ms']:>8.2f} {route['p99_ms']:>8.2f} {captured:>12}")
+    print(f"{report['requests']} requests in {report['seconds']:.1f}s ({report['throughput_rps']} req/s), "
+          f"dispatch lag p95={report['lag_p95_ms']:.1f}ms max={report['lag_max_ms']:.1f}ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+from capture import pseudonym, scrub
+
+def test_secrets_replaced_with_marker():
+    body = {'email': 'a@b.c', 'password': 'hunter2', 'accessToken': 'abc', 'refreshToken': 'def'}
+    scrubbed = scrub(body)
+    assert scrubbed['password'] == scrubbed['accessToken'] == scrubbed['refreshToken'] == '[redacted]'
+
+def test_pii_pseudonymized():
+    scrubbed = scrub({'username': 'alice', 'firstName': 'Alice', 'email': 'alice@example.com'})
+    assert scrubbed['username'].startswith('redacted-')
+    assert 'alice' not in str(scrubbed).lower()
+    assert scrubbed['email'].endswith('@redacted.invalid')
+
+def test_pseudonyms_are_stable_per_field_and_value():
+    assert pseudonym('username', 'alice') == pseudonym('username', 'alice')
+    assert pseudonym('username', 'alice') != pseudonym('username', 'bob')
+    assert pseudonym('username', 'alice') != pseudonym('lastName', 'alice')
+
+def test_phone_and_pincode_keep_their_shape():
+    for field, value in (('phone', '9876543210'), ('pincode', '560001'), ('phone', 98765)):
+        masked = pseudonym(field, value)
+        assert masked.isdigit()
+        assert len(masked) == len(str(value))
+        assert masked != str(value)
+
+def test_nested_and_listed_values_scrubbed():
+    body = {
+        'bids': [{'userId': 1, 'email': 'x@y.z'}, {'userId': 2, 'password': 'p'}],
+        'address': {'street': '1 Main St', 'city': 'Springfield', 'country': 'IN'},
+        'phone': ['111', '222'],
+    }
+    scrubbed = scrub(body)
+    assert scrubbed['bids'][0]['userId'] == 1
+    assert scrubbed['bids'][0]['email'].endswith('@redacted.invalid')
+    assert scrubbed['bids'][1]['password'] == '[redacted]'
+    assert scrubbed['address']['street'].startswith('redacted-')
+    assert scrubbed['address']['country'] == 'IN'
+    assert all(phone.isdigit() and phone not in ('111', '222') for phone in scrubbed['phone'])
+
+def test_other_values_untouched():
+    body = {'productId': 7, 'bidAmount': 10.5, 'email': None, 'tags': ['a', 'b']}
+    assert scrub(body) == body
+    assert scrub([1, 'two', None]) == [1, 'two', None]
+    assert scrub('plain') == 'plain'
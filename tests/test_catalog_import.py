@@ -0,0 +1,69 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from mysql.connector import Error
+
+from catalog_import import RowError, new_product_ids, parse_row
+
+def row(title, seller_id=5):
+    return {'product': (title, None, 'new', Decimal('1'), 'live', datetime(2026, 1, 1), datetime(2026, 1, 2), seller_id)}
+
+class ReadBackCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+
+    def execute(self, operation, params=None):
+        self.executed.append(params)
+
+    def fetchall(self):
+        return self.rows
+
+def test_single_row_uses_lastrowid():
+    cursor = ReadBackCursor([])
+    assert new_product_ids(cursor, 10, [row('a')]) == [10]
+    assert cursor.executed == []
+
+def test_ids_need_not_be_consecutive():
+    # auto_increment_increment = 2, with another session's row in between
+    cursor = ReadBackCursor([
+        (10, 'a', 'new', 'live', 5),
+        (12, 'other', 'used', 'live', 9),
+        (14, 'b', 'new', 'live', None),
+        (16, 'c', 'new', 'live', 5),
+    ])
+    assert new_product_ids(cursor, 10, [row('a'), row('b', None), row('c')]) == [10, 14, 16]
+    assert cursor.executed == [(10,)]
+
+def test_unmatched_rows_raise_a_database_error():
+    cursor = ReadBackCursor([(10, 'a', 'new', 'live', 5)])
+    with pytest.raises(Error):
+        new_product_ids(cursor, 10, [row('a'), row('b')])
+
+def test_parse_row():
+    parsed = parse_row({
+        'title': 'Lamp', 'condition': 'used', 'initialBid': '12.50', 'status': 'upcoming',
+        'startTime': '2026-01-01T10:00:00', 'endTime': '2026-01-02T10:00:00', 'categoryId': '3',
+        'userId': '', 'images': ['a.jpg'],
+    })
+    assert parsed['product'][3] == Decimal('12.50')
+    assert parsed['product'][7] is None
+    assert parsed['categoryId'] == 3
+    assert parsed['images'] == ['a.jpg']
+
+@pytest.mark.parametrize('change, message', [
+    ({'title': ''}, 'Missing required field: title'),
+    ({'condition': 'broken'}, 'condition must be one of'),
+    ({'initialBid': 'lots'}, 'initialBid must be a number'),
+    ({'endTime': '2026-01-01T09:00:00'}, 'endTime must be after startTime'),
+    ({'images': 'a.jpg'}, 'images must be a list of URLs'),
+])
+def test_parse_row_rejects(change, message):
+    raw = {
+        'title': 'Lamp', 'condition': 'used', 'initialBid': '12.50', 'status': 'upcoming',
+        'startTime': '2026-01-01T10:00:00', 'endTime': '2026-01-02T10:00:00', 'categoryId': '3',
+    }
+    raw.update(change)
+    with pytest.raises(RowError, match=message):
+        parse_row(raw)
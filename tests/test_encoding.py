@@ -0,0 +1,67 @@
+import importlib
+import json
+import sys
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+import pytest
+
+import encoding
+
+ROW = {
+    'productId': 7,
+    'currentBidPrice': Decimal('12.50'),
+    'startTime': datetime(2026, 1, 2, 3, 4, 5, 678000),
+    'endTime': datetime(2026, 1, 2),
+    'day': date(2026, 1, 2),
+    'at': time(1, 2, 3),
+    'window': timedelta(seconds=90),
+    'raw': b'bytes',
+    'tags': {'new'},
+    1: 'non-string key',
+    'title': 'ünïcode',
+    'images': [None, True, 1.5],
+}
+
+EXPECTED = {
+    'productId': 7,
+    'currentBidPrice': 12.5,
+    'startTime': '2026-01-02T03:04:05.678000',
+    'endTime': '2026-01-02T00:00:00',
+    'day': '2026-01-02',
+    'at': '01:02:03',
+    'window': 90.0,
+    'raw': 'bytes',
+    'tags': ['new'],
+    '1': 'non-string key',
+    'title': 'ünïcode',
+    'images': [None, True, 1.5],
+}
+
+# Reload encoding without orjson, and restore the real module afterwards.
+# Also yields ROW as encoded before the reload.
+@pytest.fixture
+def stdlib_encoding(monkeypatch):
+    encoded = encoding.dumps(ROW)
+    monkeypatch.setitem(sys.modules, 'orjson', None)
+    module = importlib.reload(encoding)
+    yield module, encoded
+    monkeypatch.undo()
+    importlib.reload(encoding)
+
+def test_dumps_row_values():
+    assert json.loads(encoding.dumps(ROW)) == EXPECTED
+
+def test_stdlib_fallback_matches(stdlib_encoding):
+    module, _ = stdlib_encoding
+    assert module.ENCODER == 'json'
+    assert json.loads(module.dumps(ROW)) == EXPECTED
+
+@pytest.mark.skipif(encoding.orjson is None, reason='orjson is not installed')
+def test_orjson_and_stdlib_bytes_match(stdlib_encoding):
+    module, encoded = stdlib_encoding
+    assert encoded == module.dumps(ROW)
+
+def test_unknown_type_raises():
+    with pytest.raises(TypeError):
+        encoding.dumps({'value': object()})
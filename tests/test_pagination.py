@@ -0,0 +1,71 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from flask import Flask
+
+import pagination
+from pagination import InvalidCursor, decode_cursor, encode_cursor, page_limit, seek, split_page
+
+app = Flask(__name__)
+
+def test_cursor_round_trip():
+    values = [datetime(2026, 1, 2, 3, 4, 5, 6), date(2026, 1, 2), Decimal('12.50'), 42, 'title', None]
+    token = encode_cursor('startTime:asc', values)
+    assert '=' not in token
+    assert decode_cursor(token, 'startTime:asc', len(values)) == values
+
+@pytest.mark.parametrize('token', ['', 'not base64!', encode_cursor('x', [1])[:-2], 'e30'])
+def test_garbage_cursor_rejected(token):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(token, 'x', 1)
+
+def test_cursor_for_another_sort_rejected():
+    token = encode_cursor('startTime:asc', [datetime(2026, 1, 1), 1])
+    with pytest.raises(InvalidCursor):
+        decode_cursor(token, 'startTime:desc', 2)
+    with pytest.raises(InvalidCursor):
+        decode_cursor(token, 'startTime:asc', 1)
+
+def test_split_page_without_more_rows():
+    rows = [{'productId': 1}, {'productId': 2}]
+    assert split_page(rows, 2, 'productId:asc', ['productId']) == (rows, None)
+
+def test_split_page_with_more_rows():
+    rows = [{'productId': 1}, {'productId': 2}, {'productId': 3}]
+    page, token = split_page(rows, 2, 'productId:asc', ['productId'])
+    assert page == rows[:2]
+    assert decode_cursor(token, 'productId:asc', 1) == [2]
+
+@pytest.mark.parametrize('query, expected', [
+    ('', 5),
+    ('?limit=7', 7),
+    ('?limit=0', 1),
+    ('?limit=-1', 1),
+    ('?limit=-50', 1),
+    ('?limit=abc', 5),
+    (f'?limit={pagination.MAX_PAGE_SIZE + 1}', pagination.MAX_PAGE_SIZE),
+])
+def test_page_limit_is_clamped(query, expected):
+    with app.test_request_context('/' + query):
+        assert page_limit(default=5) == expected
+
+def test_clamped_limit_pages_cleanly():
+    # limit=0 used to reach split_page unclamped and index an empty page
+    with app.test_request_context('/?limit=0'):
+        limit = page_limit(default=5)
+    rows = [{'productId': 1}, {'productId': 2}]
+    page, token = split_page(rows[:limit + 1], limit, 'productId:asc', ['productId'])
+    assert page == rows[:1]
+    assert token is not None
+
+def test_seek_builds_row_comparison():
+    token = encode_cursor('startTime:desc', [datetime(2026, 1, 1), 9])
+    with app.test_request_context('/', query_string={'cursor': token}):
+        sql, params = seek(['startTime', 'productId'], 'startTime:desc', descending=True)
+    assert sql == '(startTime, productId) < (%s, %s)'
+    assert params == [datetime(2026, 1, 1), 9]
+
+def test_seek_without_cursor():
+    with app.test_request_context('/'):
+        assert seek(['productId'], 'productId:asc', descending=False) == (None, [])
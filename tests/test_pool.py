@@ -0,0 +1,173 @@
+import pytest
+
+import pool as pool_module
+from pool import ConnectionPool, PooledConnection, PoolTimeout, TrackedCursor
+
+class FakeCursor:
+    def __init__(self, rows=(), fail=None):
+        self.rows = list(rows)
+        self.fail = fail
+        self.executed = []
+        self.closed = False
+
+    def execute(self, operation, *params):
+        if self.fail:
+            raise self.fail
+        self.executed.append((operation, params))
+
+    def executemany(self, operation, seq_params):
+        self.executed.append((operation, (list(seq_params),)))
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+    def fetchmany(self, size=1):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+    def fetchall(self):
+        batch, self.rows = self.rows, []
+        return batch
+
+    def close(self):
+        self.closed = True
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.rolled_back = 0
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor(rows=[(1,), (2,), (3,)])
+
+    def is_connected(self):
+        return not self.closed
+
+    def rollback(self):
+        self.rolled_back += 1
+
+    def ping(self, reconnect=False):
+        pass
+
+    def close(self):
+        self.closed = True
+
+def tracked(raw):
+    events = []
+    return TrackedCursor(raw, [events.append], 'session'), events
+
+def test_event_reported_when_cursor_moves_on():
+    cursor, events = tracked(FakeCursor(rows=[(1,), (2,)]))
+    cursor.execute('SELECT 1', (5,))
+    assert cursor.fetchall() == [(1,), (2,)]
+    assert events == []
+
+    cursor.execute('SELECT 2')
+    assert len(events) == 1
+    event = events[0]
+    assert (event.statement, event.params, event.many, event.rows) == ('SELECT 1', (5,), False, 2)
+    assert event.connection == 'session'
+    assert event.error is None
+
+def test_event_reported_on_close():
+    raw = FakeCursor(rows=[(1,), (2,), (3,)])
+    cursor, events = tracked(raw)
+    cursor.execute('SELECT 1')
+    cursor.fetchone()
+    cursor.fetchmany(5)
+    cursor.close()
+    assert raw.closed
+    assert [event.rows for event in events] == [3]
+
+    # Closing again reports nothing new
+    cursor.close()
+    assert len(events) == 1
+
+def test_params_omitted_when_none():
+    raw = FakeCursor()
+    cursor, _ = tracked(raw)
+    cursor.execute('SELECT 1')
+    cursor.execute('SELECT %s', (1,))
+    cursor.executemany('INSERT INTO t VALUES (%s)', [(1,), (2,)])
+    assert raw.executed == [
+        ('SELECT 1', ()),
+        ('SELECT %s', ((1,),)),
+        ('INSERT INTO t VALUES (%s)', ([(1,), (2,)],)),
+    ]
+
+def test_failed_statement_reported_with_error():
+    cursor, events = tracked(FakeCursor(fail=RuntimeError('boom')))
+    with pytest.raises(RuntimeError):
+        cursor.execute('SELECT 1')
+    assert len(events) == 1
+    assert isinstance(events[0].error, RuntimeError)
+
+def test_iteration_counts_rows():
+    cursor, events = tracked(FakeCursor(rows=[(1,), (2,)]))
+    cursor.execute('SELECT 1')
+    assert list(cursor) == [(1,), (2,)]
+    cursor.close()
+    assert events[0].rows == 2
+
+def test_failing_listener_does_not_break_the_cursor():
+    def listener(event):
+        raise ValueError('listener bug')
+    cursor = TrackedCursor(FakeCursor(), [listener], None)
+    cursor.execute('SELECT 1')
+    cursor.close()
+
+@pytest.fixture
+def connections(monkeypatch):
+    opened = []
+    def connect(**kwargs):
+        opened.append(FakeConnection())
+        return opened[-1]
+    monkeypatch.setattr(pool_module.mysql.connector, 'connect', connect)
+    return opened
+
+def test_connections_are_reused(connections):
+    pool = ConnectionPool({}, size=1, max_overflow=0)
+    first = pool.get_connection()
+    first.close()
+    second = pool.get_connection()
+    assert len(connections) == 1
+    assert connections[0].rolled_back == 1
+    second.close()
+    assert pool.stats()['idle'] == 1
+
+def test_close_and_invalidate_are_idempotent(connections):
+    pool = ConnectionPool({}, size=2, max_overflow=0)
+    connection = pool.get_connection()
+    connection.close()
+    connection.close()
+    assert pool.stats()['open'] == 1
+
+    connection = pool.get_connection()
+    connection.invalidate()
+    connection.invalidate()
+    connection.close()
+    assert connections[0].closed
+    assert pool.stats()['open'] == 0
+
+def test_overflow_connections_are_closed_on_return(connections):
+    pool = ConnectionPool({}, size=1, max_overflow=1)
+    first, second = pool.get_connection(), pool.get_connection()
+    first.close()
+    second.close()
+    assert [raw.closed for raw in connections] == [False, True]
+    assert pool.stats()['open'] == 1
+
+def test_checkout_times_out_when_exhausted(connections):
+    pool = ConnectionPool({}, size=1, max_overflow=0, timeout=0.01)
+    pool.get_connection()
+    with pytest.raises(PoolTimeout):
+        pool.get_connection()
+    assert pool.stats()['timeouts'] == 1
+
+def test_cursors_tracked_only_with_listeners(connections):
+    pool = ConnectionPool({}, size=1, max_overflow=0)
+    connection = pool.get_connection()
+    assert isinstance(connection, PooledConnection)
+    assert not isinstance(connection.cursor(), TrackedCursor)
+    pool.listen(lambda event: None)
+    assert isinstance(connection.cursor(), TrackedCursor)
@@ -0,0 +1,97 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from flask import Flask
+
+import slow_queries
+from slow_queries import SlowQueryLog, _holds_locks, digest, normalize, param_shape
+
+app = Flask(__name__)
+
+@pytest.mark.parametrize('statement, expected', [
+    ('SELECT *  FROM Product\n WHERE productId = 42', 'SELECT * FROM Product WHERE productId = ?'),
+    ("SELECT * FROM User WHERE email = 'a@b.c' AND name = \"it\\\"s\"",
+     'SELECT * FROM User WHERE email = ? AND name = ?'),
+    ('SELECT * FROM Bid WHERE bidAmount > -1.5', 'SELECT * FROM Bid WHERE bidAmount > ?'),
+    ('SELECT * FROM Product WHERE productId IN (%s, %s, %s)', 'SELECT * FROM Product WHERE productId IN (...)'),
+    ('SELECT * FROM Product WHERE productId = %(id)s', 'SELECT * FROM Product WHERE productId = ?'),
+    ('INSERT INTO Bid (a, b) VALUES (%s, %s), (%s, %s), (%s, %s)', 'INSERT INTO Bid (a, b) VALUES (...)'),
+    ('SELECT col1, t2.col FROM t2', 'SELECT col1, t2.col FROM t2'),
+    (b'SELECT 1', 'SELECT ?'),
+])
+def test_normalize(statement, expected):
+    assert normalize(statement) == expected
+
+def test_in_lists_of_any_length_share_a_digest():
+    short = normalize('SELECT * FROM Product WHERE productId IN (%s, %s)')
+    long = normalize('SELECT * FROM Product WHERE productId IN (1, 2, 3, 4)')
+    assert digest(short) == digest(long)
+    assert len(digest(short)) == 16
+
+@pytest.mark.parametrize('statement, locks', [
+    ('SELECT * FROM Product', False),
+    ('  with x AS (SELECT 1) SELECT * FROM x', False),
+    ('SELECT * FROM Product WHERE productId = %s FOR UPDATE', True),
+    ('SELECT * FROM Product FOR SHARE', True),
+    ('SELECT * FROM Product LOCK IN SHARE MODE', True),
+    ('UPDATE Product SET status = %s', True),
+    ('INSERT INTO Bid VALUES (%s)', True),
+])
+def test_holds_locks(statement, locks):
+    assert _holds_locks(statement) is locks
+
+def test_param_shape_never_holds_values():
+    params = (7, 'alice@example.com', None, True, Decimal('1.5'), 2.0, datetime(2026, 1, 1), b'x')
+    assert param_shape(params) == ['int', 'str', 'null', 'bool', 'number', 'number', 'datetime', 'bytes']
+    assert param_shape({'email': 'alice@example.com'}) == {'email': 'str'}
+    assert param_shape(None) is None
+
+def test_param_shape_for_executemany():
+    assert param_shape([(1, 'a'), (2, 'b')], many=True) == {'rows': 2, 'row': ['int', 'str']}
+    assert param_shape([], many=True) == {'rows': 0, 'row': None}
+
+class FailingConnection:
+    def __init__(self, error):
+        self.error = error
+
+    def cursor(self):
+        error = self.error
+
+        class Cursor:
+            def execute(self, *args):
+                raise error
+
+            def close(self):
+                pass
+
+        return Cursor()
+
+class DatabaseError(Exception):
+    def __init__(self, errno):
+        super().__init__(f'error {errno}')
+        self.errno = errno
+
+def test_transient_errors_keep_rows_examined_enabled():
+    log = SlowQueryLog()
+    assert log._read_rows_examined(FailingConnection(DatabaseError(2013))) is None
+    assert log._read_rows_examined(FailingConnection(RuntimeError('Unread result found'))) is None
+    assert log._rows_examined
+
+@pytest.mark.parametrize('errno', slow_queries.ROWS_EXAMINED_UNAVAILABLE)
+def test_permanent_errors_disable_rows_examined(errno):
+    log = SlowQueryLog()
+    log._read_rows_examined(FailingConnection(DatabaseError(errno)))
+    assert not log._rows_examined
+
+def test_summary_limit_is_clamped(monkeypatch):
+    log = SlowQueryLog()
+    for index in range(3):
+        log._statements[str(index)] = {
+            'digest': str(index), 'statement': f'SELECT {index}', 'count': 1, 'totalSeconds': float(index),
+            'maxSeconds': 0.0, 'rows': 0, 'rowsExamined': 0, 'errors': 0, 'callers': {}, 'plan': None,
+        }
+    monkeypatch.setattr(slow_queries, 'slow_queries', log)
+    with app.test_request_context('/?limit=-1'):
+        body = slow_queries.summary_view().get_json()
+    assert [entry['digest'] for entry in body['statements']] == ['2']